@@ -3,25 +3,71 @@
 __version__ = "1.0.0"
 
 from .biocroissant_to_omop import (
+    CompiledMetadata,
     BioCroissantParser,
     OMOPTableMapper,
+    DistributionCache,
+    ChecksumError,
     DataExtractor,
+    RecordSetAssembler,
     OMOPValidator,
-    OMOPExporter,
+    ValueDomain,
+    ValueDomainRegistry,
+    ConceptMapper,
     BioCroissantToOMOPConverter,
 )
+from .omop_cdm_spec import (
+    OMOPSpecRegistry,
+)
+from .omop_vocabulary import (
+    VocabularyIndex,
+)
+from .omop_keys import (
+    KeyIndex,
+    TableKeys,
+    PrimaryKeyChecker,
+    ReferentialIntegrityChecker,
+)
+from .omop_profile import (
+    HyperLogLog,
+    ColumnProfile,
+    TableProfiler,
+)
+from .omop_export import (
+    OMOPConstraintSpec,
+    OMOPExporter,
+    OMOPDatabaseLoader,
+)
 from .generate_synthetic_dataset import (
     OMOPSyntheticDataGenerator,
     BioCroissantMetadataGenerator,
 )
 
 __all__ = [
+    "CompiledMetadata",
     "BioCroissantParser",
     "OMOPTableMapper",
+    "DistributionCache",
+    "ChecksumError",
     "DataExtractor",
+    "RecordSetAssembler",
     "OMOPValidator",
+    "KeyIndex",
+    "TableKeys",
+    "PrimaryKeyChecker",
+    "ReferentialIntegrityChecker",
+    "ValueDomain",
+    "ValueDomainRegistry",
+    "ConceptMapper",
+    "HyperLogLog",
+    "ColumnProfile",
+    "TableProfiler",
+    "OMOPConstraintSpec",
     "OMOPExporter",
+    "OMOPDatabaseLoader",
     "BioCroissantToOMOPConverter",
+    "OMOPSpecRegistry",
+    "VocabularyIndex",
     "OMOPSyntheticDataGenerator",
     "BioCroissantMetadataGenerator",
 ]
@@ -4,26 +4,212 @@
 Converts Bio-Croissant metadata and data files to OMOP Common Data Model format.
 """
 
+import bz2
+import gzip
+import hashlib
+import io
 import json
+import os
+import tempfile
+import warnings
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, closing, contextmanager
 from pathlib import Path
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Callable, Optional, Iterator, Union, IO
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from itertools import chain, islice
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as pa_dataset
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet support is optional
+    pa = None
+
+try:
+    from .omop_cdm_spec import OMOPSpecRegistry, count_type_violations
+    from .omop_vocabulary import VocabularyIndex
+    from .omop_keys import KeyIndex, TableKeys, PrimaryKeyChecker, ReferentialIntegrityChecker
+    from .omop_profile import TableProfiler
+    from .omop_export import (OMOPExporter, TableWriter, ParquetTableWriter, CSVTableWriter, SQLTableWriter,
+                              BulkTableWriter, OMOPDatabaseLoader, DatabaseTableWriter)
+except ImportError:  # run as a script from src/
+    from omop_cdm_spec import OMOPSpecRegistry, count_type_violations
+    from omop_vocabulary import VocabularyIndex
+    from omop_keys import KeyIndex, TableKeys, PrimaryKeyChecker, ReferentialIntegrityChecker
+    from omop_profile import TableProfiler
+    from omop_export import (OMOPExporter, TableWriter, ParquetTableWriter, CSVTableWriter, SQLTableWriter,
+                             BulkTableWriter, OMOPDatabaseLoader, DatabaseTableWriter)
+
+
+class CompiledField:
+    """Compiled Bio-Croissant field with its source and references resolved."""
+
+    __slots__ = (
+        'id', 'name', 'omop_field', 'data_type', 'source_id', 'source_column',
+        'is_primary_key', 'foreign_key_table', 'references_id', 'references',
+        'source_vocabularies', 'recordset', 'raw'
+    )
+
+    def __init__(self, field: Dict, recordset: 'CompiledRecordSet'):
+        source = field.get('source', {})
+        self.name = field.get('name')
+        self.id = field.get('@id') or f"{recordset.id}/{self.name}"
+        self.omop_field = field.get('omop:cdmField', self.name)
+        self.data_type = field.get('dataType')
+        self.source_id = (source.get('fileObject') or source.get('fileSet') or {}).get('@id')
+        self.source_column = source.get('extract', {}).get('column', self.name)
+        self.is_primary_key = bool(field.get('omop:isPrimaryKey', False))
+        self.foreign_key_table = field.get('omop:foreignKeyTable')
+        self.references_id = field.get('references', {}).get('@id')
+        self.references: Optional['CompiledField'] = None
+        vocabularies = field.get('omop:sourceVocabulary') or []
+        self.source_vocabularies: List[str] = [vocabularies] if isinstance(vocabularies, str) else list(vocabularies)
+        self.recordset = recordset
+        self.raw = field
+
+
+class CompiledRecordSet:
+    """Compiled Bio-Croissant recordSet with fields and key resolved."""
+
+    __slots__ = ('id', 'name', 'omop_table', 'distribution_key', 'index', 'fields', 'key_fields', 'raw')
+
+    def __init__(self, recordset: Dict, index: int):
+        self.name = recordset.get('name')
+        self.id = recordset.get('@id') or self.name
+        self.omop_table = recordset.get('omop:cdmTable') or self.name
+        self.distribution_key = recordset.get('omop:distributionKey')
+        self.index = index
+        self.fields = [CompiledField(field, self) for field in recordset.get('field', [])]
+        self.key_fields: List[CompiledField] = []
+        self.raw = recordset
+
+
+class CompiledMetadata:
+    """Bio-Croissant metadata compiled into @id indexes and a foreign key graph.
+
+    Behaves like the raw metadata dictionary for reads, so code written
+    against plain metadata keeps working.
+    """
+
+    __slots__ = (
+        'raw', 'recordsets', 'distribution_index', 'recordset_index',
+        'field_index', 'foreign_keys', 'foreign_key_references'
+    )
+
+    def __init__(self, metadata: Dict):
+        self.raw = metadata
+        self.distribution_index = {
+            dist.get('@id'): dist for dist in metadata.get('distribution', []) if dist.get('@id')
+        }
+        self.recordsets = [
+            CompiledRecordSet(recordset, i) for i, recordset in enumerate(metadata.get('recordSet', []))
+        ]
+        self.recordset_index = {recordset.id: recordset for recordset in self.recordsets}
+        self.field_index = {
+            field.id: field for recordset in self.recordsets for field in recordset.fields
+        }
+
+        self.foreign_keys: List[CompiledField] = []
+        for recordset in self.recordsets:
+            key_refs = recordset.raw.get('key', [])
+            if isinstance(key_refs, dict):
+                key_refs = [key_refs]
+            recordset.key_fields = [
+                self.field_index[ref.get('@id')] for ref in key_refs if ref.get('@id') in self.field_index
+            ]
+            if not recordset.key_fields:
+                recordset.key_fields = [field for field in recordset.fields if field.is_primary_key]
+
+            for field in recordset.fields:
+                if field.references_id:
+                    field.references = self.field_index.get(field.references_id)
+                if field.foreign_key_table or field.references_id:
+                    self.foreign_keys.append(field)
+
+        self.foreign_key_references = self._resolve_foreign_keys()
+
+    def _resolve_foreign_keys(self) -> List[Dict]:
+        """Resolve the foreign keys between recordSets to OMOP columns.
+
+        A field's references name the referenced field; a bare
+        omop:foreignKeyTable refers to that table's single-field key. Keys
+        into tables outside the dataset (such as vocabularies) are skipped.
+
+        Returns:
+            Dicts with table, field, ref_table and ref_field
+        """
+        tables = {recordset.omop_table: recordset for recordset in self.recordsets}
+        references = []
+        for field in self.foreign_keys:
+            if field.references:
+                ref_table = field.references.recordset.omop_table
+                ref_field = field.references.omop_field
+            else:
+                ref_recordset = tables.get(field.foreign_key_table)
+                if ref_recordset is None or len(ref_recordset.key_fields) != 1:
+                    continue
+                ref_table = ref_recordset.omop_table
+                ref_field = ref_recordset.key_fields[0].omop_field
+            if ref_table not in tables:
+                continue
+            references.append({
+                'table': field.recordset.omop_table,
+                'field': field.omop_field,
+                'ref_table': ref_table,
+                'ref_field': ref_field
+            })
+        return references
+
+    def __getitem__(self, key: str) -> Any:
+        return self.raw[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.raw
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a top-level metadata property.
+
+        Args:
+            key: Property name
+            default: Value returned when the property is absent
+
+        Returns:
+            Property value or default
+        """
+        return self.raw.get(key, default)
+
+    def distribution(self, dist_id: str) -> Optional[Dict]:
+        """Get a distribution by @id.
+
+        Args:
+            dist_id: Distribution @id
+
+        Returns:
+            Distribution dictionary or None
+        """
+        return self.distribution_index.get(dist_id)
 
 
 class BioCroissantParser:
     """Parse Bio-Croissant metadata."""
 
-    def parse(self, metadata: Dict) -> Dict:
+    def parse(self, metadata: Dict) -> CompiledMetadata:
         """Parse Bio-Croissant metadata.
 
         Args:
             metadata: Bio-Croissant metadata dictionary
 
         Returns:
-            Parsed metadata dictionary
+            Compiled metadata with @id indexes for distributions, recordSets and
+            fields and a resolved foreign key graph
         """
-        return metadata
+        if isinstance(metadata, CompiledMetadata):
+            return metadata
+        return CompiledMetadata(metadata)
 
     def extract_recordsets(self, metadata: Dict) -> List[Dict]:
         """Extract recordSets from metadata.
@@ -68,6 +254,9 @@ class BioCroissantParser:
         Returns:
             Distribution dictionary or None
         """
+        if isinstance(metadata, CompiledMetadata):
+            return metadata.distribution(dist_id)
+
         distributions = self.extract_distributions(metadata)
         for dist in distributions:
             if dist.get('@id') == dist_id:
@@ -78,7 +267,8 @@ class BioCroissantParser:
 class OMOPTableMapper:
     """Map Bio-Croissant recordSets to OMOP CDM tables."""
 
-    # OMOP CDM required fields by table
+    # OMOP CDM required fields by table, used when the CDM specification
+    # registry is unavailable
     REQUIRED_FIELDS = {
         'PERSON': ['person_id', 'gender_concept_id', 'year_of_birth', 'race_concept_id', 'ethnicity_concept_id'],
         'CONDITION_OCCURRENCE': ['condition_occurrence_id', 'person_id', 'condition_concept_id', 'condition_start_date', 'condition_type_concept_id'],
@@ -135,13 +325,24 @@ class OMOPTableMapper:
         """Identify foreign key fields.
 
         Args:
-            fields: List of field dictionaries
+            fields: List of field dictionaries, or compiled fields whose
+                references are already resolved
 
         Returns:
             List of foreign key dictionaries
         """
         foreign_keys = []
         for field in fields:
+            if isinstance(field, CompiledField):
+                if field.foreign_key_table:
+                    foreign_keys.append({
+                        'field': field.name,
+                        'references_table': field.foreign_key_table,
+                        'references_field': (field.references.name if field.references
+                                             else (field.references_id or '').split('/')[-1])
+                    })
+                continue
+
             fk_table = field.get('omop:foreignKeyTable')
             if fk_table:
                 foreign_keys.append({
@@ -158,417 +359,2986 @@ class OMOPTableMapper:
             table_name: OMOP table name
 
         Returns:
-            List of required field names
+            List of required field names from the CDM specification registry
         """
+        table_spec = OMOPSpecRegistry.load().table(table_name)
+        if table_spec is not None:
+            return list(table_spec.required_fields)
         return self.REQUIRED_FIELDS.get(table_name, [])
 
+    def get_primary_key(self, table_name: str) -> Optional[str]:
+        """Get the primary key field of an OMOP table.
 
-class DataExtractor:
-    """Extract data from CSV files."""
+        Args:
+            table_name: OMOP table name
 
-    def read_csv(self, file_path: Path) -> pd.DataFrame:
-        """Read CSV file into DataFrame.
+        Returns:
+            Primary key field name from the CDM specification registry, or
+            None for tables without a single-field key
+        """
+        table_spec = OMOPSpecRegistry.load().table(table_name)
+        if table_spec is not None:
+            return table_spec.primary_key[0] if len(table_spec.primary_key) == 1 else None
+        return f"{table_name.lower()}_id" if table_name in self.REQUIRED_FIELDS else None
+
+
+class DistributionCache:
+    """LRU cache of parsed distribution columns with a memory budget.
+
+    Entries are keyed by distribution @id and sha256 and hold the source
+    columns parsed so far, so recordSets projecting different columns of the
+    same file only parse the columns not already cached.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.entries: OrderedDict = OrderedDict()
+        self.sizes: Dict[Tuple, int] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getstate__(self) -> Dict:
+        # Cached frames stay in their process; workers start with an empty cache
+        state = self.__dict__.copy()
+        state.update(entries=OrderedDict(), sizes={}, bytes=0)
+        return state
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        """Get a cache entry and mark it as most recently used.
 
         Args:
-            file_path: Path to CSV file
+            key: (distribution @id, sha256) tuple
 
         Returns:
-            DataFrame with CSV data
+            Cache entry dictionary or None
         """
-        return pd.read_csv(file_path)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
 
-    def extract_from_distribution(self, distribution: Dict, base_path: Optional[Path] = None) -> pd.DataFrame:
-        """Extract data from a file distribution.
+    def put(self, key: Tuple, entry: Dict) -> None:
+        """Store a cache entry, evicting least recently used entries over budget.
+
+        Entries larger than the whole budget are not cached.
 
         Args:
-            distribution: Distribution dictionary
-            base_path: Base path for relative URLs
+            key: (distribution @id, sha256) tuple
+            entry: Cache entry with header and frame
+        """
+        self.discard(key)
+        size = int(entry['frame'].memory_usage(deep=True).sum())
+        if size > self.budget_bytes:
+            return
+        while self.entries and self.bytes + size > self.budget_bytes:
+            oldest = next(iter(self.entries))
+            self.discard(oldest)
+            self.evictions += 1
+        self.entries[key] = entry
+        self.sizes[key] = size
+        self.bytes += size
+
+    def discard(self, key: Tuple) -> None:
+        """Remove an entry if present.
+
+        Args:
+            key: (distribution @id, sha256) tuple
+        """
+        if key in self.entries:
+            del self.entries[key]
+            self.bytes -= self.sizes.pop(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters.
 
         Returns:
-            DataFrame with extracted data
+            Dictionary with hits, misses, evictions, bytes and budget_bytes
         """
-        content_url = distribution.get('contentUrl')
-        if not content_url:
-            raise ValueError(f"Distribution missing contentUrl: {distribution.get('@id')}")
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'bytes': self.bytes,
+            'budget_bytes': self.budget_bytes
+        }
 
-        file_path = Path(content_url)
-        if base_path and not file_path.is_absolute():
-            file_path = base_path / file_path
 
-        encoding_format = distribution.get('encodingFormat', 'text/csv')
-        if 'csv' in encoding_format.lower():
-            return self.read_csv(file_path)
-        else:
-            raise ValueError(f"Unsupported encoding format: {encoding_format}")
+class ChecksumError(ValueError):
+    """A file does not match the sha256 its distribution declares."""
 
 
-class OMOPValidator:
-    """Validate data against OMOP CDM constraints."""
+class HashingReader(io.RawIOBase):
+    """Raw binary reader computing the sha256 of the bytes read through it.
 
-    def __init__(self):
-        self.mapper = OMOPTableMapper()
+    Wrapped in an io.BufferedReader with a large buffer, parsers read through
+    it while the hash is updated in large blocks (hashlib releases the GIL
+    for those), so a file is verified without a second read.
+    """
 
-    def validate_table(self, table_name: str, df: pd.DataFrame) -> Tuple[bool, List[str]]:
-        """Validate table data against OMOP CDM constraints.
+    def __init__(self, raw: IO[bytes]):
+        """Initialize the reader.
 
         Args:
-            table_name: OMOP table name
-            df: DataFrame with table data
-
-        Returns:
-            Tuple of (is_valid, list of error messages)
+            raw: Unbuffered binary file to read from
         """
-        errors = []
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.bytes_read = 0
 
-        # Validate required fields
-        required_fields = self.mapper.get_required_fields(table_name)
-        if required_fields:
-            valid, field_errors = self.validate_required_fields(df, required_fields)
-            if not valid:
-                errors.extend(field_errors)
-
-        # Validate primary key if this is a known table
-        if table_name in self.mapper.REQUIRED_FIELDS:
-            pk_field = f"{table_name.lower()}_id"
-            if pk_field in df.columns:
-                valid, pk_errors = self.validate_primary_key(df, pk_field)
-                if not valid:
-                    errors.extend(pk_errors)
+    def readable(self) -> bool:
+        return True
 
-        return len(errors) == 0, errors
+    def readinto(self, buffer: Any) -> int:
+        count = self.raw.readinto(buffer)
+        if count:
+            self.sha256.update(memoryview(buffer)[:count])
+            self.bytes_read += count
+        return count
 
-    def validate_primary_key(self, df: pd.DataFrame, pk_field: str) -> Tuple[bool, List[str]]:
-        """Validate primary key uniqueness.
+    def drain(self, block_size: int) -> str:
+        """Hash the bytes not read yet.
 
         Args:
-            df: DataFrame with table data
-            pk_field: Primary key field name
+            block_size: Bytes per read
 
         Returns:
-            Tuple of (is_valid, list of error messages)
+            Hex sha256 of the whole file
         """
-        errors = []
+        buffer = bytearray(block_size)
+        while self.readinto(buffer):
+            pass
+        return self.sha256.hexdigest()
 
-        if pk_field not in df.columns:
-            errors.append(f"Primary key field '{pk_field}' not found")
-            return False, errors
 
-        # Check for nulls
-        if df[pk_field].isnull().any():
-            errors.append(f"Primary key '{pk_field}' contains null values")
+class DataExtractor:
+    """Extract data from CSV and Parquet files."""
+
+    # pandas dtypes for the SQL types in OMOPExporter.OMOP_DATA_TYPES
+    PANDAS_DTYPES = {
+        'INTEGER': 'Int64',
+        'FLOAT': 'float64',
+        'VARCHAR(255)': str,
+        'BOOLEAN': 'boolean'
+    }
 
-        # Check for duplicates
-        if df[pk_field].duplicated().any():
-            duplicate_count = df[pk_field].duplicated().sum()
-            errors.append(f"Primary key '{pk_field}' contains {duplicate_count} duplicate values")
+    # SQL types parsed as dates instead of with a dtype
+    DATE_TYPES = {'DATE', 'TIMESTAMP'}
 
-        return len(errors) == 0, errors
+    # Text accepted for BOOLEAN columns (the pandas parser's own set)
+    BOOLEAN_STRINGS = {
+        'True': True, 'TRUE': True, 'true': True, '1': True, '1.0': True,
+        'False': False, 'FALSE': False, 'false': False, '0': False, '0.0': False
+    }
 
-    def validate_required_fields(self, df: pd.DataFrame, required_fields: List[str]) -> Tuple[bool, List[str]]:
-        """Validate that required fields are present.
+    # Comparison operators accepted in row filters
+    FILTER_OPERATORS = {
+        '=': lambda column, value: column == value,
+        '==': lambda column, value: column == value,
+        '!=': lambda column, value: column != value,
+        '<': lambda column, value: column < value,
+        '<=': lambda column, value: column <= value,
+        '>': lambda column, value: column > value,
+        '>=': lambda column, value: column >= value,
+        'in': lambda column, value: column.isin(value),
+        'not in': lambda column, value: ~column.isin(value)
+    }
+
+    # Read buffer for files hashed while reading
+    HASH_BUFFER_BYTES = 8 * 1024 * 1024
+
+    # Checksum verification modes: report mismatches as warnings or fail the read
+    VERIFY_MODES = ('warn', 'error')
+
+    # Compression codecs (pandas names) by encodingFormat marker, file suffix and magic bytes
+    COMPRESSION_FORMATS = {'gzip': 'gzip', 'zstd': 'zstd', 'bzip2': 'bz2', 'bz2': 'bz2'}
+    COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.gzip': 'gzip', '.zst': 'zstd', '.zstd': 'zstd', '.bz2': 'bz2'}
+    COMPRESSION_MAGIC = {b'\x1f\x8b': 'gzip', b'\x28\xb5\x2f\xfd': 'zstd', b'BZh': 'bz2'}
+
+    # CSV parser engines
+    CSV_ENGINES = ('pandas', 'arrow')
+
+    # Arrow column types for the pandas dtypes in PANDAS_DTYPES (arrow engine)
+    ARROW_CSV_TYPES = {
+        'Int64': pa.int64(),
+        'float64': pa.float64(),
+        str: pa.string(),
+        'boolean': pa.bool_()
+    } if pa is not None else {}
+
+    # pandas' default NA strings, so both engines read the same nulls
+    CSV_NULL_VALUES = [
+        '', ' ', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+        '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+    ]
+
+    def __init__(self, cache_bytes: int = 0, read_workers: Optional[int] = None,
+                 csv_engine: str = 'pandas', verify_checksums: Optional[str] = None):
+        """Initialize extractor.
 
         Args:
-            df: DataFrame with table data
-            required_fields: List of required field names
+            cache_bytes: Memory budget for caching parsed distributions shared
+                by several recordSets (0 disables the cache)
+            read_workers: Threads reading FileSet shards concurrently
+                (default: ThreadPoolExecutor default)
+            csv_engine: CSV parser, 'pandas' (single-threaded C parser) or
+                'arrow' (multi-threaded, block-parallel pyarrow parser)
+            verify_checksums: Verify FileObject sha256 values while reading,
+                'warn' to warn on a mismatch or 'error' to fail the read
+                (default: no verification)
+        """
+        if csv_engine not in self.CSV_ENGINES:
+            raise ValueError(f"Unsupported CSV engine: {csv_engine}")
+        if verify_checksums is not None and verify_checksums not in self.VERIFY_MODES:
+            raise ValueError(f"Unsupported checksum verification mode: {verify_checksums}")
+        if csv_engine == 'arrow' and pa is None:
+            raise ImportError("The arrow CSV engine requires pyarrow (pip install pyarrow)")
+        self.cache = DistributionCache(cache_bytes) if cache_bytes > 0 else None
+        self.read_workers = read_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.csv_engine = csv_engine
+        self.verify_checksums = verify_checksums
+        # Verification results by file path
+        self.checksums: Dict[str, Dict] = {}
+
+    def build_read_plan(self, fields: List[Dict], project: bool = True,
+                        filters: Optional[List] = None) -> Dict:
+        """Build a read plan from recordSet fields.
+
+        The plan selects the source columns referenced by the fields
+        (source.extract.column, defaulting to the field name), assigns each a
+        dtype derived from its dataType (text for source code columns mapped
+        through omop:sourceVocabulary), and names the output columns after
+        the OMOP field.
+
+        Args:
+            fields: List of field dictionaries
+            project: Read only the referenced columns; otherwise unreferenced
+                columns are passed through with inferred dtypes
+            filters: Optional row filters on source columns, as (column, op, value)
+                tuples ANDed together, or a list of such lists ORed together
+                (the pyarrow/pandas DNF form)
 
         Returns:
-            Tuple of (is_valid, list of error messages)
+            Read plan dictionary with source_columns, dtype, date_columns,
+            output_columns, project, filters and parse_failures (a list
+            collecting {output_column: count} of values that did not parse,
+            one entry per chunk with failures)
         """
-        errors = []
-        missing_fields = [field for field in required_fields if field not in df.columns]
+        source_columns = []
+        dtype = {}
+        date_columns = {}
+        output_columns = []
 
-        if missing_fields:
-            errors.append(f"Missing required fields: {', '.join(missing_fields)}")
+        for field in fields:
+            source_column = field.get('source', {}).get('extract', {}).get('column', field.get('name'))
+            output_column = field.get('omop:cdmField', field.get('name'))
+            if source_column is None or output_column is None:
+                continue
+
+            if source_column not in source_columns:
+                source_columns.append(source_column)
+            output_columns.append((output_column, source_column))
+
+            sql_type = OMOPExporter.OMOP_DATA_TYPES.get(field.get('dataType'))
+            if field.get('omop:sourceVocabulary'):
+                # Source codes are mapped to concept_ids after reading
+                dtype[source_column] = str
+            elif sql_type in self.DATE_TYPES:
+                date_columns[source_column] = sql_type
+            elif sql_type in self.PANDAS_DTYPES:
+                dtype[source_column] = self.PANDAS_DTYPES[sql_type]
 
-        return len(errors) == 0, errors
+        return {
+            'source_columns': source_columns,
+            'dtype': dtype,
+            'date_columns': date_columns,
+            'output_columns': output_columns,
+            'project': project,
+            'filters': filters,
+            'parse_failures': []
+        }
 
-    def validate_foreign_keys(self, df: pd.DataFrame, fk_field: str, ref_table_df: pd.DataFrame, ref_field: str) -> Tuple[bool, List[str]]:
-        """Validate foreign key references.
+    def read_csv(self, file_path: Path, read_plan: Optional[Dict] = None,
+                 compression: Optional[str] = 'infer', sha256: Optional[str] = None) -> pd.DataFrame:
+        """Read CSV file into DataFrame.
 
         Args:
-            df: DataFrame with table data
-            fk_field: Foreign key field name
-            ref_table_df: Referenced table DataFrame
-            ref_field: Referenced field name
+            file_path: Path to CSV file
+            read_plan: Optional read plan from build_read_plan
+            compression: Compression codec (default: infer from the file suffix)
+            sha256: Expected sha256 of the file, verified while reading
 
         Returns:
-            Tuple of (is_valid, list of error messages)
+            DataFrame with CSV data
         """
-        errors = []
+        if self.csv_engine == 'arrow':
+            table, read_plan = self._parse_typed(
+                lambda plan: self.read_csv_table(file_path, plan, compression, sha256), read_plan
+            )
+            return self._arrow_to_frame(self._filter_table(table, read_plan), read_plan)
+
+        def parse(plan: Optional[Dict]) -> pd.DataFrame:
+            options = self._read_csv_options(plan) if plan is not None else {}
+            with self._verified_source(file_path, sha256) as source:
+                return pd.read_csv(source, compression=self._stream_compression(file_path, compression, source),
+                                   **options)
+
+        df, read_plan = self._parse_typed(parse, read_plan)
+        if read_plan is None:
+            return df
+        return self._apply_read_plan(df, read_plan, filter_rows=True)
+
+    def iter_csv(self, file_path: Path, chunk_size: int,
+                 read_plan: Optional[Dict] = None,
+                 compression: Optional[str] = 'infer',
+                 sha256: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """Read CSV file in bounded-size chunks.
+
+        Compressed files are decompressed as a stream while reading.
 
-        if fk_field not in df.columns:
-            errors.append(f"Foreign key field '{fk_field}' not found")
-            return False, errors
+        Args:
+            file_path: Path to CSV file
+            chunk_size: Maximum number of rows per chunk
+            read_plan: Optional read plan from build_read_plan
+            compression: Compression codec (default: infer from the file suffix)
+            sha256: Expected sha256 of the file, verified once the last chunk is read
 
-        if ref_field not in ref_table_df.columns:
-            errors.append(f"Referenced field '{ref_field}' not found in referenced table")
-            return False, errors
+        Yields:
+            DataFrame chunks with CSV data
+        """
+        if self.csv_engine == 'arrow':
+            tables = self._iter_typed(
+                lambda plan, skip_rows: self._iter_csv_tables(file_path, chunk_size, plan, compression, sha256,
+                                                              skip_rows),
+                read_plan
+            )
+            for table, plan in tables:
+                yield self._arrow_to_frame(self._filter_table(table, plan), plan)
+            return
+
+        def parse(plan: Optional[Dict], skip_rows: int) -> Iterator[pd.DataFrame]:
+            options = self._read_csv_options(plan) if plan is not None else {}
+            if skip_rows:
+                options['skiprows'] = range(1, skip_rows + 1)
+            with self._verified_source(file_path, sha256) as source:
+                with pd.read_csv(source, chunksize=chunk_size,
+                                 compression=self._stream_compression(file_path, compression, source),
+                                 **options) as reader:
+                    yield from reader
+
+        for chunk, plan in self._iter_typed(parse, read_plan):
+            if plan is not None:
+                chunk = self._apply_read_plan(chunk, plan, filter_rows=True)
+            yield chunk
+
+    def read_csv_table(self, file_path: Path, read_plan: Optional[Dict] = None,
+                       compression: Optional[str] = 'infer', sha256: Optional[str] = None) -> Any:
+        """Read a CSV file into an Arrow table with the arrow engine.
+
+        The file is memory-mapped (or decompressed as a stream) and parsed
+        block-parallel on all cores. Columns typed by the read plan get the
+        Arrow type of their dtype; date columns are kept as strings for
+        _apply_read_plan to parse, as with the pandas engine. Unlike pandas,
+        integer columns must hold integer literals ('1', not '1.0'); read_csv
+        re-reads files holding anything else with those columns as text.
 
-        # Check for orphaned records
-        fk_values = df[fk_field].dropna().unique()
-        ref_values = ref_table_df[ref_field].unique()
-        orphaned = set(fk_values) - set(ref_values)
+        Args:
+            file_path: Path to CSV file
+            read_plan: Optional read plan from build_read_plan
+            compression: Compression codec (default: infer from the file suffix)
+            sha256: Expected sha256 of the file, verified while reading (the
+                file is then streamed rather than memory-mapped)
 
-        if orphaned:
-            errors.append(f"Foreign key '{fk_field}' has {len(orphaned)} orphaned references")
+        Returns:
+            pyarrow.Table with the plan's source columns (all columns without a plan)
+        """
+        read_options, convert_options = self._arrow_csv_options(file_path, read_plan, compression)
+        with self._verified_source(file_path, sha256) as source:
+            with self._open_csv_stream(file_path, compression, source) as stream:
+                return pa_csv.read_csv(stream, read_options=read_options, convert_options=convert_options)
 
-        return len(errors) == 0, errors
+    def read_parquet(self, file_path: Union[Path, List[Path]], read_plan: Optional[Dict] = None,
+                     sha256: Optional[str] = None) -> pd.DataFrame:
+        """Read Parquet file into DataFrame.
 
+        Only the projected columns are read, and row filters are pushed
+        into the scan so non-matching row groups are skipped.
 
-class OMOPExporter:
-    """Export data to OMOP CDM format."""
+        Args:
+            file_path: Path to Parquet file, or the shard paths of a FileSet
+            read_plan: Optional read plan from build_read_plan
+            sha256: Expected sha256 of a single file, verified alongside the scan
 
-    OMOP_DATA_TYPES = {
-        'sc:Integer': 'INTEGER',
-        'sc:Float': 'FLOAT',
-        'sc:Text': 'VARCHAR(255)',
-        'sc:Date': 'DATE',
-        'sc:DateTime': 'TIMESTAMP',
-        'sc:Boolean': 'BOOLEAN'
-    }
+        Returns:
+            DataFrame with Parquet data
+        """
+        with self._verified_concurrently(file_path, sha256):
+            table = self._parquet_scanner(file_path, read_plan).to_table()
+        return self._arrow_to_frame(table, read_plan)
 
-    def export_csv(self, table_name: str, df: pd.DataFrame, output_path: Path) -> None:
-        """Export table to CSV file.
+    def iter_parquet(self, file_path: Union[Path, List[Path]], chunk_size: int,
+                     read_plan: Optional[Dict] = None,
+                     sha256: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """Stream Parquet file row groups in bounded-size chunks.
 
         Args:
-            table_name: OMOP table name
-            df: DataFrame with table data
-            output_path: Output file path
-        """
-        df.to_csv(output_path, index=False)
+            file_path: Path to Parquet file, or the shard paths of a FileSet
+            chunk_size: Maximum number of rows per chunk
+            read_plan: Optional read plan from build_read_plan
+            sha256: Expected sha256 of a single file, verified alongside the scan
 
-    def generate_ddl(self, table_schema: Dict, dialect: str = 'postgresql') -> str:
-        """Generate SQL DDL for table creation.
+        Yields:
+            DataFrame chunks with Parquet data
+        """
+        with self._verified_concurrently(file_path, sha256):
+            scanner = self._parquet_scanner(file_path, read_plan, batch_size=chunk_size)
+            empty = True
+            for batch in scanner.to_batches():
+                if batch.num_rows == 0:
+                    continue
+                empty = False
+                yield self._arrow_to_frame(pa.Table.from_batches([batch]), read_plan)
+            if empty:
+                yield self._arrow_to_frame(scanner.projected_schema.empty_table(), read_plan)
+
+    def extract_from_distribution(self, distribution: Dict, base_path: Optional[Path] = None,
+                                  read_plan: Optional[Dict] = None) -> pd.DataFrame:
+        """Extract data from a file distribution.
 
         Args:
-            table_schema: Table schema dictionary
-            dialect: SQL dialect (postgresql, mysql, sqlite)
+            distribution: Distribution dictionary
+            base_path: Base path for relative URLs
+            read_plan: Optional read plan from build_read_plan
 
         Returns:
-            SQL DDL statement
+            DataFrame with extracted data
         """
-        table_name = table_schema['table_name']
-        fields = table_schema['fields']
-
-        ddl = f"CREATE TABLE {table_name} (\n"
+        if self.is_file_set(distribution):
+            self._check_file_set_verifiable(distribution)
+            file_paths = self.resolve_files(distribution, base_path)
+            if self._file_format(distribution) == 'parquet':
+                return self.read_parquet(file_paths, read_plan)
+            shards = self._iter_concurrent(
+                lambda path: self.read_csv(path, read_plan, self.detect_compression(distribution, path)),
+                file_paths
+            )
+            return pd.concat(list(shards), ignore_index=True)
+
+        file_path = self._resolve_path(distribution, base_path)
+        sha256 = distribution.get('sha256')
+
+        file_format = self._file_format(distribution)
+        if file_format == 'csv':
+            compression = self.detect_compression(distribution, file_path)
+            if read_plan is not None and self.cache is not None:
+                return self._read_csv_cached(distribution, file_path, read_plan, compression)
+            return self.read_csv(file_path, read_plan, compression, sha256)
+        return self.read_parquet(file_path, read_plan, sha256)
+
+    def detect_compression(self, distribution: Dict, file_path: Path) -> Optional[str]:
+        """Detect the compression codec of a CSV distribution.
+
+        The codec is taken from the encodingFormat (e.g. 'text/csv+gzip' or
+        'application/zstd'), then the contentUrl suffix, then the file's
+        magic bytes.
 
-        field_definitions = []
-        primary_keys = []
+        Args:
+            distribution: Distribution dictionary
+            file_path: Path to the distribution file
 
-        for field in fields:
-            field_name = field['name']
-            field_type = field['type']
-            is_nullable = field.get('nullable', True)
-            is_pk = field.get('primary_key', False)
+        Returns:
+            pandas compression name ('gzip', 'zstd', 'bz2') or None if uncompressed
+        """
+        encoding_format = distribution.get('encodingFormat', '').lower()
+        for marker, codec in self.COMPRESSION_FORMATS.items():
+            if marker in encoding_format:
+                return codec
+
+        codec = self.COMPRESSION_SUFFIXES.get(Path(file_path).suffix.lower())
+        if codec:
+            return codec
+
+        try:
+            with open(file_path, 'rb') as f:
+                head = f.read(4)
+        except OSError:
+            return None
+        for magic, codec in self.COMPRESSION_MAGIC.items():
+            if head.startswith(magic):
+                return codec
+        return None
 
-            field_def = f"  {field_name} {field_type}"
-            if not is_nullable:
-                field_def += " NOT NULL"
+    def cache_stats(self) -> Dict[str, int]:
+        """Get read cache counters.
 
-            field_definitions.append(field_def)
+        Returns:
+            Dictionary with hits, misses, evictions, bytes and budget_bytes
+        """
+        if self.cache is None:
+            return {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0, 'budget_bytes': 0}
+        return self.cache.stats()
 
-            if is_pk:
-                primary_keys.append(field_name)
+    def _read_csv_cached(self, distribution: Dict, file_path: Path, read_plan: Dict,
+                         compression: Optional[str] = None) -> pd.DataFrame:
+        """Read CSV columns through the distribution cache.
 
-        ddl += ",\n".join(field_definitions)
+        Only source columns not already cached for the distribution are parsed.
 
-        if primary_keys:
-            ddl += f",\n  PRIMARY KEY ({', '.join(primary_keys)})"
+        Args:
+            distribution: Distribution dictionary
+            file_path: Path to CSV file
+            read_plan: Read plan from build_read_plan
+            compression: Compression codec of the file
 
-        ddl += "\n);"
+        Returns:
+            DataFrame with extracted data
+        """
+        key = (distribution.get('@id'), distribution.get('sha256'))
+        entry = self.cache.get(key)
+        if entry is None:
+            header = list(pd.read_csv(file_path, nrows=0, compression=compression).columns)
+            entry = {'header': header, 'frame': None}
+
+        if read_plan['project']:
+            needed = read_plan['source_columns'] + self._filter_columns(read_plan)
+            wanted = [column for column in entry['header'] if column in needed]
+        else:
+            wanted = entry['header']
+
+        frame = entry['frame']
+        missing = [column for column in wanted if frame is None or column not in frame.columns]
+        if missing:
+            self.cache.misses += 1
+            dtype = {column: read_plan['dtype'][column] for column in missing if column in read_plan['dtype']}
+            sha256 = distribution.get('sha256')
+
+            def parse(column_plan: Dict) -> pd.DataFrame:
+                if self.csv_engine == 'arrow':
+                    return self.read_csv_table(file_path, column_plan, compression, sha256).to_pandas()
+                with self._verified_source(file_path, sha256) as source:
+                    return pd.read_csv(source, usecols=missing, dtype=self._parse_dtypes(column_plan),
+                                       compression=self._stream_compression(file_path, compression, source))
+
+            # Columns that do not parse are cached as text and coerced on every read
+            parsed, _ = self._parse_typed(parse, {'source_columns': missing, 'dtype': dtype, 'date_columns': {},
+                                                  'project': True, 'filters': None})
+            frame = parsed if frame is None else pd.concat([frame, parsed], axis=1)
+            entry['frame'] = frame
+            self.cache.put(key, entry)
+        else:
+            self.cache.hits += 1
 
-        return ddl
+        df = frame[wanted]
+        for column, dtype in read_plan['dtype'].items():
+            if dtype is str and column in df.columns and df[column].dtype != pd.api.types.pandas_dtype(dtype):
+                df = df.assign(**{column: df[column].astype(dtype)})
+        return self._apply_read_plan(df, read_plan, filter_rows=True)
 
-    def generate_insert_statements(self, table_name: str, df: pd.DataFrame, batch_size: int = 100) -> List[str]:
-        """Generate SQL INSERT statements.
+    def iter_distribution(self, distribution: Dict, base_path: Optional[Path] = None,
+                          chunk_size: Optional[int] = None,
+                          read_plan: Optional[Dict] = None) -> Iterator[pd.DataFrame]:
+        """Extract data from a file distribution chunk by chunk.
 
         Args:
-            table_name: OMOP table name
-            df: DataFrame with table data
-            batch_size: Number of rows per INSERT statement
+            distribution: Distribution dictionary
+            base_path: Base path for relative URLs
+            chunk_size: Maximum number of rows per chunk (None reads the whole file as one chunk)
+            read_plan: Optional read plan from build_read_plan
 
-        Returns:
-            List of SQL INSERT statements
+        Yields:
+            DataFrame chunks with extracted data
         """
-        statements = []
-        columns = ', '.join(df.columns)
-
-        for i in range(0, len(df), batch_size):
-            batch = df.iloc[i:i+batch_size]
-            values = []
+        if not chunk_size:
+            yield self.extract_from_distribution(distribution, base_path, read_plan)
+            return
 
-            for _, row in batch.iterrows():
-                row_values = []
-                for val in row:
-                    if pd.isna(val):
-                        row_values.append('NULL')
-                    elif isinstance(val, str):
-                        row_values.append(f"'{val.replace('\'', '\'\'')}'")
-                    else:
-                        row_values.append(str(val))
-                values.append(f"({', '.join(row_values)})")
+        if self.is_file_set(distribution):
+            yield from self._iter_file_set(distribution, base_path, chunk_size, read_plan)
+            return
 
-            insert = f"INSERT INTO {table_name} ({columns}) VALUES\n  "
-            insert += ",\n  ".join(values)
-            insert += ";"
-            statements.append(insert)
+        file_path = self._resolve_path(distribution, base_path)
+        sha256 = distribution.get('sha256')
 
-        return statements
+        if self._file_format(distribution) == 'csv':
+            compression = self.detect_compression(distribution, file_path)
+            yield from self.iter_csv(file_path, chunk_size, read_plan, compression, sha256)
+        else:
+            yield from self.iter_parquet(file_path, chunk_size, read_plan, sha256)
 
-    def map_datatype(self, bio_datatype: str) -> str:
-        """Map Bio-Croissant datatype to SQL datatype.
+    def is_file_set(self, distribution: Dict) -> bool:
+        """Check whether a distribution is a FileSet of shards.
 
         Args:
-            bio_datatype: Bio-Croissant datatype
+            distribution: Distribution dictionary
 
         Returns:
-            SQL datatype
+            True for cr:FileSet distributions
         """
-        return self.OMOP_DATA_TYPES.get(bio_datatype, 'VARCHAR(255)')
+        return distribution.get('@type') == 'cr:FileSet' or 'includes' in distribution
 
+    def resolve_files(self, distribution: Dict, base_path: Optional[Path] = None) -> List[Path]:
+        """Expand the includes globs of a FileSet.
 
-class BioCroissantToOMOPConverter:
-    """Main converter class for Bio-Croissant to OMOP CDM."""
+        Patterns whose first segment is itself a glob (e.g.
+        'person_id_bucket=*/part-*.parquet') are expanded in each matching
+        directory concurrently.
 
-    def __init__(self):
-        self.parser = BioCroissantParser()
-        self.mapper = OMOPTableMapper()
-        self.extractor = DataExtractor()
-        self.validator = OMOPValidator()
-        self.exporter = OMOPExporter()
+        Args:
+            distribution: FileSet distribution dictionary
+            base_path: Directory the patterns are relative to (default: cwd)
 
-    def convert(
-        self,
-        metadata_path: Path,
-        output_dir: Path,
-        output_format: str = 'csv',
-        validate: bool = True,
-        sql_dialect: str = 'postgresql',
-        base_path: Optional[Path] = None
-    ) -> Dict:
-        """Convert Bio-Croissant dataset to OMOP CDM format.
+        Returns:
+            Sorted paths of the matching files, minus any excludes matches
+        """
+        root = Path(base_path) if base_path else Path.cwd()
+        includes = distribution.get('includes', [])
+        excludes = distribution.get('excludes', [])
+        if isinstance(includes, str):
+            includes = [includes]
+        if isinstance(excludes, str):
+            excludes = [excludes]
+        if not includes:
+            raise ValueError(f"FileSet missing includes: {distribution.get('@id')}")
+
+        matches = set()
+        with ThreadPoolExecutor(max_workers=self.read_workers) as pool:
+            for pattern in includes:
+                head, _, rest = pattern.partition('/')
+                if not rest or head == '**':
+                    matches.update(root.glob(pattern))
+                    continue
+                directories = [path for path in root.glob(head) if path.is_dir()]
+                for found in pool.map(lambda directory: list(directory.glob(rest)), directories):
+                    matches.update(found)
+
+        files = sorted(
+            path for path in matches
+            if path.is_file() and not any(path.relative_to(root).match(pattern) for pattern in excludes)
+        )
+        if not files:
+            raise ValueError(f"FileSet {distribution.get('@id')} matched no files under {root}")
+        return files
+
+    def _iter_file_set(self, distribution: Dict, base_path: Optional[Path], chunk_size: int,
+                       read_plan: Optional[Dict] = None) -> Iterator[pd.DataFrame]:
+        """Stream the shards of a FileSet as one table.
+
+        Parquet shards are scanned as one Arrow dataset. CSV shards are
+        streamed in path order in chunks of at most chunk_size rows, while a
+        background thread opens the next shard and parses its first chunk, so
+        at most one shard is read ahead.
 
         Args:
-            metadata_path: Path to Bio-Croissant metadata JSON file
-            output_dir: Directory for output files
-            output_format: Output format ('csv', 'sql', or 'both')
-            validate: Whether to validate data against OMOP constraints
-            sql_dialect: SQL dialect for DDL generation
-            base_path: Base path for resolving relative file URLs (default: cwd)
+            distribution: FileSet distribution dictionary
+            base_path: Directory the includes patterns are relative to
+            chunk_size: Maximum number of rows per chunk
+            read_plan: Optional read plan from build_read_plan
 
-        Returns:
-            Result dictionary with conversion status
+        Yields:
+            DataFrame chunks with the shard data
         """
-        # Load metadata
-        with open(metadata_path, 'r') as f:
-            metadata = json.load(f)
+        self._check_file_set_verifiable(distribution)
+        file_paths = self.resolve_files(distribution, base_path)
+        if self._file_format(distribution) == 'parquet':
+            yield from self.iter_parquet(file_paths, chunk_size, read_plan)
+            return
+
+        def open_shard(path: Path) -> Tuple[Optional[pd.DataFrame], Iterator[pd.DataFrame]]:
+            chunks = self.iter_csv(path, chunk_size, read_plan, self.detect_compression(distribution, path))
+            return next(chunks, None), chunks
+
+        yielded = False
+        empty = None
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = pool.submit(open_shard, file_paths[0])
+            try:
+                for next_path in file_paths[1:] + [None]:
+                    first, chunks = pending.result()
+                    pending = pool.submit(open_shard, next_path) if next_path is not None else None
+                    with closing(chunks):
+                        for chunk in chain([first] if first is not None else [], chunks):
+                            if len(chunk):
+                                yielded = True
+                                yield chunk
+                            elif empty is None:
+                                empty = chunk
+            finally:
+                # Close the shard read ahead when iteration stops early
+                if pending is not None and not pending.cancel() and pending.exception() is None:
+                    pending.result()[1].close()
+
+        if not yielded:
+            yield empty if empty is not None else self._empty_frame(read_plan)
+
+    def _iter_concurrent(self, func: Any, items: List[Any]) -> Iterator[Any]:
+        """Apply a function to items in a thread pool, yielding results in order.
+
+        At most read_workers items are in flight, which bounds memory to that
+        many results.
 
-        # Use provided base path or current working directory for relative URLs
-        if base_path is None:
-            base_path = Path.cwd()
+        Args:
+            func: Function to apply
+            items: Items to apply it to
 
-        # Parse metadata
-        parsed = self.parser.parse(metadata)
-        recordsets = self.parser.extract_recordsets(parsed)
+        Yields:
+            Results in the order of items
+        """
+        remaining = iter(items)
+        with ThreadPoolExecutor(max_workers=self.read_workers) as pool:
+            in_flight = deque(pool.submit(func, item) for item in islice(remaining, self.read_workers))
+            while in_flight:
+                result = in_flight.popleft().result()
+                in_flight.extend(pool.submit(func, item) for item in islice(remaining, 1))
+                yield result
 
-        results = {
-            'success': True,
-            'tables_converted': 0,
-            'tables': {},
-            'validation_results': {},
-            'errors': []
-        }
+    def _file_format(self, distribution: Dict) -> str:
+        """Determine whether a distribution holds CSV or Parquet data.
 
-        # Process each recordSet
-        for recordset in recordsets:
-            table_mapping = self.mapper.map_table(recordset)
-            omop_table = table_mapping['omop_table']
+        CSV distributions declared with a codec MIME type (e.g.
+        'application/gzip') are recognized by their contentUrl suffix.
 
-            try:
-                # Find data file
-                df = self._extract_table_data(metadata, recordset, base_path)
-
-                # Validate if requested
-                if validate:
-                    is_valid, errors = self.validator.validate_table(omop_table, df)
-                    results['validation_results'][omop_table] = {
-                        'valid': is_valid,
-                        'errors': errors
-                    }
-                    if not is_valid:
-                        results['errors'].append(f"Validation failed for {omop_table}: {errors}")
-
-                # Export data
-                if output_format in ['csv', 'both']:
-                    csv_path = output_dir / f"{omop_table}.csv"
-                    self.exporter.export_csv(omop_table, df, csv_path)
-
-                if output_format in ['sql', 'both']:
-                    # Generate DDL
-                    table_schema = self._create_table_schema(table_mapping, df)
-                    ddl = self.exporter.generate_ddl(table_schema, sql_dialect)
-
-                    ddl_path = output_dir / f"{omop_table}_ddl.sql"
-                    with open(ddl_path, 'w') as f:
-                        f.write(ddl)
-
-                    # Generate INSERT statements
-                    inserts = self.exporter.generate_insert_statements(omop_table, df)
-                    insert_path = output_dir / f"{omop_table}_data.sql"
-                    with open(insert_path, 'w') as f:
-                        f.write('\n\n'.join(inserts))
-
-                results['tables_converted'] += 1
-                results['tables'][omop_table] = {
-                    'rows': len(df),
-                    'columns': len(df.columns)
-                }
+        Args:
+            distribution: Distribution dictionary
 
-            except Exception as e:
-                results['success'] = False
-                results['errors'].append(f"Error processing {omop_table}: {str(e)}")
+        Returns:
+            'csv' or 'parquet'
+        """
+        encoding_format = distribution.get('encodingFormat', 'text/csv')
+        for file_format in ('csv', 'parquet'):
+            if file_format in encoding_format.lower():
+                return file_format
+
+        includes = distribution.get('includes') or ''
+        file_name = distribution.get('contentUrl') or (includes if isinstance(includes, str) else includes[0])
+        suffixes = [suffix.lower() for suffix in Path(file_name).suffixes]
+        compressed = any(marker in encoding_format.lower() for marker in self.COMPRESSION_FORMATS)
+        if compressed and '.csv' in suffixes:
+            return 'csv'
+        raise ValueError(f"Unsupported encoding format: {encoding_format}")
+
+    def _iter_csv_tables(self, file_path: Path, chunk_size: int, read_plan: Optional[Dict],
+                         compression: Optional[str], sha256: Optional[str] = None,
+                         skip_rows: int = 0) -> Iterator[Any]:
+        """Stream a CSV file as Arrow tables of chunk_size rows with the arrow engine.
 
-        return results
+        Args:
+            file_path: Path to CSV file
+            chunk_size: Maximum number of rows per table
+            read_plan: Optional read plan from build_read_plan
+            compression: Compression codec
+            sha256: Expected sha256 of the file, verified while reading
+            skip_rows: Number of data rows to skip after the header
+
+        Yields:
+            pyarrow.Table chunks
+        """
+        read_options, convert_options = self._arrow_csv_options(file_path, read_plan, compression)
+        read_options.skip_rows_after_names = skip_rows
+        with self._verified_source(file_path, sha256) as source, \
+                self._open_csv_stream(file_path, compression, source) as stream:
+            reader = pa_csv.open_csv(stream, read_options=read_options, convert_options=convert_options)
+            batches = []
+            rows = 0
+            yielded = False
+            for batch in reader:
+                batches.append(batch)
+                rows += batch.num_rows
+                while rows >= chunk_size:
+                    table = pa.Table.from_batches(batches, schema=reader.schema)
+                    yield table.slice(0, chunk_size)
+                    yielded = True
+                    rest = table.slice(chunk_size)
+                    batches = rest.to_batches()
+                    rows = rest.num_rows
+            if rows or not yielded:
+                yield pa.Table.from_batches(batches, schema=reader.schema)
+
+    def _arrow_csv_options(self, file_path: Path, read_plan: Optional[Dict],
+                           compression: Optional[str]) -> Tuple[Any, Any]:
+        """Build pyarrow CSV read and convert options matching the pandas engine.
+
+        The header and first block are read once to select projected columns
+        and to stop Arrow inferring dates and timestamps in columns the plan
+        does not type, which pandas would leave as strings.
 
-    def _extract_table_data(self, metadata: Dict, recordset: Dict, base_path: Path) -> pd.DataFrame:
-        """Extract data for a recordSet.
+        Args:
+            file_path: Path to CSV file
+            read_plan: Optional read plan from build_read_plan
+            compression: Compression codec
+
+        Returns:
+            (ReadOptions, ConvertOptions) tuple
+        """
+        read_options = pa_csv.ReadOptions(use_threads=True)
+        column_types = {}
+        if read_plan is not None:
+            column_types.update({column: self.ARROW_CSV_TYPES[dtype]
+                                 for column, dtype in self._parse_dtypes(read_plan).items()
+                                 if dtype in self.ARROW_CSV_TYPES})
+            column_types.update({column: pa.string() for column in read_plan['date_columns']})
+        convert_options = pa_csv.ConvertOptions(column_types=column_types, null_values=self.CSV_NULL_VALUES,
+                                                strings_can_be_null=True)
+
+        with self._open_csv_stream(file_path, compression) as stream:
+            inferred = pa_csv.open_csv(stream, read_options=read_options, convert_options=convert_options).schema
+        for arrow_field in inferred:
+            if arrow_field.name not in column_types and pa.types.is_temporal(arrow_field.type):
+                column_types[arrow_field.name] = pa.string()
+
+        include_columns = []
+        if read_plan is not None and read_plan['project']:
+            wanted = set(read_plan['source_columns']) | set(self._filter_columns(read_plan))
+            include_columns = [column for column in inferred.names if column in wanted]
+        convert_options = pa_csv.ConvertOptions(column_types=column_types, null_values=self.CSV_NULL_VALUES,
+                                                strings_can_be_null=True, include_columns=include_columns)
+        return read_options, convert_options
+
+    def _open_csv_stream(self, file_path: Path, compression: Optional[str],
+                         source: Union[Path, IO, None] = None) -> Any:
+        """Open a CSV file for the arrow engine.
 
         Args:
-            metadata: Bio-Croissant metadata
-            recordset: RecordSet dictionary
-            base_path: Base path for relative file paths
+            file_path: Path to CSV file
+            compression: Compression codec ('infer' uses the file suffix)
+            source: Open binary stream to read instead of the file (e.g. from
+                _verified_source)
 
         Returns:
-            DataFrame with table data
+            Memory-mapped file, or a (decompressing) input stream
         """
-        # Find the distribution referenced by this recordSet
-        fields = recordset.get('field', [])
-        if not fields:
-            raise ValueError(f"RecordSet {recordset.get('name')} has no fields")
+        compression = self._stream_compression(file_path, compression, None)
+        if source is not None and source is not file_path:
+            raw = pa.PythonFile(source, mode='r')
+            return pa.CompressedInputStream(raw, compression) if compression else raw
+        if compression:
+            return pa.CompressedInputStream(pa.OSFile(str(file_path)), compression)
+        return pa.memory_map(str(file_path))
+
+    def _stream_compression(self, file_path: Path, compression: Optional[str],
+                            source: Union[Path, IO, None]) -> Optional[str]:
+        """Resolve 'infer' compression for a source that is an open stream.
 
-        # Get source reference from first field
-        first_field = fields[0]
-        source = first_field.get('source', {})
-        file_obj = source.get('fileObject', {})
-        dist_id = file_obj.get('@id')
+        Args:
+            file_path: Path of the file
+            compression: Compression codec, or 'infer'
+            source: Path or open stream the file is read from
 
-        if not dist_id:
-            raise ValueError(f"No distribution reference found for {recordset.get('name')}")
+        Returns:
+            The codec; 'infer' is kept for paths, which pandas inspects itself
+        """
+        if compression == 'infer' and source is not file_path:
+            return self.COMPRESSION_SUFFIXES.get(Path(file_path).suffix.lower())
+        return compression
 
-        # Get distribution
-        distribution = self.parser.get_distribution_by_id(metadata, dist_id)
-        if not distribution:
-            raise ValueError(f"Distribution {dist_id} not found")
+    def _pending_verification(self, file_path: Union[Path, List[Path]], sha256: Optional[str]) -> bool:
+        """Check whether a read has to verify the file's checksum.
 
-        # Extract data
-        return self.extractor.extract_from_distribution(distribution, base_path)
+        Each file is verified on its first read only; later reads of a file
+        that failed verification in 'error' mode fail straight away.
 
-    def _create_table_schema(self, table_mapping: Dict, df: pd.DataFrame) -> Dict:
+        Args:
+            file_path: Path to the file, or the shard paths of a FileSet
+            sha256: Expected sha256 declared by the distribution
+
+        Returns:
+            True if the file should be hashed while it is read
+
+        Raises:
+            ChecksumError: In 'error' mode, for a file that failed verification
+                or a digest declared for several files
+        """
+        if not self.verify_checksums or not sha256:
+            return False
+        if isinstance(file_path, list):
+            self._report_unverifiable(f"sha256 {sha256} cannot be verified against {len(file_path)} files")
+            return False
+        entry = self.checksums.get(str(file_path))
+        if entry is None:
+            return True
+        if not entry['valid'] and self.verify_checksums == 'error':
+            raise ChecksumError(self._checksum_message(file_path, entry))
+        return False
+
+    def _check_file_set_verifiable(self, distribution: Dict) -> None:
+        """Report a FileSet read while checksum verification is on.
+
+        Croissant FileSets declare no sha256 per shard, so their shards cannot
+        be verified; reading one warns, or fails in 'error' mode.
+
+        Args:
+            distribution: FileSet distribution dictionary
+
+        Raises:
+            ChecksumError: In 'error' mode
+        """
+        if self.verify_checksums:
+            self._report_unverifiable(f"FileSet {distribution.get('@id')} cannot be verified: "
+                                      f"its shards declare no sha256")
+
+    def _report_unverifiable(self, message: str) -> None:
+        """Warn about data that cannot be verified, or fail in 'error' mode.
+
+        Args:
+            message: Description of what cannot be verified
+
+        Raises:
+            ChecksumError: In 'error' mode
+        """
+        if self.verify_checksums == 'error':
+            raise ChecksumError(message)
+        warnings.warn(message)
+
+    @contextmanager
+    def _verified_source(self, file_path: Path, sha256: Optional[str]) -> Iterator[Union[Path, IO]]:
+        """Open a file so its sha256 is computed by the read itself.
+
+        Yields the path unchanged when the file needs no verification.
+        Otherwise yields a buffered stream hashing every byte read; once the
+        block completes, any bytes the parser did not consume are hashed and
+        the digest is checked.
+
+        Args:
+            file_path: Path to the file
+            sha256: Expected sha256 declared by the distribution
+
+        Yields:
+            Path or binary stream to read the file from
+        """
+        if not self._pending_verification(file_path, sha256):
+            yield file_path
+            return
+        with open(file_path, 'rb', buffering=0) as raw:
+            reader = HashingReader(raw)
+            yield io.BufferedReader(reader, self.HASH_BUFFER_BYTES)
+            self._record_checksum(file_path, sha256, reader.drain(self.HASH_BUFFER_BYTES))
+
+    @contextmanager
+    def _verified_concurrently(self, file_path: Union[Path, List[Path]], sha256: Optional[str]) -> Iterator[None]:
+        """Hash a file in a background thread while the block reads it.
+
+        Parquet scans read only the projected column chunks, out of file
+        order, so the file is hashed alongside the scan instead of through it.
+
+        Args:
+            file_path: Path to the file, or the shard paths of a FileSet
+            sha256: Expected sha256 declared by the distribution
+        """
+        if not self._pending_verification(file_path, sha256):
+            yield
+            return
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            digest = pool.submit(self.file_sha256, file_path)
+            yield
+            self._record_checksum(file_path, sha256, digest.result())
+
+    @classmethod
+    def file_sha256(cls, file_path: Path) -> str:
+        """Compute the sha256 of a file in large blocks.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Hex sha256 digest
+        """
+        with open(file_path, 'rb', buffering=0) as raw:
+            return HashingReader(raw).drain(cls.HASH_BUFFER_BYTES)
+
+    def _record_checksum(self, file_path: Path, expected: str, actual: str) -> None:
+        """Record a verification result and act on a mismatch.
+
+        Args:
+            file_path: Path to the file
+            expected: sha256 declared by the distribution
+            actual: sha256 of the bytes read
+
+        Raises:
+            ChecksumError: On a mismatch in 'error' mode
+        """
+        entry = {'expected': expected, 'actual': actual, 'valid': expected.lower() == actual}
+        self.checksums[str(file_path)] = entry
+        if entry['valid']:
+            return
+        if self.verify_checksums == 'error':
+            raise ChecksumError(self._checksum_message(file_path, entry))
+        warnings.warn(self._checksum_message(file_path, entry))
+
+    @staticmethod
+    def _checksum_message(file_path: Path, entry: Dict) -> str:
+        """Format a checksum mismatch."""
+        return f"sha256 mismatch for {file_path}: expected {entry['expected']}, got {entry['actual']}"
+
+    def _filter_table(self, table: Any, read_plan: Optional[Dict]) -> Any:
+        """Apply a read plan's row filters to an Arrow table.
+
+        Args:
+            table: pyarrow.Table with source columns
+            read_plan: Optional read plan from build_read_plan
+
+        Text re-reads (see _text_read_plan) are left unfiltered here and
+        filtered by _apply_read_plan once their typed columns are coerced.
+
+        Returns:
+            Filtered pyarrow.Table
+        """
+        if read_plan is None or not read_plan.get('filters') or 'parse_dtype' in read_plan:
+            return table
+        return table.filter(pq.filters_to_expression(read_plan['filters']))
+
+    def _parse_dtypes(self, read_plan: Dict) -> Dict:
+        """Return the dtypes a read plan's columns are parsed with.
+
+        Args:
+            read_plan: Read plan from build_read_plan or _text_read_plan
+
+        Returns:
+            Mapping of source column to parser dtype
+        """
+        return read_plan.get('parse_dtype', read_plan['dtype'])
+
+    def _text_read_plan(self, read_plan: Dict) -> Dict:
+        """Copy a read plan so its typed columns are parsed as text.
+
+        _apply_read_plan then coerces the text value by value. The copy shares
+        the plan's parse_failures list.
+
+        Args:
+            read_plan: Read plan from build_read_plan
+
+        Returns:
+            Read plan with parse_dtype set to str for every typed column
+        """
+        return dict(read_plan, parse_dtype=dict.fromkeys(read_plan['dtype'], str))
+
+    def _parse_typed(self, parse: Callable[[Optional[Dict]], Any],
+                     read_plan: Optional[Dict]) -> Tuple[Any, Optional[Dict]]:
+        """Parse a file with a read plan's dtypes, re-reading it as text when a value does not parse.
+
+        Args:
+            parse: Function parsing the file with a read plan
+            read_plan: Optional read plan from build_read_plan
+
+        Returns:
+            Tuple of (parsed data, read plan it was parsed with)
+        """
+        try:
+            return parse(read_plan), read_plan
+        except ChecksumError:
+            raise
+        except ValueError:
+            if not read_plan or not read_plan['dtype']:
+                raise
+        text_plan = self._text_read_plan(read_plan)
+        return parse(text_plan), text_plan
+
+    def _iter_typed(self, parse: Callable[[Optional[Dict], int], Iterator],
+                    read_plan: Optional[Dict]) -> Iterator[Tuple[Any, Optional[Dict]]]:
+        """Stream a file parsed with a read plan's dtypes, re-reading the rest
+        as text from the first chunk in which a value does not parse.
+
+        Args:
+            parse: Function streaming raw chunks of the file with a read plan,
+                after skipping the given number of data rows
+            read_plan: Optional read plan from build_read_plan
+
+        Yields:
+            Tuples of (raw chunk, read plan it was parsed with)
+        """
+        plan = read_plan
+        rows = 0
+        chunks = parse(plan, rows)
+        try:
+            while True:
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+                except ChecksumError:
+                    raise
+                except ValueError:
+                    if plan is not read_plan or not read_plan or not read_plan['dtype']:
+                        raise
+                    plan = self._text_read_plan(read_plan)
+                    chunks = parse(plan, rows)
+                    continue
+                rows += len(chunk)
+                yield chunk, plan
+        finally:
+            chunks.close()
+
+    def _read_csv_options(self, read_plan: Dict) -> Dict:
+        """Translate a read plan into pandas read_csv options.
+
+        Args:
+            read_plan: Read plan from build_read_plan
+
+        Returns:
+            Keyword arguments for pd.read_csv
+        """
+        options = {'dtype': self._parse_dtypes(read_plan)}
+        if read_plan['project']:
+            wanted = set(read_plan['source_columns']) | set(self._filter_columns(read_plan))
+            options['usecols'] = lambda column: column in wanted
+        return options
+
+    def _parquet_scanner(self, file_path: Union[Path, List[Path]], read_plan: Optional[Dict] = None,
+                         batch_size: Optional[int] = None) -> Any:
+        """Create a Parquet scanner with projection and filter pushdown.
+
+        Args:
+            file_path: Path to Parquet file, or several files scanned as one dataset
+            read_plan: Optional read plan from build_read_plan
+            batch_size: Maximum number of rows per scanned batch
+
+        Returns:
+            pyarrow.dataset.Scanner over the file
+        """
+        if pa is None:
+            raise ImportError("Parquet support requires pyarrow (pip install pyarrow)")
+
+        dataset = pa_dataset.dataset(file_path, format='parquet')
+        options = {}
+        if read_plan is not None:
+            if read_plan['project']:
+                options['columns'] = [column for column in read_plan['source_columns']
+                                      if column in dataset.schema.names]
+            if read_plan.get('filters'):
+                options['filter'] = pq.filters_to_expression(read_plan['filters'])
+        if batch_size:
+            options['batch_size'] = batch_size
+        return dataset.scanner(**options)
+
+    def _arrow_to_frame(self, table: Any, read_plan: Optional[Dict] = None) -> pd.DataFrame:
+        """Convert an Arrow table to a DataFrame following a read plan.
+
+        Args:
+            table: pyarrow.Table with source columns
+            read_plan: Optional read plan from build_read_plan
+
+        Returns:
+            DataFrame with extracted data
+        """
+        df = table.to_pandas(date_as_object=False)
+        if read_plan is None:
+            return df
+        # Text re-reads skip _filter_table, since filters compare typed values
+        return self._apply_read_plan(df, read_plan, filter_rows='parse_dtype' in read_plan)
+
+    def _filter_columns(self, read_plan: Dict) -> List[str]:
+        """List the source columns referenced by a read plan's row filters.
+
+        Args:
+            read_plan: Read plan from build_read_plan
+
+        Returns:
+            List of column names
+        """
+        return [column for conjunction in self._filter_clauses(read_plan.get('filters'))
+                for column, _, _ in conjunction]
+
+    def _filter_clauses(self, filters: Optional[List]) -> List[List[Tuple]]:
+        """Normalize row filters to a list of ANDed conjunctions to be ORed.
+
+        Args:
+            filters: Row filters in DNF form
+
+        Returns:
+            List of lists of (column, op, value) tuples
+        """
+        if not filters:
+            return []
+        if isinstance(filters[0], (list, tuple)) and filters[0] and isinstance(filters[0][0], (list, tuple)):
+            return [list(conjunction) for conjunction in filters]
+        return [list(filters)]
+
+    def _filter_mask(self, df: pd.DataFrame, read_plan: Dict) -> Optional[pd.Series]:
+        """Evaluate a read plan's row filters on data read without pushdown.
+
+        Args:
+            df: DataFrame with source columns
+            read_plan: Read plan from build_read_plan
+
+        Returns:
+            Boolean Series of matching rows, or None when the plan has no filters
+        """
+        clauses = self._filter_clauses(read_plan.get('filters'))
+        if not clauses:
+            return None
+
+        mask = pd.Series(False, index=df.index)
+        for conjunction in clauses:
+            matches = pd.Series(True, index=df.index)
+            for column, op, value in conjunction:
+                if op not in self.FILTER_OPERATORS:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+                matches &= self.FILTER_OPERATORS[op](df[column], value).fillna(False).astype(bool)
+            mask |= matches
+        return mask
+
+    def _apply_read_plan(self, df: pd.DataFrame, read_plan: Dict, filter_rows: bool = False) -> pd.DataFrame:
+        """Coerce typed columns, parse dates and project source columns onto
+        OMOP output columns.
+
+        Values that do not parse as their column's dtype or date type are read
+        as NULL and counted in the plan's parse_failures, so a malformed value
+        is reported by validation instead of failing the whole table. Fields
+        whose source column is absent are left out, so missing columns are
+        reported by validation rather than failing the read.
+
+        Args:
+            df: DataFrame read with the plan's projection
+            read_plan: Read plan from build_read_plan
+            filter_rows: Apply the plan's row filters once typed columns are
+                coerced (for data read without filter pushdown)
+
+        Returns:
+            DataFrame with OMOP output columns in field order, followed by any
+            passed-through source columns when the plan does not project
+        """
+        failed = {}
+        for column, dtype in read_plan['dtype'].items():
+            if column in df.columns and dtype is not str:
+                df[column], failed[column] = self._coerce_column(df[column], dtype)
+
+        keep = self._filter_mask(df, read_plan) if filter_rows else None
+        if keep is not None:
+            failed = {column: mask & keep for column, mask in failed.items() if mask is not None}
+            df = df[keep]
+
+        for column, sql_type in read_plan['date_columns'].items():
+            if column in df.columns:
+                parsed = pd.to_datetime(df[column], format='ISO8601', errors='coerce')
+                failed[column] = df[column].notna() & parsed.isna()
+                df[column] = parsed.dt.normalize() if sql_type == 'DATE' else parsed
+
+        counts = {column: int(mask.sum()) for column, mask in failed.items() if mask is not None}
+        failures = {output: counts[source] for output, source in read_plan['output_columns']
+                    if counts.get(source)}
+        if failures and read_plan.get('parse_failures') is not None:
+            read_plan['parse_failures'].append(failures)
+
+        output_columns = [(output, source) for output, source in read_plan['output_columns']
+                          if source in df.columns]
+        if not read_plan['project']:
+            # Keep the source column order, renaming referenced columns
+            renamed = {}
+            for output, source in output_columns:
+                renamed.setdefault(source, output)
+            output_columns = [(renamed.get(column, column), column) for column in df.columns] + [
+                (output, source) for output, source in output_columns if renamed[source] != output
+            ]
+
+        projected = df[[source for _, source in output_columns]]
+        projected.columns = [output for output, _ in output_columns]
+        return projected
+
+    def _empty_frame(self, read_plan: Optional[Dict]) -> pd.DataFrame:
+        """Build the empty DataFrame a read plan yields for a source without rows.
+
+        Args:
+            read_plan: Optional read plan from build_read_plan
+
+        Returns:
+            Empty DataFrame with the plan's output columns and dtypes (no
+            columns without a plan)
+        """
+        if read_plan is None:
+            return pd.DataFrame()
+        dtypes = self._parse_dtypes(read_plan)
+        source = pd.DataFrame({column: pd.Series(dtype=dtypes.get(column, object))
+                               for column in read_plan['source_columns']})
+        return self._apply_read_plan(source, dict(read_plan, filters=None, parse_failures=None))
+
+    def _coerce_column(self, values: pd.Series, dtype: Any) -> Tuple[pd.Series, Optional[pd.Series]]:
+        """Coerce a column to a read plan dtype, reading values that do not fit as NULL.
+
+        Args:
+            values: Column as parsed (typed, inferred or text)
+            dtype: Target dtype from PANDAS_DTYPES
+
+        Returns:
+            Tuple of (coerced column, mask of values read as NULL, or None when
+            the column converts without loss)
+        """
+        target = pd.api.types.pandas_dtype(dtype)
+        if values.dtype == target:
+            return values, None
+        numeric = pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+
+        if target == pd.BooleanDtype():
+            if pd.api.types.is_bool_dtype(values):
+                return values.astype(target), None
+            coerced = values.map({1: True, 0: False} if numeric else self.BOOLEAN_STRINGS).astype(target)
+        elif pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+            return values.astype(target), None
+        else:
+            numbers = values if numeric else pd.to_numeric(values, errors='coerce', dtype_backend='numpy_nullable')
+            if pd.api.types.is_integer_dtype(target) and not pd.api.types.is_integer_dtype(numbers):
+                # Only integral values within the int64 range survive the cast
+                numbers = numbers.where((numbers == np.floor(numbers))
+                                        & (numbers >= -2.0 ** 63) & (numbers < 2.0 ** 63))
+            coerced = numbers.astype(target)
+        return coerced, values.notna() & coerced.isna()
+
+    def _resolve_path(self, distribution: Dict, base_path: Optional[Path] = None) -> Path:
+        """Resolve the file path of a distribution.
+
+        Args:
+            distribution: Distribution dictionary
+            base_path: Base path for relative URLs
+
+        Returns:
+            Path to the distribution file
+        """
+        content_url = distribution.get('contentUrl')
+        if not content_url:
+            raise ValueError(f"Distribution missing contentUrl: {distribution.get('@id')}")
+
+        file_path = Path(content_url)
+        if base_path and not file_path.is_absolute():
+            file_path = base_path / file_path
+        return file_path
+
+
+class RecordSetAssembler:
+    """Assemble recordSets whose fields come from several distributions.
+
+    Each distribution is read once with its own read plan and the pieces are
+    joined on the recordSet key. The first distribution drives the join (left
+    join), so its rows are never dropped.
+    """
+
+    # Hash partitions used by the out-of-core join
+    JOIN_PARTITIONS = 64
+
+    # Column numbering the driving piece's rows through the out-of-core join
+    ROW_ORDINAL = '__row_ordinal'
+
+    def __init__(self, partitions: int = JOIN_PARTITIONS, spill_dir: Optional[Path] = None):
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+
+    def join(self, parts: List[pd.DataFrame], keys: List[str],
+             column_order: Optional[List[str]] = None) -> pd.DataFrame:
+        """Join in-memory pieces of a recordSet with a vectorized hash join.
+
+        Args:
+            parts: DataFrames read from each distribution, driving piece first
+            keys: Key columns present in every piece
+            column_order: Preferred output column order
+
+        Returns:
+            Joined DataFrame
+        """
+        joined = parts[0]
+        for part in parts[1:]:
+            joined = joined.merge(part, on=keys, how='left', sort=False)
+        return self._order_columns(joined.reset_index(drop=True), column_order)
+
+    def iter_join(self, part_chunks: List[Iterator[pd.DataFrame]], keys: List[str],
+                  chunk_size: int, column_order: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Join chunked pieces of a recordSet out of core.
+
+        A grace hash join: every piece is hash-partitioned on the key and
+        spilled to disk chunk by chunk, then the matching partitions are joined
+        one at a time. Memory is bounded by the largest partition rather than
+        by the tables. Driving rows carry their ordinal through the join, and
+        the joined rows are spilled again by ordinal range and sorted one range
+        at a time, so rows come out in the same order as from join.
+
+        Args:
+            part_chunks: Chunk iterators for each distribution, driving piece first
+            keys: Key columns present in every piece
+            chunk_size: Maximum number of rows per yielded chunk
+            column_order: Preferred output column order
+
+        Yields:
+            Joined DataFrame chunks
+        """
+        with tempfile.TemporaryDirectory(prefix='omop_join_', dir=self.spill_dir) as spill_root:
+            spill_root = Path(spill_root)
+            rows = 0
+            for side, chunks in enumerate(part_chunks):
+                for n, chunk in enumerate(chunks):
+                    if side == 0:
+                        chunk = chunk.assign(**{self.ROW_ORDINAL: np.arange(rows, rows + len(chunk))})
+                        rows += len(chunk)
+                    self._spill_chunk(chunk, keys, spill_root / str(side), n)
+
+            # Ranges no larger than an average partition keep memory bounded as before
+            range_rows = max(chunk_size, -(-rows // self.partitions))
+            ordered_dir = spill_root / 'ordered'
+            ordered_dir.mkdir()
+            for partition in range(self.partitions):
+                parts = [self._load_partition(spill_root / str(side), partition)
+                         for side in range(len(part_chunks))]
+                if parts[0] is None:
+                    continue
+                for side, part in enumerate(parts[1:], start=1):
+                    if part is None:
+                        parts[side] = self._empty_like(side, spill_root)
+                joined = self.join(parts, keys, column_order)
+                for row_range, range_part in joined.groupby(joined[self.ROW_ORDINAL] // range_rows, sort=False):
+                    range_part.to_pickle(ordered_dir / f"r{row_range}_p{partition}.pkl")
+
+            for row_range in range(-(-rows // range_rows)):
+                paths = list(ordered_dir.glob(f"r{row_range}_p*.pkl"))
+                if not paths:
+                    continue
+                # Rows sharing an ordinal come from one partition, so a stable sort keeps their order
+                joined = (pd.concat([pd.read_pickle(path) for path in paths], ignore_index=True)
+                          .sort_values(self.ROW_ORDINAL, kind='stable')
+                          .drop(columns=self.ROW_ORDINAL)
+                          .reset_index(drop=True))
+                for start in range(0, len(joined), chunk_size):
+                    yield joined.iloc[start:start + chunk_size]
+
+    def partition_ids(self, df: pd.DataFrame, keys: List[str]) -> np.ndarray:
+        """Compute the join partition of every row from its key.
+
+        Args:
+            df: DataFrame with key columns
+            keys: Key columns
+
+        Returns:
+            Array of partition numbers
+        """
+        hashes = pd.util.hash_pandas_object(df[keys], index=False).to_numpy()
+        return (hashes % np.uint64(self.partitions)).astype(np.int64)
+
+    def _spill_chunk(self, chunk: pd.DataFrame, keys: List[str], side_dir: Path, n: int) -> None:
+        """Write one chunk to its key partitions on disk.
+
+        Args:
+            chunk: DataFrame chunk of one piece
+            keys: Key columns
+            side_dir: Spill directory of the piece
+            n: Chunk number within the piece
+        """
+        side_dir.mkdir(exist_ok=True)
+        # Keep an empty frame so missing partitions can be typed correctly
+        schema_path = side_dir / 'schema.pkl'
+        if not schema_path.exists():
+            chunk.iloc[:0].to_pickle(schema_path)
+        for partition, rows in chunk.groupby(self.partition_ids(chunk, keys), sort=False):
+            rows.to_pickle(side_dir / f"p{partition}_c{n}.pkl")
+
+    def _load_partition(self, side_dir: Path, partition: int) -> Optional[pd.DataFrame]:
+        """Load all spilled chunks of one partition.
+
+        Args:
+            side_dir: Spill directory of the piece
+            partition: Partition number
+
+        Returns:
+            DataFrame with the partition rows in chunk order, or None if empty
+        """
+        paths = sorted(side_dir.glob(f"p{partition}_c*.pkl"), key=lambda p: int(p.stem.split('_c')[1]))
+        if not paths:
+            return None
+        return pd.concat([pd.read_pickle(path) for path in paths], ignore_index=True)
+
+    def _empty_like(self, side: int, spill_root: Path) -> pd.DataFrame:
+        """Get an empty frame for a piece that has no rows in a partition.
+
+        Args:
+            side: Piece number
+            spill_root: Root spill directory
+
+        Returns:
+            Empty DataFrame with the piece's columns and dtypes
+        """
+        return pd.read_pickle(spill_root / str(side) / 'schema.pkl')
+
+    def _order_columns(self, df: pd.DataFrame, column_order: Optional[List[str]]) -> pd.DataFrame:
+        """Put columns in the preferred order, keeping any others after them.
+
+        Args:
+            df: Joined DataFrame
+            column_order: Preferred output column order
+
+        Returns:
+            DataFrame with reordered columns
+        """
+        if not column_order:
+            return df
+        ordered = [column for column in column_order if column in df.columns]
+        ordered += [column for column in df.columns if column not in ordered]
+        return df[ordered]
+
+
+class OMOPValidator:
+    """Validate data against OMOP CDM constraints."""
+
+    def __init__(self, vocabulary: Optional[VocabularyIndex] = None):
+        """Initialize validator.
+
+        Args:
+            vocabulary: Vocabulary index to check *_concept_id fields against
+                (default: concept fields are only type-checked)
+        """
+        self.mapper = OMOPTableMapper()
+        self.vocabulary = vocabulary
+
+    def validate_table(self, table_name: str, df: pd.DataFrame) -> Tuple[bool, List[str]]:
+        """Validate table data against OMOP CDM constraints.
+
+        Checks from the CDM specification registry: required fields present
+        and non-null, values fitting each field's datatype, and a unique,
+        non-null primary key. With a vocabulary, concept fields must hold
+        known concepts of the field's domain.
+
+        Args:
+            table_name: OMOP table name
+            df: DataFrame with table data
+
+        Returns:
+            Tuple of (is_valid, list of error messages)
+        """
+        table_validator = self.table_validator(table_name)
+        table_validator.update(df)
+        return table_validator.finish()
+
+    def table_validator(self, table_name: str,
+                        value_domains: Optional[Dict[str, Union[Dict, 'ValueDomain']]] = None
+                        ) -> 'StreamingTableValidator':
+        """Create an incremental validator for a table read in chunks.
+
+        Args:
+            table_name: OMOP table name
+            value_domains: ISO 11179 value domains by column, as the fields'
+                iso11179:valueDomain dictionaries (compiled here, resolving
+                registered domains) or already compiled
+
+        Returns:
+            StreamingTableValidator carrying validation state across chunks
+        """
+        compiled = {}
+        for column, domain in (value_domains or {}).items():
+            if not isinstance(domain, ValueDomain):
+                domain = ValueDomainRegistry.load().compile(domain)
+            if domain is not None:
+                compiled[column] = domain
+        return StreamingTableValidator(self, table_name, compiled)
+
+    def validate_primary_key(self, df: pd.DataFrame, pk_field: str) -> Tuple[bool, List[str]]:
+        """Validate primary key uniqueness.
+
+        Args:
+            df: DataFrame with table data
+            pk_field: Primary key field name
+
+        Returns:
+            Tuple of (is_valid, list of error messages)
+        """
+        errors = []
+
+        if pk_field not in df.columns:
+            errors.append(f"Primary key field '{pk_field}' not found")
+            return False, errors
+
+        # Check for nulls
+        if df[pk_field].isnull().any():
+            errors.append(f"Primary key '{pk_field}' contains null values")
+
+        # Check for duplicates
+        checker = PrimaryKeyChecker()
+        checker.update(df[pk_field])
+        duplicate_count, _ = checker.finish()
+        if duplicate_count:
+            errors.append(f"Primary key '{pk_field}' contains {duplicate_count} duplicate values")
+
+        return len(errors) == 0, errors
+
+    def validate_required_fields(self, df: pd.DataFrame, required_fields: List[str]) -> Tuple[bool, List[str]]:
+        """Validate that required fields are present.
+
+        Args:
+            df: DataFrame with table data
+            required_fields: List of required field names
+
+        Returns:
+            Tuple of (is_valid, list of error messages)
+        """
+        errors = []
+        missing_fields = [field for field in required_fields if field not in df.columns]
+
+        if missing_fields:
+            errors.append(f"Missing required fields: {', '.join(missing_fields)}")
+
+        return len(errors) == 0, errors
+
+    def validate_foreign_keys(self, df: pd.DataFrame, fk_field: str, ref_table_df: pd.DataFrame, ref_field: str) -> Tuple[bool, List[str]]:
+        """Validate foreign key references.
+
+        Args:
+            df: DataFrame with table data
+            fk_field: Foreign key field name
+            ref_table_df: Referenced table DataFrame
+            ref_field: Referenced field name
+
+        Returns:
+            Tuple of (is_valid, list of error messages)
+        """
+        errors = []
+
+        if fk_field not in df.columns:
+            errors.append(f"Foreign key field '{fk_field}' not found")
+            return False, errors
+
+        if ref_field not in ref_table_df.columns:
+            errors.append(f"Referenced field '{ref_field}' not found in referenced table")
+            return False, errors
+
+        # Check for orphaned records
+        index = KeyIndex()
+        index.add(ref_table_df[ref_field])
+        fk_values = np.sort(KeyIndex.key_array(df[fk_field]))
+        orphaned = pd.unique(fk_values[~index.build().contains(fk_values)])
+
+        if len(orphaned):
+            errors.append(f"Foreign key '{fk_field}' has {len(orphaned)} orphaned references")
+
+        return len(errors) == 0, errors
+
+
+class StreamingTableValidator:
+    """Validate an OMOP table incrementally, one chunk at a time.
+
+    Produces the same errors as OMOPValidator.validate_table on the
+    concatenated chunks, carrying primary key state between chunks in a
+    bounded-memory PrimaryKeyChecker.
+    """
+
+    def __init__(self, validator: OMOPValidator, table_name: str,
+                 value_domains: Optional[Dict[str, 'ValueDomain']] = None):
+        self.validator = validator
+        self.table_name = table_name
+        self.value_domains = value_domains or {}
+        self.domain_violations: Dict[str, int] = {}
+        self.concept_violations: Dict[str, Dict[str, int]] = {}
+        self.table_spec = OMOPSpecRegistry.load().table(table_name)
+        self.pk_field = validator.mapper.get_primary_key(table_name)
+        self.field_errors: List[str] = []
+        self.null_counts: Dict[str, int] = {}
+        self.type_violations: Dict[str, int] = {}
+        self.parse_failures: Dict[str, int] = {}
+        self.columns_checked = False
+        self.pk_present = False
+        self.pk_null_count = 0
+        self.pk_duplicate_count = 0
+        self.pk_duplicate_sample: List = []
+        self.pk_checker = PrimaryKeyChecker()
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Validate one chunk of table data.
+
+        Args:
+            df: DataFrame chunk with table data
+        """
+        if not self.columns_checked:
+            required_fields = self.validator.mapper.get_required_fields(self.table_name)
+            if required_fields:
+                valid, field_errors = self.validator.validate_required_fields(df, required_fields)
+                if not valid:
+                    self.field_errors.extend(field_errors)
+            self.pk_present = self.pk_field is not None and self.pk_field in df.columns
+            self.columns_checked = True
+
+        if self.table_spec is not None:
+            self._check_columns(df)
+
+        for column, domain in self.value_domains.items():
+            if column in df.columns:
+                self.domain_violations[column] = (self.domain_violations.get(column, 0)
+                                                  + domain.count_violations(df[column]))
+
+        if not self.pk_present:
+            return
+
+        self.pk_checker.update(df[self.pk_field])
+
+    def add_parse_failures(self, failures: Dict[str, int]) -> None:
+        """Record values the reader could not parse and read as NULL.
+
+        Args:
+            failures: Count of unparseable values by column
+        """
+        for column, count in failures.items():
+            self.parse_failures[column] = self.parse_failures.get(column, 0) + count
+
+    def _check_columns(self, df: pd.DataFrame) -> None:
+        """Count NULLs in required fields, values not fitting their datatype and
+        concept_ids the vocabulary rejects.
+
+        Args:
+            df: DataFrame chunk with table data
+        """
+        for column in df.columns:
+            field = self.table_spec.fields.get(str(column).lower())
+            if field is None:
+                continue
+            # Primary key NULLs are reported with the key
+            if field.required and column != self.pk_field:
+                self.null_counts[column] = self.null_counts.get(column, 0) + int(df[column].isna().sum())
+            self.type_violations[column] = (self.type_violations.get(column, 0)
+                                            + count_type_violations(field, df[column]))
+            if field.fk_table == 'CONCEPT' and self.validator.vocabulary is not None:
+                counts = self.validator.vocabulary.check_concepts(df[column], field.fk_domain)
+                totals = self.concept_violations.setdefault(column, dict.fromkeys(counts, 0))
+                for check, count in counts.items():
+                    totals[check] += count
+
+    def finish(self) -> Tuple[bool, List[str]]:
+        """Finish validation after the last chunk.
+
+        Returns:
+            Tuple of (is_valid, list of error messages)
+        """
+        errors = list(self.field_errors)
+
+        if self.pk_present:
+            self.pk_null_count = self.pk_checker.null_count
+            self.pk_duplicate_count, self.pk_duplicate_sample = self.pk_checker.finish()
+            if self.pk_null_count:
+                errors.append(f"Primary key '{self.pk_field}' contains null values")
+            if self.pk_duplicate_count:
+                errors.append(f"Primary key '{self.pk_field}' contains {self.pk_duplicate_count} duplicate values")
+
+        errors += [f"Required field '{column}' contains {count} null values"
+                   for column, count in self.null_counts.items() if count]
+        # Values that did not parse were read as NULL, so fold them into the datatype check
+        type_violations = dict(self.type_violations)
+        for column, count in self.parse_failures.items():
+            if self.table_spec is not None and str(column).lower() in self.table_spec.fields:
+                type_violations[column] = type_violations.get(column, 0) + count
+            else:
+                errors.append(f"Field '{column}' contains {count} values that could not be parsed")
+        errors += [f"Field '{column}' contains {count} values that are not valid "
+                   f"{self.table_spec.fields[str(column).lower()].datatype}"
+                   for column, count in type_violations.items() if count]
+        errors += [f"Field '{column}' contains {count} values outside value domain "
+                   f"{self.value_domains[column].id or 'of the field'}"
+                   for column, count in self.domain_violations.items() if count]
+        for column, counts in self.concept_violations.items():
+            field = self.table_spec.fields[str(column).lower()]
+            if counts['unknown']:
+                errors.append(f"Field '{column}' contains {counts['unknown']} concept_ids not in the vocabulary")
+            if counts['domain']:
+                errors.append(f"Field '{column}' contains {counts['domain']} concepts outside domain "
+                              f"{field.fk_domain}")
+            if counts['non_standard']:
+                errors.append(f"Field '{column}' contains {counts['non_standard']} non-standard concepts")
+
+        return len(errors) == 0, errors
+
+
+class ValueDomain:
+    """ISO 11179 value domain compiled for vectorized column checks.
+
+    Permissible values become a KeyIndex (sorted array or bitmap) and
+    minimum/maximum values scalar bounds, so a whole column is checked with
+    a few array operations.
+    """
+
+    # iso11179:datatype values checked as numbers
+    NUMERIC_DATATYPES = {'integer', 'decimal', 'float', 'double', 'number', 'real'}
+
+    def __init__(self, domain: Dict):
+        """Compile a value domain.
+
+        Args:
+            domain: Value domain dictionary (iso11179:permissibleValues,
+                iso11179:minimumValue, iso11179:maximumValue)
+        """
+        self.id = domain.get('@id')
+        self.datatype = str(domain.get('iso11179:datatype', '')).lower()
+        permissible = [value.get('value') if isinstance(value, dict) else value
+                       for value in domain.get('iso11179:permissibleValues', [])]
+        self.values: Optional[KeyIndex] = None
+        if permissible:
+            self.values = KeyIndex()
+            self.values.add(pd.Series(permissible))
+            self.values.build()
+        self.minimum = self._bound(domain.get('iso11179:minimumValue'))
+        self.maximum = self._bound(domain.get('iso11179:maximumValue'))
+
+    @staticmethod
+    def _bound(value: Any) -> Optional[float]:
+        """Parse a numeric bound, ignoring non-numeric ones."""
+        try:
+            return float(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    @property
+    def is_constrained(self) -> bool:
+        """Whether the domain restricts values at all."""
+        return self.values is not None or self.minimum is not None or self.maximum is not None
+
+    def count_violations(self, values: pd.Series) -> int:
+        """Count the non-null values of a column outside the domain.
+
+        Args:
+            values: Column of table data
+
+        Returns:
+            Number of violating values
+        """
+        outside = 0
+        if self.values is not None:
+            keys = KeyIndex.key_array(values)
+            outside = ~self.values.contains(keys)
+        if self.minimum is not None or self.maximum is not None:
+            present = values.dropna()
+            if pd.api.types.is_numeric_dtype(present) and not pd.api.types.is_bool_dtype(present):
+                numbers = present.to_numpy(dtype=np.float64)
+            else:
+                numbers = pd.to_numeric(present, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            out_of_range = np.isnan(numbers)
+            if self.minimum is not None:
+                out_of_range |= numbers < self.minimum
+            if self.maximum is not None:
+                out_of_range |= numbers > self.maximum
+            # Both checks cover the same non-null values in the same order
+            outside = outside | out_of_range
+        return int(np.sum(outside))
+
+
+class ValueDomainRegistry:
+    """Standard ISO 11179 value domains, by @id.
+
+    Fields may reference a registered domain by @id alone; properties given
+    on the field override the registered ones.
+    """
+
+    REGISTRY_PATH = Path(__file__).resolve().parent.parent / 'schema' / 'value-domains' / 'standard-value-domains.json'
+
+    # Loaded registries by path
+    _registries: Dict[Path, 'ValueDomainRegistry'] = {}
+
+    def __init__(self, registry_path: Optional[Path] = None):
+        """Load the registry.
+
+        Args:
+            registry_path: Value domain registry JSON (default: the repo's
+                standard-value-domains.json); a missing file leaves it empty
+        """
+        self.registry_path = Path(registry_path) if registry_path else self.REGISTRY_PATH
+        self.domains: Dict[str, Dict] = {}
+        if self.registry_path.exists():
+            with open(self.registry_path) as f:
+                registry = json.load(f)
+            self.domains = {domain['@id']: domain for domain in registry.get('valueDomains', []) if domain.get('@id')}
+
+    @classmethod
+    def load(cls, registry_path: Optional[Path] = None) -> 'ValueDomainRegistry':
+        """Get the loaded registry for a path.
+
+        Args:
+            registry_path: Value domain registry JSON
+
+        Returns:
+            Registry, loaded on first use
+        """
+        key = Path(registry_path) if registry_path else cls.REGISTRY_PATH
+        if key not in cls._registries:
+            cls._registries[key] = cls(key)
+        return cls._registries[key]
+
+    def compile(self, domain: Optional[Dict]) -> Optional[ValueDomain]:
+        """Compile a field's value domain, resolving registered domains.
+
+        Args:
+            domain: The field's iso11179:valueDomain
+
+        Returns:
+            Compiled domain, or None when it does not restrict values
+        """
+        if not isinstance(domain, dict):
+            return None
+        resolved = dict(self.domains.get(domain.get('@id'), {}), **domain)
+        value_domain = ValueDomain(resolved)
+        return value_domain if value_domain.is_constrained else None
+
+
+class ConceptMapper:
+    """Map source codes to standard concept_ids, one chunk at a time.
+
+    Fields opt in with omop:sourceVocabulary, naming the vocabulary_ids their
+    source codes belong to. Each distinct code of a chunk is resolved once
+    through the vocabulary index, and the concept_ids are broadcast back to
+    the column through its factorized codes. Codes without a standard
+    concept, and missing codes, become concept 0.
+    """
+
+    # Most frequent unmapped codes reported per field
+    UNMAPPED_SAMPLE = 20
+
+    def __init__(self, vocabulary: VocabularyIndex, fields: List[CompiledField]):
+        """Initialize the mapper.
+
+        Args:
+            vocabulary: Vocabulary index with the source code index
+            fields: Compiled fields, those with source vocabularies are mapped
+        """
+        self.vocabulary = vocabulary
+        self.fields = {field.omop_field: field.source_vocabularies for field in fields if field.source_vocabularies}
+        self.codes: Dict[str, int] = dict.fromkeys(self.fields, 0)
+        self.unmapped: Dict[str, pd.Series] = {column: pd.Series(dtype=np.int64) for column in self.fields}
+
+    def map(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Replace the source codes of a chunk with standard concept_ids.
+
+        Args:
+            df: DataFrame chunk with table data
+
+        Returns:
+            DataFrame with mapped fields as int64 concept_ids
+        """
+        df = df.copy(deep=False)
+        for column, vocabularies in self.fields.items():
+            if column not in df.columns:
+                continue
+            positions, distinct = pd.factorize(df[column])
+            distinct = pd.Series(distinct.astype(str), dtype=object)
+            concepts = self.vocabulary.map_source_codes(distinct, vocabularies)
+            # Position -1 (missing code) picks the trailing 0
+            df[column] = np.append(concepts, 0)[positions]
+
+            counts = np.bincount(positions[positions >= 0], minlength=len(distinct))
+            self.codes[column] += int(counts.sum())
+            unmapped = concepts == 0
+            if unmapped.any():
+                self.unmapped[column] = self.unmapped[column].add(
+                    pd.Series(counts[unmapped], index=distinct[unmapped].to_numpy()), fill_value=0)
+        return df
+
+    def finish(self) -> Dict[str, Dict]:
+        """Summarize the mapping after the last chunk.
+
+        Returns:
+            Dictionary by field of codes, mapped and unmapped row counts and
+            the most frequent unmapped codes
+        """
+        summary = {}
+        for column in self.fields:
+            unmapped = self.unmapped[column]
+            top = unmapped.sort_values(ascending=False, kind='stable').head(self.UNMAPPED_SAMPLE)
+            summary[column] = {
+                'codes': self.codes[column],
+                'mapped': self.codes[column] - int(unmapped.sum()),
+                'unmapped': int(unmapped.sum()),
+                'unmapped_codes': {str(code): int(count) for code, count in top.items()}
+            }
+        return summary
+
+
+class BioCroissantToOMOPConverter:
+    """Main converter class for Bio-Croissant to OMOP CDM."""
+
+    # Run manifest written to the output directory
+    MANIFEST_FILENAME = 'omop_manifest.json'
+
+    # Directory next to the manifest holding each table's TableKeys
+    KEYS_DIRNAME = 'omop_keys'
+
+    # Database written to the output directory by the 'sqlite' format
+    DATABASE_FILENAME = 'omop_cdm.sqlite'
+
+    # Suffix of the metadata file written with profiling results
+    PROFILED_METADATA_SUFFIX = '_profiled'
+
+    # TableWriters opened for each output format, in artifact order
+    OUTPUT_WRITERS = {
+        'csv': ['csv'],
+        'sql': ['sql'],
+        'both': ['csv', 'sql'],
+        'parquet': ['parquet'],
+        'bulk': ['bulk'],
+        'sqlite': ['sqlite']
+    }
+
+    def __init__(self, cache_bytes: int = 0, csv_engine: str = 'pandas',
+                 verify_checksums: Optional[str] = None, vocabulary_dir: Optional[Path] = None):
+        """Initialize converter.
+
+        Args:
+            cache_bytes: Memory budget for caching distributions read by several
+                recordSets (0 disables the cache)
+            csv_engine: CSV parser engine, 'pandas' or 'arrow' (multi-threaded)
+            verify_checksums: Verify distribution sha256 values while reading,
+                'warn' or 'error' to fail tables reading a mismatched file
+            vocabulary_dir: Athena vocabulary export to validate concept fields
+                against and map omop:sourceVocabulary codes through; indexed
+                on first use
+        """
+        self.parser = BioCroissantParser()
+        self.mapper = OMOPTableMapper()
+        self.extractor = DataExtractor(cache_bytes, csv_engine=csv_engine, verify_checksums=verify_checksums)
+        self.assembler = RecordSetAssembler()
+        self.vocabulary = VocabularyIndex.load(vocabulary_dir) if vocabulary_dir else None
+        self.validator = OMOPValidator(self.vocabulary)
+        self.exporter = OMOPExporter()
+
+    def convert(
+        self,
+        metadata_path: Path,
+        output_dir: Path,
+        output_format: str = 'csv',
+        validate: bool = True,
+        sql_dialect: str = 'postgresql',
+        base_path: Optional[Path] = None,
+        chunk_size: Optional[int] = None,
+        workers: int = 1,
+        incremental: bool = False,
+        project_columns: bool = True,
+        row_filters: Optional[Dict[str, List]] = None,
+        parquet_compression: str = 'snappy',
+        parquet_row_group_size: Optional[int] = None,
+        partition_parquet: bool = False,
+        partition_buckets: Optional[int] = None,
+        output_compression: Optional[str] = None,
+        insert_batch_size: int = OMOPExporter.INSERT_BATCH_SIZE,
+        database_path: Optional[Path] = None,
+        profile: bool = False
+    ) -> Dict:
+        """Convert Bio-Croissant dataset to OMOP CDM format.
+
+        Args:
+            metadata_path: Path to Bio-Croissant metadata JSON file
+            output_dir: Directory for output files
+            output_format: Output format ('csv', 'sql', 'both', 'parquet', 'bulk'
+                for bulk-load data files and a load_<dialect>.sql script, or
+                'sqlite' to load tables straight into a SQLite database)
+            validate: Whether to validate data against OMOP constraints
+            sql_dialect: SQL dialect for DDL generation and bulk loading
+            base_path: Base path for resolving relative file URLs (default: cwd)
+            chunk_size: Stream each table through extract, validate and export in
+                chunks of this many rows (default: load whole tables)
+            workers: Number of worker processes converting recordSets in parallel
+                (default: 1, convert sequentially in this process)
+            incremental: Skip tables whose source hashes and mapping are unchanged
+                since the run recorded in the output directory manifest
+            project_columns: Read only the source columns referenced by recordSet
+                fields; False also passes unreferenced source columns through,
+                for metadata that describes only some of the table's columns
+            row_filters: Row filters per OMOP table name, in pyarrow DNF form
+                (e.g. {'PERSON': [('year_of_birth', '>=', 1950)]}); pushed into
+                Parquet scans and applied while reading CSV
+            parquet_compression: Compression codec for Parquet output
+            parquet_row_group_size: Maximum rows per Parquet row group
+            partition_parquet: Write each table as a Hive-partitioned Parquet
+                dataset keyed on the recordSet's omop:distributionKey
+            partition_buckets: Hash the distribution key into this many
+                partition buckets instead of one partition per key value
+            output_compression: Compress CSV and SQL outputs with this codec
+                ('gzip', 'bz2' or 'zstd'; Parquet uses parquet_compression)
+            insert_batch_size: Rows per multi-row INSERT statement
+            database_path: SQLite database for the 'sqlite' format (default:
+                omop_cdm.sqlite in the output directory); tables are loaded
+                one at a time, so workers is ignored
+            profile: Profile every table in the same pass over its chunks and
+                write the metadata with the results as bio:qualityMetrics to
+                {metadata stem}_profiled.json in the output directory
+
+        Returns:
+            Result dictionary with conversion status
+        """
+        if output_format == 'bulk' and output_compression and sql_dialect != 'postgresql':
+            raise ValueError(f"Compressed bulk-load files are only supported for postgresql, not {sql_dialect}")
+
+        # Load metadata
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+
+        # Use provided base path or current working directory for relative URLs
+        if base_path is None:
+            base_path = Path.cwd()
+
+        # Compile metadata once; later stages use its @id indexes
+        parsed = self.parser.parse(metadata)
+        recordsets = parsed.recordsets
+
+        results = {
+            'success': True,
+            'tables_converted': 0,
+            'tables_skipped': 0,
+            'tables': {},
+            'validation_results': {},
+            'read_cache': {'hits': 0, 'misses': 0, 'evictions': 0},
+            'errors': []
+        }
+
+        if output_format == 'sqlite' and database_path is None:
+            database_path = output_dir / self.DATABASE_FILENAME
+
+        options = {
+            'output_format': output_format,
+            'validate': validate,
+            'sql_dialect': sql_dialect,
+            'base_path': base_path,
+            'chunk_size': chunk_size,
+            'project_columns': project_columns,
+            'row_filters': row_filters,
+            'parquet_compression': parquet_compression,
+            'parquet_row_group_size': parquet_row_group_size,
+            'partition_parquet': partition_parquet,
+            'partition_buckets': partition_buckets,
+            'output_compression': output_compression,
+            'insert_batch_size': insert_batch_size,
+            'database_path': database_path,
+            'profile': profile
+        }
+
+        # Fingerprint each recordSet and skip tables that are up to date
+        manifest_path = output_dir / self.MANIFEST_FILENAME
+        previous_tables = self._load_manifest(manifest_path).get('tables', {}) if incremental else {}
+        fingerprints = []
+        table_results: List[Optional[Dict]] = []
+        for recordset in recordsets:
+            fingerprint = self._table_fingerprint(parsed, recordset, base_path, options)
+            fingerprints.append(fingerprint)
+            entry = previous_tables.get(recordset.omop_table)
+            if entry and self._is_up_to_date(entry, fingerprint, output_dir):
+                table_results.append(self._skipped_table_result(recordset.omop_table, entry))
+            else:
+                table_results.append(None)
+
+        # Process each remaining recordSet
+        pending = [i for i, table_result in enumerate(table_results) if table_result is None]
+        pending_recordsets = [recordsets[i] for i in pending]
+        # SQLite takes one writer at a time
+        if workers > 1 and len(pending_recordsets) > 1 and output_format != 'sqlite':
+            converted = self._convert_parallel(parsed, pending_recordsets, output_dir, workers, options)
+        else:
+            converted = (
+                self._convert_recordset(parsed, recordset, output_dir, options)
+                for recordset in pending_recordsets
+            )
+        for i, table_result in zip(pending, converted):
+            table_results[i] = table_result
+
+        manifest_tables = {}
+        for fingerprint, table_result in zip(fingerprints, table_results):
+            self._merge_table_result(results, table_result)
+            # Files verified by worker processes are not hashed again here
+            self.extractor.checksums.update(table_result.get('checksums', {}))
+            if not table_result['errors']:
+                manifest_tables[table_result['omop_table']] = {
+                    'input_hashes': fingerprint['input_hashes'],
+                    'mapping_fingerprint': fingerprint['mapping_fingerprint'],
+                    'artifacts': table_result['artifacts'],
+                    'table': {k: v for k, v in table_result['table'].items() if k != 'skipped'},
+                    'validation': table_result['validation']
+                }
+                for key in ['schema', 'load', 'profile', 'concept_mapping', 'outputs', 'keys']:
+                    if table_result.get(key):
+                        manifest_tables[table_result['omop_table']][key] = table_result[key]
+
+        outputs = {}
+        for table_result in table_results:
+            if not table_result['errors']:
+                outputs.update(table_result.get('outputs') or {})
+        written_before = set(self.exporter.outputs)
+
+        # Foreign keys are checked across the whole dataset
+        if validate:
+            keys_files = {table_result['omop_table']: table_result.get('keys')
+                          for table_result in table_results if not table_result['errors']}
+            valid, fk_errors, references = self._check_referential_integrity(
+                parsed, [recordset for recordset in recordsets if recordset.omop_table in keys_files],
+                keys_files, output_dir, base_path, chunk_size, row_filters
+            )
+            if references:
+                results['referential_integrity'] = {'valid': valid, 'errors': fk_errors, 'references': references}
+                results['errors'].extend(fk_errors)
+
+        # Keys and indexes are built once all tables are loaded
+        loaded = [table_result for table_result in table_results
+                  if table_result.get('schema') and not table_result['errors']]
+        schemas = [table_result['schema'] for table_result in loaded]
+        if output_format == 'sqlite':
+            # Tables skipped by incremental conversion kept their indexes
+            statements = [statement for table_result in loaded if not table_result['table'].get('skipped')
+                          for statement in self.exporter.generate_index_ddl(table_result['schema'], 'sqlite')]
+            if statements:
+                with OMOPDatabaseLoader.connect_sqlite(database_path, self.exporter) as loader:
+                    loader.execute(statements)
+        elif output_format in ['sql', 'both', 'bulk'] and schemas:
+            # The sql formats declare primary keys in their DDL
+            post_load_scripts = self.exporter.generate_post_load_scripts(
+                schemas, sql_dialect, include_primary_keys=output_format == 'bulk'
+            )
+            for file_name, script in post_load_scripts.items():
+                self.exporter.write_output(output_dir / file_name, script)
+            results['post_load_scripts'] = list(post_load_scripts)
+
+        if output_format == 'bulk':
+            loads = [table_result['load'] for table_result in table_results if table_result.get('load')]
+            script = self.exporter.generate_load_script(loads, sql_dialect, output_compression,
+                                                        results.get('post_load_scripts'))
+            script_path = output_dir / f"load_{sql_dialect}.sql"
+            self.exporter.write_output(script_path, script)
+            results['load_script'] = script_path.name
+
+        if profile:
+            profiles = {table_result['omop_table']: table_result['profile'] for table_result in table_results
+                        if table_result.get('profile') and not table_result['errors']}
+            results['quality_metrics'] = self._quality_metrics(metadata.get('bio:qualityMetrics'), profiles)
+            profiled_path = output_dir / f"{Path(metadata_path).stem}{self.PROFILED_METADATA_SUFFIX}.json"
+            self.exporter.write_output(profiled_path, json.dumps(
+                dict(metadata, **{'bio:qualityMetrics': results['quality_metrics']}), indent=2))
+            results['profiled_metadata'] = profiled_path.name
+
+        outputs.update(self._relative_outputs(output_dir, written_before))
+        results['outputs'] = dict(sorted(outputs.items()))
+        results['distribution'] = self._output_distribution(results['outputs'])
+        self._write_manifest(manifest_path, {'tables': manifest_tables, 'distribution': results['distribution']})
+
+        if self.extractor.verify_checksums:
+            results['checksums'] = dict(self.extractor.checksums)
+
+        return results
+
+    def _table_fingerprint(self, metadata: CompiledMetadata, recordset: CompiledRecordSet,
+                           base_path: Path, options: Dict) -> Dict:
+        """Fingerprint the inputs and mapping of a recordSet.
+
+        Source inputs are identified by the distribution sha256 declared in the
+        metadata, falling back to file size and modification time when absent.
+
+        Args:
+            metadata: Compiled Bio-Croissant metadata
+            recordset: Compiled recordSet
+            base_path: Base path for relative file paths
+            options: Conversion options, as for _convert_recordset
+
+        Returns:
+            Dictionary with input_hashes and mapping_fingerprint
+        """
+        input_hashes = {}
+        for field in recordset.fields:
+            dist_id = field.source_id
+            if not dist_id or dist_id in input_hashes:
+                continue
+            distribution = metadata.distribution(dist_id)
+            if distribution is None:
+                input_hashes[dist_id] = None
+            elif distribution.get('sha256'):
+                input_hashes[dist_id] = distribution['sha256']
+            elif self.extractor.is_file_set(distribution):
+                try:
+                    file_root = self._distribution_base(metadata, distribution, base_path)
+                    listing = hashlib.sha256()
+                    for path in self.extractor.resolve_files(distribution, file_root):
+                        stat = path.stat()
+                        listing.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+                    input_hashes[dist_id] = f"files={listing.hexdigest()}"
+                except (OSError, ValueError):
+                    input_hashes[dist_id] = None
+            else:
+                try:
+                    stat = self.extractor._resolve_path(distribution, base_path).stat()
+                    input_hashes[dist_id] = f"size={stat.st_size};mtime_ns={stat.st_mtime_ns}"
+                except (OSError, ValueError):
+                    input_hashes[dist_id] = None
+
+        # Options that do not change the output are left out
+        output_options = {k: v for k, v in options.items() if k not in ('base_path', 'chunk_size')}
+        output_options['row_filters'] = (options.get('row_filters') or {}).get(recordset.omop_table)
+        if self.vocabulary is not None and (options.get('validate')
+                                            or any(field.source_vocabularies for field in recordset.fields)):
+            output_options['vocabulary'] = self.vocabulary.version
+        mapping = json.dumps({'recordSet': recordset.raw, 'options': output_options}, sort_keys=True, default=str)
+
+        return {
+            'input_hashes': input_hashes,
+            'mapping_fingerprint': hashlib.sha256(mapping.encode('utf-8')).hexdigest()
+        }
+
+    def _is_up_to_date(self, entry: Dict, fingerprint: Dict, output_dir: Path) -> bool:
+        """Check whether a manifest entry still matches a table's inputs and outputs.
+
+        Args:
+            entry: Table entry from the previous run manifest
+            fingerprint: Fingerprint from _table_fingerprint
+            output_dir: Directory for output files
+
+        Returns:
+            True if the table can be skipped
+        """
+        if None in fingerprint['input_hashes'].values():
+            return False
+        if entry.get('input_hashes') != fingerprint['input_hashes']:
+            return False
+        if entry.get('mapping_fingerprint') != fingerprint['mapping_fingerprint']:
+            return False
+        return all((output_dir / artifact).exists() for artifact in entry.get('artifacts', []))
+
+    def _skipped_table_result(self, omop_table: str, entry: Dict) -> Dict:
+        """Build a table result for a table skipped by incremental conversion.
+
+        Args:
+            omop_table: OMOP table name
+            entry: Table entry from the previous run manifest
+
+        Returns:
+            Table result dictionary carrying the previous run's results
+        """
+        return {
+            'omop_table': omop_table,
+            'table': dict(entry['table'], skipped=True),
+            'validation': entry.get('validation'),
+            'artifacts': entry.get('artifacts', []),
+            'schema': entry.get('schema'),
+            'load': entry.get('load'),
+            'profile': entry.get('profile'),
+            'concept_mapping': entry.get('concept_mapping'),
+            'outputs': entry.get('outputs', {}),
+            'keys': entry.get('keys'),
+            'errors': []
+        }
+
+    def _relative_outputs(self, output_dir: Path, written_before: set) -> Dict[str, Dict]:
+        """Get the checksums of the files written since a point in the run.
+
+        Args:
+            output_dir: Directory for output files
+            written_before: Paths in the exporter's outputs at that point
+
+        Returns:
+            Dictionary of {'sha256', 'contentSize'} by path relative to output_dir
+        """
+        outputs = {}
+        for path, entry in self.exporter.outputs.items():
+            if path in written_before:
+                continue
+            try:
+                outputs[Path(path).relative_to(output_dir).as_posix()] = entry
+            except ValueError:
+                outputs[path] = entry
+        return outputs
+
+    def _output_distribution(self, outputs: Dict[str, Dict]) -> List[Dict]:
+        """Describe output files as a Bio-Croissant distribution block.
+
+        Args:
+            outputs: Checksums by path relative to the output directory
+
+        Returns:
+            List of cr:FileObject dictionaries with contentUrl, encodingFormat,
+            contentSize and sha256
+        """
+        return [{
+            '@type': 'cr:FileObject',
+            '@id': name,
+            'name': name,
+            'contentUrl': name,
+            'encodingFormat': self.exporter.encoding_format(name),
+            'contentSize': f"{entry['contentSize']} bytes",
+            'sha256': entry['sha256']
+        } for name, entry in outputs.items()]
+
+    def _load_manifest(self, manifest_path: Path) -> Dict:
+        """Load the run manifest from a previous conversion.
+
+        Args:
+            manifest_path: Path to the manifest file
+
+        Returns:
+            Manifest dictionary (empty if missing or unreadable)
+        """
+        try:
+            with open(manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest_path: Path, manifest: Dict) -> None:
+        """Write the run manifest atomically.
+
+        Args:
+            manifest_path: Path to the manifest file
+            manifest: Manifest dictionary
+        """
+        tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def _convert_parallel(self, metadata: CompiledMetadata, recordsets: List[CompiledRecordSet],
+                          output_dir: Path, workers: int, options: Dict) -> List[Dict]:
+        """Convert recordSets concurrently in a process pool.
+
+        RecordSets are independent until cross-table validation, so each one is
+        extracted, validated and exported in its own worker process. The converter
+        and metadata are shipped once per worker rather than once per table.
+
+        Args:
+            metadata: Compiled Bio-Croissant metadata
+            recordsets: Compiled recordSets to convert
+            output_dir: Directory for output files
+            workers: Maximum number of worker processes
+            options: Conversion options, as for _convert_recordset
+
+        Returns:
+            Table results in recordSet order
+        """
+        table_results = []
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(recordsets)),
+            initializer=_init_conversion_worker,
+            initargs=(self, metadata)
+        ) as pool:
+            futures = [
+                pool.submit(_convert_recordset_in_worker, recordset.index, output_dir, options)
+                for recordset in recordsets
+            ]
+            for recordset, future in zip(recordsets, futures):
+                try:
+                    table_results.append(future.result())
+                except Exception as e:
+                    omop_table = recordset.omop_table
+                    table_results.append({
+                        'omop_table': omop_table,
+                        'table': None,
+                        'validation': None,
+                        'artifacts': [],
+                        'errors': [f"Error processing {omop_table}: {str(e)}"]
+                    })
+        return table_results
+
+    def _convert_recordset(self, metadata: CompiledMetadata, recordset: CompiledRecordSet, output_dir: Path,
+                           options: Dict) -> Dict:
+        """Convert a single recordSet to an OMOP table.
+
+        Data flows through extract, concept mapping, validate and export one
+        chunk at a time, so peak memory is bounded by chunk_size rather than
+        table size. Each chunk goes to the TableWriters of the output format,
+        opened on the first chunk.
+
+        Args:
+            metadata: Compiled Bio-Croissant metadata
+            recordset: Compiled recordSet
+            output_dir: Directory for output files
+            options: Conversion options, as the keyword arguments of convert
+                (output_format, validate, sql_dialect, base_path, chunk_size,
+                project_columns, row_filters, parquet_compression,
+                parquet_row_group_size, partition_parquet, partition_buckets,
+                output_compression, insert_batch_size, database_path, profile)
+
+        Returns:
+            Table result dictionary with omop_table, table, validation and errors
+            (and load, the bulk-load file entry, for the 'bulk' format, profile
+            when profiling, concept_mapping for fields mapping source codes, and
+            keys, the saved TableKeys file, for tables in foreign key checks)
+        """
+        table_mapping = self.mapper.map_table(recordset.raw)
+        omop_table = table_mapping['omop_table']
+        validate = options['validate']
+
+        table_result = {
+            'omop_table': omop_table,
+            'table': None,
+            'validation': None,
+            'artifacts': [],
+            'load': None,
+            'read_cache': {},
+            'errors': []
+        }
+        cache_before = self.extractor.cache_stats()
+        verified_before = set(self.extractor.checksums)
+        written_before = set(self.exporter.outputs)
+
+        try:
+            table_validator = None
+            if validate:
+                value_domains = {field.omop_field: field.raw['iso11179:valueDomain']
+                                 for field in recordset.fields if field.raw.get('iso11179:valueDomain')}
+                table_validator = self.validator.table_validator(omop_table, value_domains)
+            profiler = TableProfiler() if options['profile'] else None
+            # Keys for the cross-table foreign key check are collected from the same chunks
+            table_keys = None
+            if validate:
+                table_keys = ReferentialIntegrityChecker.table_keys(metadata.foreign_key_references, omop_table)
+            concept_mapper = None
+            if any(field.source_vocabularies for field in recordset.fields):
+                if self.vocabulary is None:
+                    raise ValueError(f"Fields of {recordset.id} map source codes, but no vocabulary is configured")
+                concept_mapper = ConceptMapper(self.vocabulary, recordset.fields)
+            rows = 0
+            columns = 0
+            chunks = 0
+            parse_failures = []
+            writers: List[TableWriter] = []
+
+            with ExitStack() as stack:
+                for df in self._iter_table_data(metadata, recordset, options['base_path'], options['chunk_size'],
+                                                options['project_columns'],
+                                                (options['row_filters'] or {}).get(omop_table), parse_failures):
+                    if concept_mapper:
+                        df = concept_mapper.map(df)
+
+                    # Validate if requested
+                    if table_validator:
+                        table_validator.update(df)
+                    if table_keys:
+                        table_keys.update(df)
+                    if profiler:
+                        profiler.update(df)
+
+                    # Export data
+                    if chunks == 0:
+                        writers = [stack.enter_context(writer) for writer in
+                                   self._open_table_writers(recordset, table_mapping, df, output_dir, options)]
+                    for writer in writers:
+                        writer.write(df)
+
+                    rows += len(df)
+                    columns = len(df.columns)
+                    chunks += 1
+
+            for writer in writers:
+                table_result['artifacts'].extend(path.name for path in writer.output_paths
+                                                 if path.parent == output_dir)
+                if writer.declared_schema:
+                    table_result['schema'] = writer.declared_schema
+                if writer.load:
+                    table_result['load'] = writer.load
+
+            if table_validator:
+                for failures in parse_failures:
+                    table_validator.add_parse_failures(failures)
+                table_result['validation'] = self._validation_result(table_validator)
+
+            if table_keys:
+                keys_path = output_dir / self.KEYS_DIRNAME / f"{omop_table}.npz"
+                keys_path.parent.mkdir(exist_ok=True)
+                table_keys.finish().save(keys_path)
+                table_result['keys'] = keys_path.relative_to(output_dir).as_posix()
+            if profiler:
+                table_result['profile'] = profiler.finish()
+            if concept_mapper:
+                table_result['concept_mapping'] = concept_mapper.finish()
+
+            table_result['table'] = {
+                'rows': rows,
+                'columns': columns
+            }
+            if options['chunk_size']:
+                table_result['table']['chunks'] = chunks
+
+        except Exception as e:
+            table_result['errors'].append(f"Error processing {omop_table}: {str(e)}")
+
+        cache_after = self.extractor.cache_stats()
+        for counter in ('hits', 'misses', 'evictions'):
+            table_result['read_cache'][counter] = cache_after[counter] - cache_before[counter]
+        table_result['checksums'] = {path: entry for path, entry in self.extractor.checksums.items()
+                                     if path not in verified_before}
+        table_result['outputs'] = self._relative_outputs(output_dir, written_before)
+
+        return table_result
+
+    def _validation_result(self, table_validator: 'StreamingTableValidator') -> Dict:
+        """Summarize a table's validation after its last chunk.
+
+        Args:
+            table_validator: Validator the table's chunks went through
+
+        Returns:
+            Validation result with valid and errors, and the duplicate keys,
+            value domain and concept violations and parse failures found
+        """
+        is_valid, errors = table_validator.finish()
+        validation = {
+            'valid': is_valid,
+            'errors': errors
+        }
+        if table_validator.pk_duplicate_sample:
+            validation['duplicate_keys'] = table_validator.pk_duplicate_sample
+        domain_violations = {column: count for column, count in table_validator.domain_violations.items()
+                             if count}
+        if domain_violations:
+            validation['value_domain_violations'] = domain_violations
+        concept_violations = {column: counts for column, counts in table_validator.concept_violations.items()
+                              if any(counts.values())}
+        if concept_violations:
+            validation['concept_violations'] = concept_violations
+        if table_validator.parse_failures:
+            validation['parse_failures'] = table_validator.parse_failures
+        return validation
+
+    def _open_table_writers(self, recordset: CompiledRecordSet, table_mapping: Dict, df: pd.DataFrame,
+                            output_dir: Path, options: Dict) -> Iterator[TableWriter]:
+        """Open the writers of the output format for a table from its first chunk.
+
+        Args:
+            recordset: Compiled recordSet
+            table_mapping: Table mapping dictionary
+            df: First chunk of table data
+            output_dir: Directory for output files
+            options: Conversion options, as for _convert_recordset
+
+        Yields:
+            TableWriters, in OUTPUT_WRITERS order (each is opened only once the
+            previous one is taken, so a failure leaves none unmanaged)
+        """
+        output_format = options['output_format']
+        if output_format not in self.OUTPUT_WRITERS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        openers = {
+            'csv': self._open_csv_writer,
+            'sql': self._open_sql_writer,
+            'parquet': self._open_parquet_writer,
+            'bulk': self._open_bulk_writer,
+            'sqlite': self._open_sqlite_writer
+        }
+        for writer in self.OUTPUT_WRITERS[output_format]:
+            yield openers[writer](recordset, table_mapping, df, output_dir, options)
+
+    def _open_csv_writer(self, recordset: CompiledRecordSet, table_mapping: Dict, df: pd.DataFrame,
+                         output_dir: Path, options: Dict) -> CSVTableWriter:
+        """Open the {table}.csv writer (arguments as for _open_table_writers)."""
+        output_path = self.exporter.compressed_path(output_dir / f"{table_mapping['omop_table']}.csv",
+                                                    options['output_compression'])
+        table_schema = self._create_table_schema(table_mapping, df, include_unmapped=True)
+        return CSVTableWriter(self.exporter, output_path, table_schema, options['output_compression'])
+
+    def _open_sql_writer(self, recordset: CompiledRecordSet, table_mapping: Dict, df: pd.DataFrame,
+                         output_dir: Path, options: Dict) -> SQLTableWriter:
+        """Open the {table}_ddl.sql and {table}_data.sql writer (arguments as for _open_table_writers)."""
+        omop_table = table_mapping['omop_table']
+        compression = options['output_compression']
+        return SQLTableWriter(
+            self.exporter,
+            self.exporter.compressed_path(output_dir / f"{omop_table}_ddl.sql", compression),
+            self.exporter.compressed_path(output_dir / f"{omop_table}_data.sql", compression),
+            self._create_table_schema(table_mapping, df),
+            options['sql_dialect'], compression, options['insert_batch_size']
+        )
+
+    def _open_parquet_writer(self, recordset: CompiledRecordSet, table_mapping: Dict, df: pd.DataFrame,
+                             output_dir: Path, options: Dict) -> ParquetTableWriter:
+        """Open the {table}.parquet writer, or the {table} dataset directory writer when partitioning.
+
+        Arguments are as for _open_table_writers.
+        """
+        omop_table = table_mapping['omop_table']
+        table_schema = self._create_table_schema(table_mapping, df)
+        if not options['partition_parquet']:
+            return self.exporter.open_parquet_writer(output_dir / f"{omop_table}.parquet", table_schema,
+                                                     options['parquet_compression'],
+                                                     options['parquet_row_group_size'])
+
+        if not recordset.distribution_key:
+            raise ValueError(f"recordSet {recordset.id} has no omop:distributionKey to partition on")
+        return self.exporter.open_parquet_writer(output_dir / omop_table, table_schema,
+                                                 options['parquet_compression'], options['parquet_row_group_size'],
+                                                 recordset.distribution_key, options['partition_buckets'])
+
+    def _open_bulk_writer(self, recordset: CompiledRecordSet, table_mapping: Dict, df: pd.DataFrame,
+                          output_dir: Path, options: Dict) -> BulkTableWriter:
+        """Open the {table}_ddl.sql and bulk-load data file writer (arguments as for _open_table_writers)."""
+        omop_table = table_mapping['omop_table']
+        dialect = options['sql_dialect']
+        return BulkTableWriter(
+            self.exporter,
+            output_dir / f"{omop_table}_ddl.sql",
+            self.exporter.compressed_path(output_dir / self.exporter.bulk_file_name(omop_table, dialect),
+                                          options['output_compression']),
+            self._create_table_schema(table_mapping, df, include_unmapped=True),
+            dialect, options['output_compression']
+        )
+
+    def _open_sqlite_writer(self, recordset: CompiledRecordSet, table_mapping: Dict, df: pd.DataFrame,
+                            output_dir: Path, options: Dict) -> DatabaseTableWriter:
+        """Open the writer loading the table into the SQLite database (arguments as for _open_table_writers)."""
+        database = Path(options['database_path'] or output_dir / self.DATABASE_FILENAME)
+        return DatabaseTableWriter(OMOPDatabaseLoader.connect_sqlite(database, self.exporter),
+                                   self._create_table_schema(table_mapping, df, include_unmapped=True), database)
+
+    def _quality_metrics(self, quality_metrics: Optional[Dict], profiles: Dict[str, Dict]) -> Dict:
+        """Update bio:qualityMetrics with table profiles.
+
+        Args:
+            quality_metrics: bio:qualityMetrics from the metadata, if any
+            profiles: Table profiles from TableProfiler by OMOP table name
+
+        Returns:
+            bio:qualityMetrics with bio:completeness per table and overall
+            (the mean over tables) and the profiles under bio:profile
+        """
+        quality_metrics = dict(quality_metrics or {})
+        completeness = {table: table_profile['completeness'] for table, table_profile in profiles.items()}
+        if completeness:
+            completeness = dict(overall=float(np.mean(list(completeness.values()))), **completeness)
+        quality_metrics['bio:completeness'] = dict(quality_metrics.get('bio:completeness', {}), **completeness)
+        quality_metrics['bio:profile'] = profiles
+        return quality_metrics
+
+    def _merge_table_result(self, results: Dict, table_result: Dict) -> None:
+        """Merge a per-table result into the conversion result dictionary.
+
+        Args:
+            results: Conversion result dictionary
+            table_result: Table result from _convert_recordset
+        """
+        omop_table = table_result['omop_table']
+        validation = table_result['validation']
+
+        for counter, count in table_result.get('read_cache', {}).items():
+            results['read_cache'][counter] += count
+
+        if validation is not None:
+            results['validation_results'][omop_table] = validation
+            if not validation['valid']:
+                results['errors'].append(f"Validation failed for {omop_table}: {validation['errors']}")
+
+        if table_result['errors']:
+            results['success'] = False
+            results['errors'].extend(table_result['errors'])
+            return
+
+        if table_result['table'].get('skipped'):
+            results['tables_skipped'] += 1
+        else:
+            results['tables_converted'] += 1
+        results['tables'][omop_table] = table_result['table']
+        if table_result.get('concept_mapping'):
+            results.setdefault('concept_mapping', {})[omop_table] = table_result['concept_mapping']
+
+    def _check_referential_integrity(self, metadata: CompiledMetadata, recordsets: List[CompiledRecordSet],
+                                     keys_files: Dict[str, Optional[str]], output_dir: Path, base_path: Path,
+                                     chunk_size: Optional[int] = None,
+                                     row_filters: Optional[Dict[str, List]] = None
+                                     ) -> Tuple[bool, List[str], List[Dict]]:
+        """Check the foreign keys between recordSets from the keys saved while converting them.
+
+        A table is only read again when its saved keys are missing or lack
+        a field, e.g. after a reference to a skipped table was added.
+
+        Args:
+            metadata: Compiled Bio-Croissant metadata
+            recordsets: Compiled recordSets to check
+            keys_files: TableKeys file per OMOP table, relative to output_dir
+            output_dir: Directory for output files
+            base_path: Base path for relative file paths
+            chunk_size: Rows per chunk when a table is read again
+            row_filters: Row filters per OMOP table, as for convert
+
+        Returns:
+            Tuple of (is_valid, list of error messages, per-reference results)
+        """
+        tables = {recordset.omop_table for recordset in recordsets}
+        references = [reference for reference in metadata.foreign_key_references
+                      if reference['table'] in tables and reference['ref_table'] in tables]
+        if not references:
+            return True, [], []
+
+        checker = ReferentialIntegrityChecker(references)
+        errors = []
+        for recordset in recordsets:
+            table = recordset.omop_table
+            keys = ReferentialIntegrityChecker.table_keys(references, table)
+            if keys is None:
+                continue
+            try:
+                saved = self._load_table_keys(output_dir, keys_files.get(table))
+                if saved is not None and saved.covers(keys):
+                    keys = saved
+                else:
+                    for df in self._iter_table_data(metadata, recordset, base_path, chunk_size, True,
+                                                    (row_filters or {}).get(table)):
+                        keys.update(df)
+                    keys.finish()
+            except Exception as e:
+                errors.append(f"Error checking foreign keys of {table}: {e}")
+                continue
+            checker.add_table(table, keys)
+
+        valid, fk_errors, references = checker.finish()
+        return valid and not errors, errors + fk_errors, references
+
+    def _load_table_keys(self, output_dir: Path, keys_file: Optional[str]) -> Optional[TableKeys]:
+        """Load the TableKeys saved for a table, if any.
+
+        Args:
+            output_dir: Directory for output files
+            keys_file: TableKeys file relative to output_dir
+
+        Returns:
+            TableKeys, or None if missing or unreadable
+        """
+        if not keys_file:
+            return None
+        try:
+            return TableKeys.load(output_dir / keys_file)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _iter_table_data(self, metadata: CompiledMetadata, recordset: CompiledRecordSet, base_path: Path,
+                         chunk_size: Optional[int] = None,
+                         project_columns: bool = True,
+                         filters: Optional[List] = None,
+                         parse_failures: Optional[List[Dict[str, int]]] = None) -> Iterator[pd.DataFrame]:
+        """Extract data for a recordSet chunk by chunk.
+
+        Args:
+            metadata: Compiled Bio-Croissant metadata
+            recordset: Compiled recordSet
+            base_path: Base path for relative file paths
+            chunk_size: Rows per chunk (None yields the whole table as one chunk)
+            project_columns: Read only the source columns referenced by fields
+            filters: Row filters on the source columns of the driving distribution
+            parse_failures: Optional list collecting, per chunk, the counts of
+                values read as NULL because they did not parse
+
+        Returns:
+            Iterator over DataFrame chunks with table data
+        """
+        groups = self._group_fields_by_distribution(metadata, recordset)
+        if len(groups) == 1:
+            distribution, fields = groups[0]
+            read_plan = self.extractor.build_read_plan([field.raw for field in fields], project_columns, filters)
+            if parse_failures is not None:
+                read_plan['parse_failures'] = parse_failures
+            distribution_base = self._distribution_base(metadata, distribution, base_path)
+            return self.extractor.iter_distribution(distribution, distribution_base, chunk_size, read_plan)
+
+        # Fields come from several distributions: read each once and join on the key
+        key_fields = recordset.key_fields
+        if not key_fields:
+            raise ValueError(f"RecordSet {recordset.name} reads several distributions but declares no key")
+        keys = [field.omop_field for field in key_fields]
+        column_order = [field.omop_field for field in recordset.fields]
+
+        plans = []
+        for i, (distribution, fields) in enumerate(groups):
+            plan_fields = fields + [field for field in key_fields if field not in fields]
+            # Only the driving distribution may pass unreferenced columns through
+            project = project_columns if i == 0 else True
+            plan_filters = filters if i == 0 else None
+            read_plan = self.extractor.build_read_plan([field.raw for field in plan_fields], project, plan_filters)
+            if parse_failures is not None:
+                read_plan['parse_failures'] = parse_failures
+            plans.append((distribution, self._distribution_base(metadata, distribution, base_path), read_plan))
+
+        if chunk_size:
+            part_chunks = [self.extractor.iter_distribution(distribution, distribution_base, chunk_size, read_plan)
+                           for distribution, distribution_base, read_plan in plans]
+            return self.assembler.iter_join(part_chunks, keys, chunk_size, column_order)
+
+        parts = [self.extractor.extract_from_distribution(distribution, distribution_base, read_plan)
+                 for distribution, distribution_base, read_plan in plans]
+        return iter([self.assembler.join(parts, keys, column_order)])
+
+    def _distribution_base(self, metadata: CompiledMetadata, distribution: Dict, base_path: Path) -> Path:
+        """Get the directory a distribution's paths are relative to.
+
+        FileSet includes globs are relative to the directory distribution they
+        are containedIn, when that is a local directory.
+
+        Args:
+            metadata: Compiled Bio-Croissant metadata
+            distribution: Distribution dictionary
+            base_path: Base path for relative file paths
+
+        Returns:
+            Base path for the distribution
+        """
+        contained_in = distribution.get('containedIn')
+        if not self.extractor.is_file_set(distribution) or not contained_in:
+            return base_path
+        if isinstance(contained_in, list):
+            contained_in = contained_in[0]
+        container = metadata.distribution(contained_in.get('@id'))
+        if container and container.get('contentUrl'):
+            container_path = self.extractor._resolve_path(container, base_path)
+            if container_path.is_dir():
+                return container_path
+        return base_path
+
+    def _group_fields_by_distribution(self, metadata: CompiledMetadata,
+                                      recordset: CompiledRecordSet) -> List[Tuple[Dict, List[CompiledField]]]:
+        """Group recordSet fields by their source distribution.
+
+        Fields without a fileObject reference are read from the distribution of
+        the first field.
+
+        Args:
+            metadata: Compiled Bio-Croissant metadata
+            recordset: Compiled recordSet
+
+        Returns:
+            List of (distribution, fields) pairs in order of first appearance
+        """
+        first_distribution = self._find_distribution(metadata, recordset)
+        first_id = first_distribution.get('@id')
+
+        grouped: Dict[str, List[CompiledField]] = {}
+        for field in recordset.fields:
+            grouped.setdefault(field.source_id or first_id, []).append(field)
+
+        groups = []
+        for dist_id, fields in grouped.items():
+            distribution = metadata.distribution(dist_id)
+            if not distribution:
+                raise ValueError(f"Distribution {dist_id} not found")
+            groups.append((distribution, fields))
+        return groups
+
+    def _extract_table_data(self, metadata: CompiledMetadata, recordset: CompiledRecordSet,
+                            base_path: Path) -> pd.DataFrame:
+        """Extract data for a recordSet.
+
+        Args:
+            metadata: Compiled Bio-Croissant metadata
+            recordset: Compiled recordSet
+            base_path: Base path for relative file paths
+
+        Returns:
+            DataFrame with table data
+        """
+        return next(self._iter_table_data(metadata, recordset, base_path))
+
+    def _find_distribution(self, metadata: CompiledMetadata, recordset: CompiledRecordSet) -> Dict:
+        """Find the distribution referenced by a recordSet.
+
+        Args:
+            metadata: Compiled Bio-Croissant metadata
+            recordset: Compiled recordSet
+
+        Returns:
+            Distribution dictionary
+        """
+        # Find the distribution referenced by this recordSet
+        if not recordset.fields:
+            raise ValueError(f"RecordSet {recordset.name} has no fields")
+
+        # Get source reference from first field
+        dist_id = recordset.fields[0].source_id
+        if not dist_id:
+            raise ValueError(f"No distribution reference found for {recordset.name}")
+
+        # Get distribution
+        distribution = metadata.distribution(dist_id)
+        if not distribution:
+            raise ValueError(f"Distribution {dist_id} not found")
+
+        return distribution
+
+    def _create_table_schema(self, table_mapping: Dict, df: pd.DataFrame,
+                             include_unmapped: bool = False) -> Dict:
         """Create table schema for DDL generation.
 
         Args:
             table_mapping: Table mapping dictionary
             df: DataFrame with table data
+            include_unmapped: Also declare data columns no field maps (passed
+                through from the source), typed from their pandas dtype
 
         Returns:
             Table schema dictionary
@@ -599,11 +3369,73 @@ class BioCroissantToOMOPConverter:
                 'nullable': not field_map.get('is_primary_key', False)
             })
 
+        if include_unmapped:
+            mapped = {field['name'] for field in fields}
+            for column in df.columns:
+                if column not in mapped:
+                    fields.append({
+                        'name': column,
+                        'type': self._infer_sql_type(df[column]),
+                        'primary_key': False,
+                        'nullable': True
+                    })
+
         return {
             'table_name': table_mapping['omop_table'],
             'fields': fields
         }
 
+    def _infer_sql_type(self, column: pd.Series) -> str:
+        """Infer the SQL type of a column from its pandas dtype.
+
+        Args:
+            column: Column of table data
+
+        Returns:
+            SQL datatype
+        """
+        if pd.api.types.is_bool_dtype(column):
+            return 'BOOLEAN'
+        if pd.api.types.is_integer_dtype(column):
+            return 'INTEGER'
+        if pd.api.types.is_float_dtype(column):
+            return 'FLOAT'
+        if pd.api.types.is_datetime64_any_dtype(column):
+            values = column.dropna()
+            return 'DATE' if (values == values.dt.normalize()).all() else 'TIMESTAMP'
+        return 'VARCHAR(255)'
+
+
+# Per-process state for parallel conversion workers
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_conversion_worker(converter: BioCroissantToOMOPConverter, metadata: CompiledMetadata) -> None:
+    """Initialize a conversion worker process.
+
+    Args:
+        converter: Converter to run recordSets with
+        metadata: Compiled Bio-Croissant metadata
+    """
+    _worker_state['converter'] = converter
+    _worker_state['metadata'] = metadata
+
+
+def _convert_recordset_in_worker(recordset_index: int, output_dir: Path, options: Dict) -> Dict:
+    """Convert one recordSet inside a worker process.
+
+    Args:
+        recordset_index: Position of the recordSet in the compiled metadata
+        output_dir: Directory for output files
+        options: Conversion options, as for BioCroissantToOMOPConverter._convert_recordset
+
+    Returns:
+        Table result dictionary
+    """
+    converter = _worker_state['converter']
+    metadata = _worker_state['metadata']
+    return converter._convert_recordset(metadata, metadata.recordsets[recordset_index], output_dir, options)
+
 
 def main():
     """Command-line interface for converter."""
@@ -612,12 +3444,49 @@ def main():
     parser = argparse.ArgumentParser(description='Convert Bio-Croissant to OMOP CDM format')
     parser.add_argument('metadata', type=Path, help='Path to Bio-Croissant metadata JSON')
     parser.add_argument('output_dir', type=Path, help='Output directory')
-    parser.add_argument('--format', choices=['csv', 'sql', 'both'], default='csv',
-                        help='Output format (default: csv)')
+    parser.add_argument('--format', choices=['csv', 'sql', 'both', 'parquet', 'bulk', 'sqlite'], default='csv',
+                        help='Output format; bulk writes COPY/LOAD DATA/.import files and a load script, '
+                             'sqlite loads a SQLite database directly (default: csv)')
+    parser.add_argument('--database', type=Path, default=None,
+                        help='SQLite database for --format sqlite (default: OUTPUT_DIR/omop_cdm.sqlite)')
     parser.add_argument('--no-validate', action='store_true',
                         help='Skip validation')
     parser.add_argument('--dialect', choices=['postgresql', 'mysql', 'sqlite'], default='postgresql',
-                        help='SQL dialect for DDL generation (default: postgresql)')
+                        help='SQL dialect for DDL generation and bulk loading (default: postgresql)')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Stream tables in chunks of this many rows (default: load whole tables)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Convert recordSets in parallel with this many processes (default: 1)')
+    parser.add_argument('--pass-through-columns', dest='project_columns', action='store_false',
+                        help='Also pass through source columns no recordSet field references '
+                             '(default: read only the referenced columns)')
+    parser.add_argument('--cache-mb', type=int, default=0,
+                        help='Memory budget in MB for caching distributions shared by recordSets (default: off)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Skip tables whose source hashes and mapping are unchanged since the last run')
+    parser.add_argument('--parquet-compression', default='snappy',
+                        help='Compression codec for Parquet output (default: snappy)')
+    parser.add_argument('--row-group-size', type=int, default=None,
+                        help='Maximum rows per Parquet row group')
+    parser.add_argument('--partition', action='store_true',
+                        help='Write Parquet tables as Hive-style partitions on omop:distributionKey')
+    parser.add_argument('--buckets', type=int, default=None,
+                        help='Hash the partition key into this many buckets')
+    parser.add_argument('--compress', choices=['gzip', 'bz2', 'zstd'], default=None,
+                        help='Compress CSV and SQL outputs with this codec (default: uncompressed)')
+    parser.add_argument('--insert-batch-size', type=int, default=OMOPExporter.INSERT_BATCH_SIZE,
+                        help=f'Rows per INSERT statement (default: {OMOPExporter.INSERT_BATCH_SIZE})')
+    parser.add_argument('--csv-engine', choices=list(DataExtractor.CSV_ENGINES), default='pandas',
+                        help='CSV parser: pandas, or arrow for a multi-threaded parser (default: pandas)')
+    parser.add_argument('--verify-checksums', choices=list(DataExtractor.VERIFY_MODES), default=None,
+                        help='Verify distribution sha256 values while reading: warn on a mismatch, '
+                             'or error to fail the tables reading the file (default: off)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile tables while converting and write the metadata with bio:qualityMetrics')
+    parser.add_argument('--vocabulary', type=Path, default=None,
+                        help='Athena vocabulary export (CONCEPT.csv, CONCEPT_RELATIONSHIP.csv and optionally '
+                             'SOURCE_TO_CONCEPT_MAP.csv) to validate concept_id fields against and map '
+                             'omop:sourceVocabulary codes through; indexed once into omop_vocabulary_index')
 
     args = parser.parse_args()
 
@@ -625,18 +3494,46 @@ def main():
     args.output_dir.mkdir(parents=True, exist_ok=True)
 
     # Run conversion
-    converter = BioCroissantToOMOPConverter()
+    converter = BioCroissantToOMOPConverter(cache_bytes=args.cache_mb * 1024 * 1024, csv_engine=args.csv_engine,
+                                            verify_checksums=args.verify_checksums, vocabulary_dir=args.vocabulary)
     result = converter.convert(
         args.metadata,
         args.output_dir,
         output_format=args.format,
         validate=not args.no_validate,
-        sql_dialect=args.dialect
+        sql_dialect=args.dialect,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        incremental=args.incremental,
+        project_columns=args.project_columns,
+        parquet_compression=args.parquet_compression,
+        parquet_row_group_size=args.row_group_size,
+        partition_parquet=args.partition,
+        partition_buckets=args.buckets,
+        output_compression=args.compress,
+        insert_batch_size=args.insert_batch_size,
+        database_path=args.database,
+        profile=args.profile
     )
 
     # Print results
     print(f"\nConversion {'succeeded' if result['success'] else 'failed'}")
     print(f"Tables converted: {result['tables_converted']}")
+    if result['tables_skipped']:
+        print(f"Tables skipped (unchanged): {result['tables_skipped']}")
+    if result.get('load_script'):
+        print(f"Load script: {args.output_dir / result['load_script']}")
+    if result.get('profiled_metadata'):
+        print(f"Profiled metadata: {args.output_dir / result['profiled_metadata']}")
+    if result.get('checksums'):
+        verified = sum(entry['valid'] for entry in result['checksums'].values())
+        print(f"Checksums verified: {verified} of {len(result['checksums'])}")
+    for table, mapping in result.get('concept_mapping', {}).items():
+        for field, counts in mapping.items():
+            print(f"Concept mapping {table}.{field}: {counts['mapped']} of {counts['codes']} codes mapped")
+    if args.cache_mb:
+        cache = result['read_cache']
+        print(f"Read cache: {cache['hits']} hits, {cache['misses']} misses, {cache['evictions']} evictions")
 
     if result['validation_results']:
         print("\nValidation Results:")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""OMOP CDM 5.4 specification registry.
+
+Compiles the field-level specification CSVs shipped under docs/OMOP CDM specs 5.4
+(the core CDM and the oncology extension) into an indexed schema registry, and
+provides the vectorized column checks validation runs from it.
+"""
+
+import csv
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Directory with the OMOP CDM 5.4 specification files (relative to project root)
+SPEC_DIR = Path(__file__).resolve().parent.parent / 'docs' / 'OMOP CDM specs 5.4'
+
+
+class CDMField:
+    """Specification of one OMOP CDM field."""
+
+    __slots__ = (
+        'table', 'name', 'required', 'datatype', 'max_length',
+        'is_primary_key', 'fk_table', 'fk_field', 'fk_domain'
+    )
+
+    def __init__(self, row: Dict):
+        self.table = row['cdmTableName'].strip().upper()
+        self.name = row['cdmFieldName'].strip().lower()
+        self.required = row.get('isRequired', '').strip() == 'Yes'
+        self.datatype = row.get('cdmDatatype', '').strip().lower()
+        length = re.fullmatch(r'varchar\((\d+)\)', self.datatype)
+        self.max_length = int(length.group(1)) if length else None
+        self.is_primary_key = row.get('isPrimaryKey', '').strip() == 'Yes'
+        fk_table = (row.get('fkTableName') or '').strip()
+        self.fk_table = fk_table.upper() if row.get('isForeignKey', '').strip() == 'Yes' and fk_table else None
+        self.fk_field = (row.get('fkFieldName') or '').strip().lower() or None
+        self.fk_domain = (row.get('fkDomain') or '').strip() or None
+
+
+class CDMTable:
+    """Specification of one OMOP CDM table."""
+
+    __slots__ = ('name', 'fields', 'primary_key', 'required_fields')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.fields: Dict[str, CDMField] = {}
+        self.primary_key: List[str] = []
+        self.required_fields: List[str] = []
+
+    def add_field(self, field: CDMField) -> None:
+        """Add a field, replacing an earlier definition of the same name.
+
+        Args:
+            field: Field specification
+        """
+        self.fields[field.name] = field
+        self.primary_key = [name for name, spec in self.fields.items() if spec.is_primary_key]
+        self.required_fields = [name for name, spec in self.fields.items() if spec.required]
+
+
+class OMOPSpecRegistry:
+    """Indexed registry of the OMOP CDM 5.4 tables and fields.
+
+    Use OMOPSpecRegistry.load() to share one compiled registry per
+    specification directory.
+    """
+
+    # Field-level specifications, later files extending or overriding earlier ones
+    FIELD_LEVEL_FILES = ['OMOP_CDMv5.4_Field_Level.csv', 'OMOP_CDM_Oncology_Ex_Field_Level.csv']
+
+    # Compiled registries by specification directory
+    _registries: Dict[Path, 'OMOPSpecRegistry'] = {}
+
+    def __init__(self, spec_dir: Optional[Path] = None):
+        """Compile the registry.
+
+        Args:
+            spec_dir: Directory with the specification CSVs (default: the
+                repo's docs/OMOP CDM specs 5.4); missing files are skipped
+        """
+        self.spec_dir = Path(spec_dir) if spec_dir else SPEC_DIR
+        self.tables: Dict[str, CDMTable] = {}
+
+        for file_name in self.FIELD_LEVEL_FILES:
+            path = self.spec_dir / file_name
+            if not path.exists():
+                continue
+            with open(path, newline='', encoding='utf-8-sig') as f:
+                for row in csv.DictReader(f):
+                    if not row.get('cdmTableName') or not row.get('cdmFieldName'):
+                        continue
+                    field = CDMField(row)
+                    self.tables.setdefault(field.table, CDMTable(field.table)).add_field(field)
+
+    @classmethod
+    def load(cls, spec_dir: Optional[Path] = None) -> 'OMOPSpecRegistry':
+        """Get the compiled registry for a specification directory.
+
+        Args:
+            spec_dir: Directory with the specification CSVs
+
+        Returns:
+            Registry, compiled on first use
+        """
+        key = Path(spec_dir) if spec_dir else SPEC_DIR
+        if key not in cls._registries:
+            cls._registries[key] = cls(key)
+        return cls._registries[key]
+
+    def table(self, table_name: str) -> Optional[CDMTable]:
+        """Get a table specification.
+
+        Args:
+            table_name: OMOP table name (any case)
+
+        Returns:
+            Table specification or None for tables outside the CDM
+        """
+        return self.tables.get(table_name.upper())
+
+    def __contains__(self, table_name: str) -> bool:
+        return table_name.upper() in self.tables
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+
+# Value ranges of the CDM integer types: -R <= value < R
+INTEGER_RANGES = {'integer': 2 ** 31, 'bigint': 2 ** 63}
+
+
+def count_type_violations(field: CDMField, values: pd.Series) -> int:
+    """Count the non-null values of a column that do not fit a field's datatype.
+
+    Integer columns are range-checked exactly and other columns already
+    typed to the field's kind pass without a scan; text columns are coerced
+    in one vectorized call. Values the reader could not coerce were read as
+    NULL and are counted by the reader instead.
+
+    Args:
+        field: Field specification
+        values: Column of table data
+
+    Returns:
+        Number of violating values
+    """
+    datatype = field.datatype
+    if datatype in INTEGER_RANGES:
+        bound = INTEGER_RANGES[datatype]
+        if pd.api.types.is_integer_dtype(values):
+            if datatype == 'bigint':
+                return 0
+            integers = values.dropna().to_numpy(dtype=np.int64)
+            return int(((integers < -bound) | (integers >= bound)).sum())
+        numbers = _to_numbers(values)
+        bad = np.isnan(numbers) | (numbers != np.floor(numbers)) | (numbers < -bound) | (numbers >= bound)
+        return int(bad.sum())
+
+    if datatype == 'float':
+        if pd.api.types.is_numeric_dtype(values):
+            return 0
+        return int(np.isnan(_to_numbers(values)).sum())
+
+    if datatype in ('date', 'datetime'):
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return 0
+        present = values.dropna()
+        if not len(present):
+            return 0
+        parsed = pd.to_datetime(present.astype(str), errors='coerce', format='ISO8601')
+        return int(parsed.isna().sum())
+
+    if field.max_length is not None:
+        present = values.dropna()
+        return int((present.astype(str).str.len() > field.max_length).sum())
+
+    return 0
+
+
+def _to_numbers(values: pd.Series) -> np.ndarray:
+    """Coerce the non-null values of a column to float64.
+
+    Args:
+        values: Column of table data
+
+    Returns:
+        float64 array, NaN marking values that are not numbers
+    """
+    present = values.dropna()
+    if pd.api.types.is_numeric_dtype(present) and not pd.api.types.is_bool_dtype(present):
+        return present.to_numpy(dtype=np.float64)
+    return pd.to_numeric(present, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
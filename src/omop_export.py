@@ -0,0 +1,1548 @@
+#!/usr/bin/env python3
+"""Export of OMOP tables.
+
+Writes OMOP tables as CSV, SQL DDL and INSERT statements, bulk-load files
+with load scripts, Parquet files or datasets, or straight into a database.
+Every format has a TableWriter streaming one table chunk by chunk, and
+every file is hashed while it is written and published by atomic rename.
+"""
+
+import bz2
+import gzip
+import hashlib
+import io
+import os
+import re
+import shutil
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet support is optional
+    pa = None
+
+try:
+    from .omop_cdm_spec import SPEC_DIR
+except ImportError:  # run as a script from src/
+    from omop_cdm_spec import SPEC_DIR
+
+
+class HashingWriter(io.RawIOBase):
+    """Raw binary writer computing the sha256 and size of the bytes written through it."""
+
+    def __init__(self, raw: IO[bytes]):
+        """Initialize the writer.
+
+        Args:
+            raw: Unbuffered binary file to write to
+        """
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.bytes_written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        count = self.raw.write(data)
+        self.sha256.update(memoryview(data)[:count])
+        self.bytes_written += count
+        return count
+
+
+class OutputFile:
+    """Output file hashed while it is written and published by atomic rename.
+
+    Data goes to {name}.tmp through a HashingWriter, which sees the bytes as
+    they reach disk (after any compression). Closing the file renames it into
+    place and records its sha256 and size; a file left by an error is
+    discarded, so readers never see a partial output.
+    """
+
+    # Write buffer between the codec and the file
+    BUFFER_BYTES = 8 * 1024 * 1024
+
+    def __init__(self, output_path: Path, compression: Optional[str] = None,
+                 newline: Optional[str] = None, binary: bool = False,
+                 outputs: Optional[Dict[str, Dict]] = None):
+        """Open the temporary file.
+
+        Args:
+            output_path: Final output path (including any codec suffix)
+            compression: Output codec ('gzip', 'bz2', 'zstd') or None
+            newline: Newline translation, as for open()
+            binary: Return a binary stream instead of a text handle
+            outputs: Dictionary recording {'sha256', 'contentSize'} by path
+                when the file is published
+        """
+        self.output_path = Path(output_path)
+        self.tmp_path = self.output_path.with_name(self.output_path.name + '.tmp')
+        self.outputs = outputs if outputs is not None else {}
+        self.sha256: Optional[str] = None
+        self.size: Optional[int] = None
+
+        self._writer = HashingWriter(open(self.tmp_path, 'wb', buffering=0))
+        self._buffer = io.BufferedWriter(self._writer, self.BUFFER_BYTES)
+        if compression == 'gzip':
+            # Name the gzip header after the published file, as gzip.open would
+            stream = gzip.GzipFile(filename=str(self.output_path), mode='wb', compresslevel=6,
+                                   fileobj=self._buffer)
+        elif compression == 'bz2':
+            stream = bz2.BZ2File(self._buffer, 'wb')
+        elif compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                self._abort_open()
+                raise ImportError("zstd output requires zstandard (pip install zstandard)")
+            stream = zstandard.ZstdCompressor(threads=-1).stream_writer(self._buffer, closefd=False)
+        elif compression:
+            self._abort_open()
+            raise ValueError(f"Unsupported output compression: {compression}")
+        else:
+            stream = self._buffer
+        self.handle = stream if binary else io.TextIOWrapper(stream, newline=newline)
+
+    def __enter__(self) -> IO:
+        return self.handle
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def close(self) -> None:
+        """Flush, publish the file under its final name and record its checksum."""
+        if self.sha256 is not None:
+            return
+        self.handle.close()
+        if not self._buffer.closed:
+            self._buffer.close()
+        self._writer.raw.close()
+        os.replace(self.tmp_path, self.output_path)
+        self.sha256 = self._writer.sha256.hexdigest()
+        self.size = self._writer.bytes_written
+        self.outputs[str(self.output_path)] = {'sha256': self.sha256, 'contentSize': self.size}
+
+    def discard(self) -> None:
+        """Close and delete the temporary file without publishing it."""
+        try:
+            self.handle.close()
+        except (OSError, ValueError):
+            pass
+        self._abort_open()
+
+    def _abort_open(self) -> None:
+        self._writer.raw.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+class OMOPConstraintSpec:
+    """Indexes, primary keys and foreign keys of the OMOP CDM 5.4 specification.
+
+    Parsed from the SQL Server scripts shipped under docs/OMOP CDM specs 5.4;
+    table names are upper-cased and column names lower-cased to match the
+    converter's output.
+    """
+
+    SPEC_DIR = SPEC_DIR
+    INDICES_FILE = 'OMOPCDM_sql_server_5.4_indices.sql'
+    PRIMARY_KEYS_FILE = 'OMOPCDM_sql_server_5.4_primary_keys.sql'
+    CONSTRAINTS_FILE = 'OMOPCDM_sql_server_5.4_constraints.sql'
+
+    INDEX_PATTERN = re.compile(
+        r'^CREATE\s+(CLUSTERED\s+)?INDEX\s+(\w+)\s+ON\s+@cdmDatabaseSchema\.(\w+)\s*\(([^)]*)\);', re.MULTILINE
+    )
+    PRIMARY_KEY_PATTERN = re.compile(
+        r'^ALTER\s+TABLE\s+@cdmDatabaseSchema\.(\w+)\s+ADD\s+CONSTRAINT\s+(\w+)\s+'
+        r'PRIMARY\s+KEY\s+(?:NONCLUSTERED\s+)?\(([^)]*)\);', re.MULTILINE
+    )
+    FOREIGN_KEY_PATTERN = re.compile(
+        r'^ALTER\s+TABLE\s+@cdmDatabaseSchema\.(\w+)\s+ADD\s+CONSTRAINT\s+(\w+)\s+'
+        r'FOREIGN\s+KEY\s+\(([^)]*)\)\s+REFERENCES\s+@cdmDatabaseSchema\.(\w+)\s*\(([^)]*)\);', re.MULTILINE
+    )
+
+    def __init__(self, spec_dir: Optional[Path] = None):
+        """Initialize specification.
+
+        Args:
+            spec_dir: Directory with the CDM SQL scripts (default: the repo's
+                docs/OMOP CDM specs 5.4); missing scripts leave it empty
+        """
+        self.spec_dir = Path(spec_dir) if spec_dir else self.SPEC_DIR
+        self.indexes: Dict[str, List[Dict]] = {}
+        self.primary_keys: Dict[str, Dict] = {}
+        self.foreign_keys: Dict[str, List[Dict]] = {}
+
+        for clustered, name, table, columns in self.INDEX_PATTERN.findall(self._read(self.INDICES_FILE)):
+            self.indexes.setdefault(table.upper(), []).append({
+                'name': name,
+                'columns': self._columns(columns),
+                'clustered': bool(clustered)
+            })
+        for table, name, columns in self.PRIMARY_KEY_PATTERN.findall(self._read(self.PRIMARY_KEYS_FILE)):
+            self.primary_keys[table.upper()] = {'name': name, 'columns': self._columns(columns)}
+        for table, name, columns, ref_table, ref_columns in self.FOREIGN_KEY_PATTERN.findall(
+                self._read(self.CONSTRAINTS_FILE)):
+            self.foreign_keys.setdefault(table.upper(), []).append({
+                'name': name,
+                'columns': self._columns(columns),
+                'ref_table': ref_table.upper(),
+                'ref_columns': self._columns(ref_columns)
+            })
+
+    def _read(self, file_name: str) -> str:
+        """Read a specification script, or nothing if it is missing."""
+        path = self.spec_dir / file_name
+        return path.read_text() if path.exists() else ''
+
+    @staticmethod
+    def _columns(columns: str) -> List[str]:
+        """Parse an index or key column list, dropping sort orders."""
+        return [column.split()[0].lower() for column in columns.split(',') if column.strip()]
+
+
+class OMOPExporter:
+    """Export data to OMOP CDM format."""
+
+    OMOP_DATA_TYPES = {
+        'sc:Integer': 'INTEGER',
+        'sc:Float': 'FLOAT',
+        'sc:Text': 'VARCHAR(255)',
+        'sc:Date': 'DATE',
+        'sc:DateTime': 'TIMESTAMP',
+        'sc:Boolean': 'BOOLEAN'
+    }
+
+    # Rows per multi-row INSERT statement
+    INSERT_BATCH_SIZE = 100
+
+    # Rows formatted at a time when generating INSERT statements
+    INSERT_FORMAT_BLOCK_ROWS = 65536
+
+    # Bulk-load data files per SQL dialect: PostgreSQL COPY and MySQL LOAD DATA
+    # read tab-separated text with backslash escapes and \N for NULL; the
+    # SQLite shell's .import reads CSV, where NULL can only be an empty field
+    BULK_FILE_SUFFIXES = {'postgresql': '.tsv', 'mysql': '.tsv', 'sqlite': '_import.csv'}
+    BULK_TEXT_ESCAPES = [('\\', '\\\\'), ('\t', '\\t'), ('\n', '\\n'), ('\r', '\\r')]
+    DECOMPRESS_COMMANDS = {'gzip': 'gzip -dc', 'bz2': 'bzip2 -dc', 'zstd': 'zstd -dc'}
+
+    # File suffixes of the output compression codecs
+    COMPRESSION_SUFFIXES = {'gzip': '.gz', 'bz2': '.bz2', 'zstd': '.zst'}
+
+    # encodingFormat of output files by suffix, and the marker added for each
+    # codec (recognized by DataExtractor.detect_compression)
+    ENCODING_FORMATS = {
+        '.csv': 'text/csv',
+        '.tsv': 'text/tab-separated-values',
+        '.sql': 'application/sql',
+        '.parquet': 'application/x-parquet',
+        '.json': 'application/json'
+    }
+    COMPRESSION_FORMATS = {'gzip': 'gzip', 'bz2': 'bzip2', 'zstd': 'zstd'}
+
+    # Dialect spellings of the SQL types of table schemas (unlisted types are
+    # used as-is): MySQL FLOAT is single precision and its TIMESTAMP ends in
+    # 2038, and SQLite declares storage classes
+    DIALECT_DATA_TYPES = {
+        'postgresql': {},
+        'mysql': {'FLOAT': 'DOUBLE', 'TIMESTAMP': 'DATETIME'},
+        'sqlite': {'FLOAT': 'REAL', 'VARCHAR(255)': 'TEXT', 'DATE': 'TEXT', 'TIMESTAMP': 'TEXT',
+                   'BOOLEAN': 'INTEGER'}
+    }
+
+    # Scripts run after loading, in order: primary keys before the indexes
+    # and foreign keys that rely on them
+    POST_LOAD_SCRIPTS = ['primary_keys', 'indices', 'constraints']
+
+    # Arrow types for the SQL types of table schemas (Parquet output)
+    ARROW_DATA_TYPES = {
+        'INTEGER': pa.int64(),
+        'FLOAT': pa.float64(),
+        'VARCHAR(255)': pa.string(),
+        'DATE': pa.date32(),
+        'TIMESTAMP': pa.timestamp('us'),
+        'BOOLEAN': pa.bool_()
+    } if pa is not None else {}
+
+    def __init__(self, spec: Optional[OMOPConstraintSpec] = None):
+        """Initialize exporter.
+
+        Args:
+            spec: CDM indexes and keys for post-load DDL (default: the CDM 5.4
+                specification shipped with the repo)
+        """
+        self.spec = spec if spec is not None else OMOPConstraintSpec()
+        # sha256 and size of the files written, by path
+        self.outputs: Dict[str, Dict] = {}
+
+    def compressed_path(self, output_path: Path, compression: Optional[str] = None) -> Path:
+        """Add the suffix of an output compression codec to a file path.
+
+        Args:
+            output_path: Uncompressed output path
+            compression: Output codec ('gzip', 'bz2', 'zstd') or None
+
+        Returns:
+            Output path, e.g. PERSON.csv.zst
+        """
+        if not compression:
+            return output_path
+        if compression not in self.COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported output compression: {compression}")
+        return output_path.with_name(output_path.name + self.COMPRESSION_SUFFIXES[compression])
+
+    def open_output(self, output_path: Path, compression: Optional[str] = None,
+                    newline: Optional[str] = None, binary: bool = False) -> OutputFile:
+        """Open an output file, compressing and hashing it as it is written.
+
+        zstd output uses a multi-threaded compressor on all cores. The file is
+        published under output_path by atomic rename when closed, and its
+        sha256 and size are recorded in outputs.
+
+        Args:
+            output_path: Output path (including any codec suffix)
+            compression: Output codec ('gzip', 'bz2', 'zstd') or None
+            newline: Newline translation, as for open()
+            binary: Write bytes instead of text
+
+        Returns:
+            OutputFile, a context manager returning the writable handle
+        """
+        return OutputFile(output_path, compression, newline, binary, self.outputs)
+
+    def encoding_format(self, output_path: Union[Path, str]) -> str:
+        """Get the encodingFormat of an output file from its name.
+
+        Args:
+            output_path: Output path, e.g. PERSON.csv.zst
+
+        Returns:
+            MIME type, with '+codec' for compressed files (e.g. 'text/csv+zstd')
+        """
+        path = Path(output_path)
+        compression = next((codec for codec, suffix in self.COMPRESSION_SUFFIXES.items()
+                            if path.suffix == suffix), None)
+        if compression:
+            path = path.with_suffix('')
+        encoding_format = self.ENCODING_FORMATS.get(path.suffix, 'application/octet-stream')
+        if compression:
+            encoding_format += '+' + self.COMPRESSION_FORMATS[compression]
+        return encoding_format
+
+    def write_output(self, output_path: Path, text: str) -> None:
+        """Write a small text file through open_output.
+
+        Args:
+            output_path: Output path
+            text: File contents
+        """
+        with self.open_output(output_path) as f:
+            f.write(text)
+
+    # CSV formats of datetime columns by SQL type; fixed per column, so
+    # chunked and whole-table output agree (pandas drops the time of a
+    # frame whose values are all midnight)
+    CSV_DATETIME_FORMATS = {'DATE': '%Y-%m-%d', 'TIMESTAMP': '%Y-%m-%d %H:%M:%S'}
+
+    def export_csv(self, table_name: str, df: pd.DataFrame, output_path: Union[Path, IO],
+                   header: bool = True, table_schema: Optional[Dict] = None) -> None:
+        """Export table to CSV file.
+
+        Datetime columns are written as dates when the table schema types
+        them DATE, and as timestamps otherwise.
+
+        Args:
+            table_name: OMOP table name
+            df: DataFrame with table data
+            output_path: Output file path or open text handle (for appending chunks)
+            header: Whether to write the header row
+            table_schema: Optional table schema dictionary
+        """
+        sql_types = {field['name']: field['type'] for field in (table_schema or {}).get('fields', [])}
+        formatted = {column: df[column].dt.strftime(
+                         self.CSV_DATETIME_FORMATS.get(sql_types.get(column), self.CSV_DATETIME_FORMATS['TIMESTAMP']))
+                     for column in df.columns if pd.api.types.is_datetime64_any_dtype(df[column])}
+        if formatted:
+            df = df.assign(**formatted)
+        df.to_csv(output_path, index=False, header=header)
+
+    def generate_ddl(self, table_schema: Dict, dialect: str = 'postgresql',
+                     include_constraints: bool = True) -> str:
+        """Generate SQL DDL for table creation.
+
+        Args:
+            table_schema: Table schema dictionary
+            dialect: SQL dialect (postgresql, mysql, sqlite)
+            include_constraints: Declare the primary key inline (otherwise see
+                generate_primary_key_ddl, for adding it after loading data)
+
+        Returns:
+            SQL DDL statement
+        """
+        if dialect not in self.DIALECT_DATA_TYPES:
+            raise ValueError(f"Unsupported SQL dialect: {dialect}")
+        data_types = self.DIALECT_DATA_TYPES[dialect]
+        table_name = table_schema['table_name']
+        fields = table_schema['fields']
+
+        ddl = f"CREATE TABLE {table_name} (\n"
+
+        field_definitions = []
+        primary_keys = []
+
+        for field in fields:
+            field_name = field['name']
+            field_type = field['type']
+            is_nullable = field.get('nullable', True)
+            is_pk = field.get('primary_key', False)
+
+            field_def = f"  {field_name} {data_types.get(field_type, field_type)}"
+            if not is_nullable:
+                field_def += " NOT NULL"
+
+            field_definitions.append(field_def)
+
+            if is_pk:
+                primary_keys.append(field_name)
+
+        ddl += ",\n".join(field_definitions)
+
+        if primary_keys and include_constraints:
+            ddl += f",\n  PRIMARY KEY ({', '.join(primary_keys)})"
+
+        ddl += "\n);"
+
+        return ddl
+
+    def generate_primary_key_ddl(self, table_schema: Dict, dialect: str = 'postgresql') -> List[str]:
+        """Generate statements adding a table's primary key after loading.
+
+        SQLite cannot add constraints to an existing table, so its primary key
+        is enforced by a unique index instead.
+
+        Args:
+            table_schema: Table schema dictionary
+            dialect: SQL dialect (postgresql, mysql, sqlite)
+
+        Returns:
+            SQL statements (empty if the table has no primary key)
+        """
+        table_name = table_schema['table_name']
+        primary_keys = [field['name'] for field in table_schema['fields'] if field.get('primary_key', False)]
+        if not primary_keys:
+            return []
+        name = self.spec.primary_keys.get(table_name.upper(), {}).get('name', f"xpk_{table_name}")
+        if dialect == 'sqlite':
+            return [f"CREATE UNIQUE INDEX {name} ON {table_name} ({', '.join(primary_keys)});"]
+        return [f"ALTER TABLE {table_name} ADD CONSTRAINT {name} PRIMARY KEY ({', '.join(primary_keys)});"]
+
+    def generate_index_ddl(self, table_schema: Dict, dialect: str = 'postgresql') -> List[str]:
+        """Generate the CDM specification's indexes on a table.
+
+        Indexes on columns the table does not have are skipped. PostgreSQL
+        reorders the table along the specification's clustered indexes.
+
+        Args:
+            table_schema: Table schema dictionary
+            dialect: SQL dialect (postgresql, mysql, sqlite)
+
+        Returns:
+            SQL statements
+        """
+        table_name = table_schema['table_name']
+        columns = {field['name'].lower() for field in table_schema['fields']}
+        statements = []
+        for index in self.spec.indexes.get(table_name.upper(), []):
+            if not set(index['columns']) <= columns:
+                continue
+            statements.append(f"CREATE INDEX {index['name']} ON {table_name} ({', '.join(index['columns'])});")
+            if index['clustered'] and dialect == 'postgresql':
+                statements.append(f"CLUSTER {table_name} USING {index['name']};")
+        return statements
+
+    def generate_foreign_key_ddl(self, table_schema: Dict, dialect: str = 'postgresql',
+                                 tables: Optional[List[str]] = None) -> List[str]:
+        """Generate the CDM specification's foreign keys of a table.
+
+        SQLite cannot add constraints to an existing table, so it gets none.
+
+        Args:
+            table_schema: Table schema dictionary
+            dialect: SQL dialect (postgresql, mysql, sqlite)
+            tables: Tables present in the database; foreign keys referencing
+                other tables are skipped (default: keep all)
+
+        Returns:
+            SQL statements
+        """
+        if dialect == 'sqlite':
+            return []
+        table_name = table_schema['table_name']
+        columns = {field['name'].lower() for field in table_schema['fields']}
+        present = {table.upper() for table in tables} if tables is not None else None
+        statements = []
+        for foreign_key in self.spec.foreign_keys.get(table_name.upper(), []):
+            if not set(foreign_key['columns']) <= columns:
+                continue
+            if present is not None and foreign_key['ref_table'] not in present:
+                continue
+            statements.append(
+                f"ALTER TABLE {table_name} ADD CONSTRAINT {foreign_key['name']} "
+                f"FOREIGN KEY ({', '.join(foreign_key['columns'])}) "
+                f"REFERENCES {foreign_key['ref_table']} ({', '.join(foreign_key['ref_columns'])});"
+            )
+        return statements
+
+    def generate_post_load_scripts(self, table_schemas: List[Dict], dialect: str = 'postgresql',
+                                   include_primary_keys: bool = True) -> Dict[str, str]:
+        """Generate the scripts run once the tables are loaded.
+
+        Loading into bare tables and building keys and indexes afterwards is
+        much faster than maintaining them row by row during the load.
+
+        Args:
+            table_schemas: Schemas of the loaded tables
+            dialect: SQL dialect (postgresql, mysql, sqlite)
+            include_primary_keys: Add primary keys (disable when the DDL
+                already declares them)
+
+        Returns:
+            Script text by file name, in the order to run them; empty scripts
+            are left out
+        """
+        tables = [table_schema['table_name'] for table_schema in table_schemas]
+        statements = {script: [] for script in self.POST_LOAD_SCRIPTS}
+        for table_schema in table_schemas:
+            if include_primary_keys:
+                statements['primary_keys'] += self.generate_primary_key_ddl(table_schema, dialect)
+            statements['indices'] += self.generate_index_ddl(table_schema, dialect)
+            statements['constraints'] += self.generate_foreign_key_ddl(table_schema, dialect, tables)
+
+        return OrderedDict(
+            (f"omop_{script}_{dialect}.sql", '\n'.join(statements[script]) + '\n')
+            for script in self.POST_LOAD_SCRIPTS if statements[script]
+        )
+
+    def generate_insert_statements(self, table_name: str, df: pd.DataFrame,
+                                   batch_size: int = INSERT_BATCH_SIZE) -> List[str]:
+        """Generate SQL INSERT statements.
+
+        Args:
+            table_name: OMOP table name
+            df: DataFrame with table data
+            batch_size: Number of rows per INSERT statement
+
+        Returns:
+            List of SQL INSERT statements
+        """
+        return list(self.iter_insert_statements(table_name, df, batch_size))
+
+    def iter_insert_statements(self, table_name: str, df: pd.DataFrame,
+                               batch_size: int = INSERT_BATCH_SIZE) -> Iterator[str]:
+        """Generate SQL INSERT statements lazily.
+
+        Literals are formatted column by column over blocks of rows, so memory
+        is bounded by the block rather than the table.
+
+        Args:
+            table_name: OMOP table name
+            df: DataFrame with table data
+            batch_size: Number of rows per INSERT statement
+
+        Yields:
+            SQL INSERT statements of up to batch_size rows
+        """
+        columns = ', '.join(df.columns)
+        prefix = f"INSERT INTO {table_name} ({columns}) VALUES\n  "
+        block_rows = batch_size * max(1, self.INSERT_FORMAT_BLOCK_ROWS // batch_size)
+
+        for block_start in range(0, len(df), block_rows):
+            values = self.format_sql_rows(df.iloc[block_start:block_start + block_rows])
+            for i in range(0, len(values), batch_size):
+                yield prefix + ",\n  ".join(values[i:i + batch_size]) + ";"
+
+    def write_insert_statements(self, table_name: str, df: pd.DataFrame, output: IO,
+                                batch_size: int = INSERT_BATCH_SIZE,
+                                statements_written: bool = False) -> bool:
+        """Stream SQL INSERT statements to an open file.
+
+        Statements are separated by a blank line, as in a file of
+        generate_insert_statements joined by blank lines.
+
+        Args:
+            table_name: OMOP table name
+            df: DataFrame with table data
+            output: Open text handle
+            batch_size: Number of rows per INSERT statement
+            statements_written: Whether statements were already written to the handle
+
+        Returns:
+            Whether any statements have been written to the handle
+        """
+        for statement in self.iter_insert_statements(table_name, df, batch_size):
+            if statements_written:
+                output.write('\n\n')
+            output.write(statement)
+            statements_written = True
+        return statements_written
+
+    def format_sql_rows(self, df: pd.DataFrame) -> List[str]:
+        """Format rows as parenthesized SQL value lists.
+
+        Values are rendered as they were when rows were formatted one at a
+        time: a frame whose columns share a numeric type (e.g. int64 and
+        float64 columns) renders every value in that common type.
+
+        Args:
+            df: DataFrame with table data
+
+        Returns:
+            One '(v1, v2, ...)' string per row
+        """
+        values = df.values
+        if values.dtype != object:
+            columns = [pd.Series(values[:, j]) for j in range(values.shape[1])]
+        else:
+            columns = [df.iloc[:, j] for j in range(len(df.columns))]
+        literals = [self.format_sql_literals(column) for column in columns]
+        return [f"({', '.join(row)})" for row in zip(*literals)]
+
+    def format_sql_literals(self, column: pd.Series) -> np.ndarray:
+        """Format a column as SQL literals.
+
+        NULLs, quoting and escaping are applied to the whole column at once;
+        object columns mixing value types fall back to format_sql_value.
+
+        Args:
+            column: Column of table data
+
+        Returns:
+            Object array of SQL literal strings
+        """
+        null = column.isna().to_numpy()
+        literals = np.full(len(column), 'NULL', dtype=object)
+        values = column[~null]
+        if values.empty:
+            return literals
+
+        if pd.api.types.is_datetime64_any_dtype(column):
+            literals[~null] = self._format_datetime_literals(values)
+        elif pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+            literals[~null] = values.astype(str).to_numpy(dtype=object)
+        elif pd.api.types.infer_dtype(values, skipna=False) == 'string':
+            escaped = values.astype(str).str.replace("'", "''", regex=False)
+            literals[~null] = ("'" + escaped + "'").to_numpy(dtype=object)
+        else:
+            literals[~null] = values.map(self.format_sql_value).to_numpy(dtype=object)
+        return literals
+
+    def format_sql_value(self, value: Any) -> str:
+        """Format a single value as an SQL literal.
+
+        Args:
+            value: Cell value
+
+        Returns:
+            SQL literal
+        """
+        if pd.isna(value):
+            return 'NULL'
+        if isinstance(value, datetime):
+            return f"'{self.format_datetime(value)}'"
+        if isinstance(value, str):
+            return "'" + value.replace("'", "''") + "'"
+        return str(value)
+
+    def _format_datetime_literals(self, values: pd.Series) -> np.ndarray:
+        """Format non-null datetime values as quoted SQL literals.
+
+        Args:
+            values: Non-null datetime64 column values
+
+        Returns:
+            Object array of SQL literal strings, as format_datetime would render them
+        """
+        return ("'" + self.format_datetime_text(values) + "'").to_numpy(dtype=object)
+
+    def format_datetime_text(self, values: pd.Series) -> pd.Series:
+        """Format non-null datetime values with format_datetime, column-wise.
+
+        Args:
+            values: Non-null datetime64 column values
+
+        Returns:
+            Series of ISO date or timestamp strings
+        """
+        if values.dt.tz is not None:
+            return values.map(self.format_datetime)
+
+        midnight = ((values.dt.hour == 0) & (values.dt.minute == 0) & (values.dt.second == 0)
+                    & (values.dt.microsecond == 0))
+        text = values.dt.strftime('%Y-%m-%d %H:%M:%S')
+        text[midnight] = values[midnight].dt.strftime('%Y-%m-%d')
+        fractional = ~midnight & ((values.dt.microsecond != 0) | (values.dt.nanosecond != 0))
+        if fractional.any():
+            text[fractional] = values[fractional].map(self.format_datetime)
+        return text
+
+    def bulk_file_name(self, table_name: str, dialect: str = 'postgresql') -> str:
+        """Get the bulk-load data file name of a table.
+
+        Args:
+            table_name: OMOP table name
+            dialect: SQL dialect (postgresql, mysql, sqlite)
+
+        Returns:
+            File name, e.g. PERSON.tsv
+        """
+        if dialect not in self.BULK_FILE_SUFFIXES:
+            raise ValueError(f"Unsupported SQL dialect: {dialect}")
+        return f"{table_name}{self.BULK_FILE_SUFFIXES[dialect]}"
+
+    def export_bulk(self, table_name: str, df: pd.DataFrame, output: IO,
+                    dialect: str = 'postgresql', table_schema: Optional[Dict] = None) -> List[str]:
+        """Write table data as a bulk-load data file.
+
+        PostgreSQL and MySQL get tab-separated text in COPY text format
+        (backslash-escaped, \\N for NULL); SQLite gets headerless CSV for
+        the shell's .import. Booleans are written as 1/0 and float columns
+        typed INTEGER in the table schema as integers.
+
+        Args:
+            table_name: OMOP table name
+            df: DataFrame with table data
+            output: Open text handle (opened with newline='')
+            dialect: SQL dialect (postgresql, mysql, sqlite)
+            table_schema: Optional table schema dictionary
+
+        Returns:
+            Columns containing NULLs
+        """
+        if dialect not in self.BULK_FILE_SUFFIXES:
+            raise ValueError(f"Unsupported SQL dialect: {dialect}")
+        sql_types = {field['name']: field['type'] for field in (table_schema or {}).get('fields', [])}
+        separator = ',' if dialect == 'sqlite' else '\t'
+
+        for block_start in range(0, len(df), self.INSERT_FORMAT_BLOCK_ROWS):
+            block = df.iloc[block_start:block_start + self.INSERT_FORMAT_BLOCK_ROWS]
+            columns = [self.format_bulk_values(block[column], dialect, sql_types.get(column))
+                       for column in block.columns]
+            output.write(''.join(separator.join(row) + '\n' for row in zip(*columns)))
+        return [column for column in df.columns if df[column].isna().any()]
+
+    def format_bulk_values(self, column: pd.Series, dialect: str = 'postgresql',
+                           sql_type: Optional[str] = None) -> np.ndarray:
+        """Format a column for a bulk-load data file.
+
+        Args:
+            column: Column of table data
+            dialect: SQL dialect (postgresql, mysql, sqlite)
+            sql_type: SQL type of the column in the table schema
+
+        Returns:
+            Object array of field strings
+        """
+        null = column.isna().to_numpy()
+        fields = np.full(len(column), '' if dialect == 'sqlite' else '\\N', dtype=object)
+        values = column[~null]
+        if values.empty:
+            return fields
+
+        if pd.api.types.is_datetime64_any_dtype(column):
+            fields[~null] = self.format_datetime_text(values).to_numpy(dtype=object)
+            return fields
+        if pd.api.types.is_bool_dtype(column):
+            fields[~null] = np.where(values.to_numpy(dtype=bool), '1', '0')
+            return fields
+        if pd.api.types.is_float_dtype(column) and sql_type == 'INTEGER' and (values % 1 == 0).all():
+            values = values.astype('int64')
+        if pd.api.types.is_numeric_dtype(values):
+            fields[~null] = values.astype(str).to_numpy(dtype=object)
+            return fields
+
+        text = values.map(lambda value: self.format_datetime(value) if isinstance(value, datetime) else str(value))
+        if dialect == 'sqlite':
+            needs_quotes = text.str.contains('[,"\r\n]', regex=True)
+            text = text.where(~needs_quotes, '"' + text.str.replace('"', '""', regex=False) + '"')
+        else:
+            for char, escape in self.BULK_TEXT_ESCAPES:
+                text = text.str.replace(char, escape, regex=False)
+        fields[~null] = text.to_numpy(dtype=object)
+        return fields
+
+    def generate_load_script(self, tables: List[Dict], dialect: str = 'postgresql',
+                             compression: Optional[str] = None,
+                             post_load_files: Optional[List[str]] = None) -> str:
+        """Generate a script bulk-loading tables written by export_bulk.
+
+        The script creates each table from its DDL file and loads its data
+        file with COPY (psql \\copy), LOAD DATA LOCAL INFILE or .import,
+        then runs the post-load scripts. File paths are relative, so it runs
+        from the output directory.
+
+        Args:
+            tables: Dicts with table_name, columns, ddl_file, data_file and
+                null_columns (columns with NULLs, which .import cannot express)
+            dialect: SQL dialect (postgresql, mysql, sqlite)
+            compression: Codec of the data files (PostgreSQL only)
+            post_load_files: Key and index scripts to run after loading, in order
+
+        Returns:
+            Load script text
+        """
+        if compression and dialect != 'postgresql':
+            raise ValueError(f"Compressed bulk-load files are only supported for postgresql, not {dialect}")
+
+        if dialect == 'postgresql':
+            lines = ["-- Bulk load of OMOP CDM tables",
+                     f"-- Run from this directory: psql -v ON_ERROR_STOP=1 -d <database> -f load_{dialect}.sql",
+                     "BEGIN;"]
+            for table in tables:
+                columns = ', '.join(table['columns'])
+                if compression:
+                    source = f"PROGRAM '{self.DECOMPRESS_COMMANDS[compression]} {table['data_file']}'"
+                else:
+                    source = f"'{table['data_file']}'"
+                lines += [f"\\i {table['ddl_file']}",
+                          f"\\copy {table['table_name']} ({columns}) FROM {source}"]
+            lines += [f"\\i {file_name}" for file_name in post_load_files or []]
+            lines.append("COMMIT;")
+        elif dialect == 'mysql':
+            lines = ["-- Bulk load of OMOP CDM tables",
+                     f"-- Run from this directory: mysql --local-infile=1 <database> < load_{dialect}.sql",
+                     "SET unique_checks = 0;",
+                     "SET foreign_key_checks = 0;"]
+            for table in tables:
+                columns = ', '.join(table['columns'])
+                lines += [f"SOURCE {table['ddl_file']};",
+                          f"LOAD DATA LOCAL INFILE '{table['data_file']}' INTO TABLE {table['table_name']}",
+                          "  CHARACTER SET utf8mb4",
+                          "  FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'",
+                          "  LINES TERMINATED BY '\\n'",
+                          f"  ({columns});"]
+            lines += [f"SOURCE {file_name};" for file_name in post_load_files or []]
+            lines += ["SET foreign_key_checks = 1;",
+                      "SET unique_checks = 1;"]
+        elif dialect == 'sqlite':
+            lines = ["-- Bulk load of OMOP CDM tables",
+                     f"-- Run from this directory: sqlite3 <database> < load_{dialect}.sql",
+                     "PRAGMA synchronous = OFF;",
+                     "BEGIN;",
+                     ".mode csv"]
+            for table in tables:
+                lines += [f".read {table['ddl_file']}",
+                          f".import {table['data_file']} {table['table_name']}"]
+                # .import cannot express NULL: restore it from empty fields
+                lines += [f"UPDATE {table['table_name']} SET {column} = NULL WHERE {column} = '';"
+                          for column in table.get('null_columns', table['columns'])]
+            lines += [f".read {file_name}" for file_name in post_load_files or []]
+            lines.append("COMMIT;")
+        else:
+            raise ValueError(f"Unsupported SQL dialect: {dialect}")
+
+        return '\n'.join(lines) + '\n'
+
+    def format_datetime(self, value: datetime) -> str:
+        """Format a parsed date or timestamp as an SQL literal body.
+
+        Args:
+            value: Date or timestamp value
+
+        Returns:
+            ISO date for midnight values, ISO timestamp otherwise
+        """
+        if (value.hour, value.minute, value.second, value.microsecond) == (0, 0, 0, 0):
+            return value.strftime('%Y-%m-%d')
+        return value.isoformat(sep=' ')
+
+    def map_datatype(self, bio_datatype: str) -> str:
+        """Map Bio-Croissant datatype to SQL datatype.
+
+        Args:
+            bio_datatype: Bio-Croissant datatype
+
+        Returns:
+            SQL datatype
+        """
+        return self.OMOP_DATA_TYPES.get(bio_datatype, 'VARCHAR(255)')
+
+    def arrow_schema(self, table_schema: Dict, df: pd.DataFrame) -> Any:
+        """Build the Arrow schema for an OMOP table.
+
+        Columns described by the table schema get the Arrow type of their SQL
+        type; other columns keep the type inferred from the data.
+
+        Args:
+            table_schema: Table schema dictionary
+            df: DataFrame with table data
+
+        Returns:
+            pyarrow Schema in DataFrame column order
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet output")
+
+        sql_types = {field['name']: field['type'] for field in table_schema['fields']}
+        arrow_fields = []
+        for column in df.columns:
+            if column in sql_types:
+                arrow_type = self.ARROW_DATA_TYPES.get(sql_types[column], pa.string())
+            else:
+                arrow_type = pa.array(df[column], from_pandas=True).type
+                if pa.types.is_null(arrow_type) or pa.types.is_large_string(arrow_type):
+                    arrow_type = pa.string()
+            arrow_fields.append(pa.field(column, arrow_type))
+        return pa.schema(arrow_fields)
+
+    def to_arrow_table(self, df: pd.DataFrame, schema: Any) -> Any:
+        """Convert table data to an Arrow table with the given schema.
+
+        Args:
+            df: DataFrame with table data
+            schema: pyarrow Schema from arrow_schema
+
+        Returns:
+            pyarrow Table
+        """
+        arrays = []
+        for arrow_field in schema:
+            array = pa.array(df[arrow_field.name], from_pandas=True)
+            if array.type != arrow_field.type:
+                # Timestamps parsed by pandas carry nanoseconds; dates drop the time
+                temporal = pa.types.is_temporal(arrow_field.type)
+                array = array.cast(arrow_field.type, safe=not temporal)
+            arrays.append(array)
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def open_parquet_writer(self, output_path: Path, table_schema: Dict,
+                            compression: str = 'snappy',
+                            row_group_size: Optional[int] = None,
+                            partition_by: Optional[str] = None,
+                            buckets: Optional[int] = None,
+                            buffer_rows: Optional[int] = None) -> 'ParquetTableWriter':
+        """Open a writer streaming an OMOP table to Parquet.
+
+        Args:
+            output_path: Parquet file, or dataset directory when partitioning
+            table_schema: Table schema dictionary
+            compression: Parquet compression codec (snappy, zstd, gzip, none, ...)
+            row_group_size: Maximum rows per row group (default: pyarrow default)
+            partition_by: Column to write Hive-style partitions on
+            buckets: Hash the partition column into this many buckets
+            buffer_rows: Rows buffered before partitioned output is written
+
+        Returns:
+            ParquetTableWriter (usable as a context manager)
+        """
+        return ParquetTableWriter(self, output_path, table_schema, compression,
+                                  row_group_size, partition_by, buckets, buffer_rows)
+
+
+class TableWriter:
+    """Stream chunks of one OMOP table to one output format.
+
+    A writer is opened on the table's first chunk, gets every chunk through
+    write and publishes its output on close. Used as a context manager, it
+    discards the partial output of a failed conversion instead.
+    """
+
+    # Table schema the output declares (DDL or database table), if any
+    declared_schema: Optional[Dict] = None
+
+    # Bulk-load file entry for the load script, if any
+    load: Optional[Dict] = None
+
+    def __init__(self):
+        # Files and directories the writer publishes
+        self.output_paths: List[Path] = []
+
+    def __enter__(self) -> 'TableWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append a chunk of table data.
+
+        Args:
+            df: DataFrame with table data
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Finish and publish the output."""
+        raise NotImplementedError
+
+    def discard(self) -> None:
+        """Delete the partial output of a failed write."""
+        raise NotImplementedError
+
+
+class ParquetTableWriter(TableWriter):
+    """Stream chunks of one OMOP table to a Parquet file or Hive-partitioned dataset.
+
+    Output is written under a temporary name and published by rename on
+    close, with the sha256 and size of each file recorded in the exporter's
+    outputs. Partitioned output is buffered up to buffer_rows rows and
+    written sorted on the partition column, so each flush writes one file
+    per partition however small the chunks are.
+    """
+
+    # Rows buffered before partitioned output is written
+    PARTITION_BUFFER_ROWS = 1_000_000
+
+    # Dataset files pyarrow keeps open at once while writing partitions
+    MAX_OPEN_FILES = 1024
+
+    def __init__(self, exporter: OMOPExporter, output_path: Path, table_schema: Dict,
+                 compression: str = 'snappy', row_group_size: Optional[int] = None,
+                 partition_by: Optional[str] = None, buckets: Optional[int] = None,
+                 buffer_rows: Optional[int] = None):
+        """Initialize writer.
+
+        Args:
+            exporter: Exporter providing the Arrow type mapping
+            output_path: Parquet file, or dataset directory when partitioning
+            table_schema: Table schema dictionary
+            compression: Parquet compression codec
+            row_group_size: Maximum rows per row group
+            partition_by: Column to write Hive-style partitions on
+            buckets: Hash the partition column into this many buckets
+            buffer_rows: Rows buffered before partitioned output is written
+                (default: PARTITION_BUFFER_ROWS)
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet output")
+
+        super().__init__()
+        self.exporter = exporter
+        self.output_path = Path(output_path)
+        self.output_paths.append(self.output_path)
+        self.table_schema = table_schema
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.partition_by = partition_by
+        self.buckets = buckets
+        self.buffer_rows = buffer_rows or self.PARTITION_BUFFER_ROWS
+        self.schema = None
+        self._writer = None
+        self._output: Optional[OutputFile] = None
+        self._parts = 0
+        # Partitioned chunks not yet written, and their row count
+        self._buffer: List[Any] = []
+        self._buffered_rows = 0
+        self.tmp_path = self.output_path.with_name(self.output_path.name + '.tmp')
+        # Files written to the partitioned dataset, relative to its directory
+        self._dataset_files: Dict[str, Dict] = {}
+
+        if partition_by:
+            # Dataset files are named per flush; start from an empty directory
+            if self.tmp_path.is_dir():
+                shutil.rmtree(self.tmp_path)
+            self.tmp_path.mkdir(parents=True)
+
+    @property
+    def partition_column(self) -> Optional[str]:
+        """Name of the Hive partition column, if partitioning."""
+        if self.partition_by and self.buckets:
+            return f"{self.partition_by}_bucket"
+        return self.partition_by
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append a chunk of table data.
+
+        Args:
+            df: DataFrame with table data
+        """
+        if self.partition_by:
+            if self.partition_by not in df.columns:
+                raise ValueError(f"Partition column {self.partition_by} not in table data")
+            df = self._add_bucket_column(df)
+        if self.schema is None:
+            self.schema = self.exporter.arrow_schema(self.table_schema, df)
+        table = self.exporter.to_arrow_table(df, self.schema)
+
+        if not self.partition_by:
+            if self._writer is None:
+                self._output = self.exporter.open_output(self.output_path, binary=True)
+                self._writer = pq.ParquetWriter(self._output.handle, self.schema, compression=self.compression)
+            self._writer.write_table(table, row_group_size=self.row_group_size)
+            return
+
+        if table.num_rows == 0:
+            return
+        self._buffer.append(table)
+        self._buffered_rows += table.num_rows
+        if self._buffered_rows >= self.buffer_rows:
+            self._flush_partitions()
+
+    def _flush_partitions(self) -> None:
+        """Write the buffered chunks to the partitioned dataset.
+
+        Rows are stably sorted on the partition column, so each partition is
+        written in one run and its file is never closed and reopened when
+        there are more partitions than MAX_OPEN_FILES. max_partitions is set
+        to the number of partitions present, lifting pyarrow's default limit
+        of 1024.
+        """
+        if not self._buffer:
+            return
+        table = pa.concat_tables(self._buffer).sort_by(self.partition_column)
+        self._buffer = []
+        self._buffered_rows = 0
+
+        partitioning = pa_dataset.partitioning(
+            pa.schema([self.schema.field(self.partition_column)]), flavor='hive'
+        )
+        write_options = pa_dataset.ParquetFileFormat().make_write_options(compression=self.compression)
+        row_group_options = {}
+        if self.row_group_size:
+            row_group_options['max_rows_per_group'] = self.row_group_size
+            row_group_options['min_rows_per_group'] = self.row_group_size
+        pa_dataset.write_dataset(
+            table, self.tmp_path, format='parquet', partitioning=partitioning,
+            file_options=write_options, basename_template=f"part-{self._parts:05d}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore', file_visitor=self._record_dataset_file,
+            max_partitions=max(len(table.column(self.partition_column).unique()), 1),
+            max_open_files=self.MAX_OPEN_FILES, **row_group_options
+        )
+        self._parts += 1
+
+    def close(self) -> None:
+        """Finish the Parquet file, or publish the dataset directory."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._output.close()
+        elif self.partition_by and self.tmp_path.is_dir():
+            self._flush_partitions()
+            if self.output_path.is_dir():
+                shutil.rmtree(self.output_path)
+            os.replace(self.tmp_path, self.output_path)
+            for relative_path, entry in self._dataset_files.items():
+                self.exporter.outputs[str(self.output_path / relative_path)] = entry
+
+    def discard(self) -> None:
+        """Delete the partial output of a failed write."""
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except (OSError, ValueError):
+                pass
+            self._writer = None
+            self._output.discard()
+        elif self.partition_by and self.tmp_path.is_dir():
+            self._buffer = []
+            shutil.rmtree(self.tmp_path)
+
+    def _record_dataset_file(self, written_file: Any) -> None:
+        """Checksum a dataset file just written by pyarrow.
+
+        pyarrow writes dataset files itself, so each one is hashed right after
+        it is closed, while its pages are still cached.
+
+        Args:
+            written_file: pyarrow WrittenFile
+        """
+        path = Path(written_file.path)
+        with open(path, 'rb') as f:
+            sha256 = hashlib.file_digest(f, 'sha256').hexdigest()
+        self._dataset_files[str(path.relative_to(self.tmp_path))] = {
+            'sha256': sha256,
+            'contentSize': path.stat().st_size
+        }
+
+    def _add_bucket_column(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add the bucket column derived from the partition column.
+
+        Integer keys are bucketed by modulo so readers can compute the bucket
+        of a key; other keys are hashed.
+
+        Args:
+            df: DataFrame with table data
+
+        Returns:
+            DataFrame with the bucket column added (unchanged without buckets)
+        """
+        if not self.buckets:
+            return df
+        keys = df[self.partition_by]
+        if pd.api.types.is_integer_dtype(keys):
+            bucket = keys % self.buckets
+        else:
+            bucket = pd.Series(
+                pd.util.hash_pandas_object(keys, index=False).to_numpy() % np.uint64(self.buckets),
+                index=df.index
+            ).astype('Int64').mask(keys.isna())
+        return df.assign(**{self.partition_column: bucket.astype('Int64')})
+
+
+class CSVTableWriter(TableWriter):
+    """Stream chunks of one OMOP table to a CSV file."""
+
+    def __init__(self, exporter: OMOPExporter, output_path: Path, table_schema: Dict,
+                 compression: Optional[str] = None):
+        """Open the CSV file.
+
+        Args:
+            exporter: Exporter formatting the rows
+            output_path: CSV file (including any codec suffix)
+            table_schema: Table schema dictionary, typing datetime columns
+            compression: Output codec ('gzip', 'bz2', 'zstd') or None
+        """
+        super().__init__()
+        self.exporter = exporter
+        self.table_schema = table_schema
+        self._output = exporter.open_output(output_path, compression, newline='')
+        self._header = True
+        self.output_paths.append(Path(output_path))
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append a chunk of table data.
+
+        Args:
+            df: DataFrame with table data
+        """
+        self.exporter.export_csv(self.table_schema['table_name'], df, self._output.handle,
+                                 header=self._header, table_schema=self.table_schema)
+        self._header = False
+
+    def close(self) -> None:
+        """Publish the output file."""
+        self._output.close()
+
+    def discard(self) -> None:
+        """Delete the partial output of a failed write."""
+        self._output.discard()
+
+
+class SQLTableWriter(TableWriter):
+    """Stream chunks of one OMOP table to a DDL file and a file of INSERT statements.
+
+    Rows are held back between chunks so INSERT batches do not break at
+    chunk boundaries.
+    """
+
+    def __init__(self, exporter: OMOPExporter, ddl_path: Path, insert_path: Path, table_schema: Dict,
+                 dialect: str = 'postgresql', compression: Optional[str] = None,
+                 batch_size: int = OMOPExporter.INSERT_BATCH_SIZE):
+        """Write the DDL and open the INSERT file.
+
+        Args:
+            exporter: Exporter generating the SQL
+            ddl_path: DDL file (including any codec suffix)
+            insert_path: INSERT statement file (including any codec suffix)
+            table_schema: Table schema dictionary
+            dialect: SQL dialect (postgresql, mysql, sqlite)
+            compression: Output codec ('gzip', 'bz2', 'zstd') or None
+            batch_size: Rows per multi-row INSERT statement
+        """
+        super().__init__()
+        self.exporter = exporter
+        self.declared_schema = table_schema
+        self.batch_size = batch_size
+        with exporter.open_output(ddl_path, compression) as f:
+            f.write(exporter.generate_ddl(table_schema, dialect))
+        self._output = exporter.open_output(insert_path, compression)
+        self._pending_rows: Optional[pd.DataFrame] = None
+        self._statements_written = False
+        self.output_paths.extend([Path(ddl_path), Path(insert_path)])
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append a chunk of table data.
+
+        Args:
+            df: DataFrame with table data
+        """
+        # Write INSERT statements for complete batches
+        if self._pending_rows is not None:
+            df = pd.concat([self._pending_rows, df], ignore_index=True)
+        complete = len(df) - len(df) % self.batch_size
+        self._pending_rows = df.iloc[complete:]
+        self._statements_written = self.exporter.write_insert_statements(
+            self.declared_schema['table_name'], df.iloc[:complete], self._output.handle, self.batch_size,
+            self._statements_written
+        )
+
+    def close(self) -> None:
+        """Write the rows held back and publish the INSERT file."""
+        if self._pending_rows is not None and len(self._pending_rows):
+            self.exporter.write_insert_statements(self.declared_schema['table_name'], self._pending_rows,
+                                                  self._output.handle, self.batch_size, self._statements_written)
+            self._pending_rows = None
+        self._output.close()
+
+    def discard(self) -> None:
+        """Delete the partial output of a failed write."""
+        self._output.discard()
+
+
+class BulkTableWriter(TableWriter):
+    """Stream chunks of one OMOP table to a bulk-load data file.
+
+    The DDL is written uncompressed next to the data file, so the load
+    script can read it, and load describes both for generate_load_script.
+    """
+
+    def __init__(self, exporter: OMOPExporter, ddl_path: Path, data_path: Path, table_schema: Dict,
+                 dialect: str = 'postgresql', compression: Optional[str] = None):
+        """Write the DDL and open the data file.
+
+        Args:
+            exporter: Exporter generating the DDL and data file rows
+            ddl_path: DDL file
+            data_path: Bulk-load data file (including any codec suffix)
+            table_schema: Table schema dictionary
+            dialect: SQL dialect (postgresql, mysql, sqlite)
+            compression: Codec of the data file ('gzip', 'bz2', 'zstd') or None
+        """
+        super().__init__()
+        self.exporter = exporter
+        self.declared_schema = table_schema
+        self.dialect = dialect
+        exporter.write_output(ddl_path, exporter.generate_ddl(table_schema, dialect, include_constraints=False))
+        self._output = exporter.open_output(data_path, compression, newline='')
+        self.load = {
+            'table_name': table_schema['table_name'],
+            'columns': [],
+            'ddl_file': Path(ddl_path).name,
+            'data_file': Path(data_path).name,
+            'null_columns': []
+        }
+        self.output_paths.extend([Path(ddl_path), Path(data_path)])
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append a chunk of table data.
+
+        Args:
+            df: DataFrame with table data
+        """
+        if not self.load['columns']:
+            self.load['columns'] = list(df.columns)
+        null_columns = self.exporter.export_bulk(self.load['table_name'], df, self._output.handle,
+                                                 self.dialect, self.declared_schema)
+        self.load['null_columns'] = [column for column in df.columns
+                                     if column in null_columns or column in self.load['null_columns']]
+
+    def close(self) -> None:
+        """Publish the output file."""
+        self._output.close()
+
+    def discard(self) -> None:
+        """Delete the partial output of a failed write."""
+        self._output.discard()
+
+
+class OMOPDatabaseLoader:
+    """Load OMOP tables into a database through a DB-API connection.
+
+    Tables are created without constraints, filled with batched executemany
+    calls inside large transactions, and get their primary keys only once
+    the data is in.
+    """
+
+    # Rows per executemany call
+    INSERT_BATCH_SIZE = 10000
+
+    # Rows per transaction
+    COMMIT_ROWS = 1000000
+
+    # Bulk-load settings for SQLite connections
+    SQLITE_PRAGMAS = [
+        'PRAGMA synchronous = OFF',
+        'PRAGMA journal_mode = MEMORY',
+        'PRAGMA temp_store = MEMORY',
+        'PRAGMA cache_size = -262144'
+    ]
+
+    # Placeholder for each DB-API paramstyle
+    PLACEHOLDERS = {'qmark': '?', 'format': '%s', 'pyformat': '%s'}
+
+    def __init__(self, connection: Any, exporter: OMOPExporter, dialect: str = 'sqlite',
+                 paramstyle: str = 'qmark', batch_size: int = INSERT_BATCH_SIZE,
+                 commit_rows: int = COMMIT_ROWS):
+        """Initialize loader.
+
+        Args:
+            connection: Open DB-API connection
+            exporter: Exporter generating the DDL
+            dialect: SQL dialect of the database (postgresql, mysql, sqlite)
+            paramstyle: DB-API paramstyle of the driver (qmark, format, pyformat)
+            batch_size: Rows per executemany call
+            commit_rows: Rows per transaction
+        """
+        if paramstyle not in self.PLACEHOLDERS:
+            raise ValueError(f"Unsupported paramstyle: {paramstyle}")
+        self.connection = connection
+        self.exporter = exporter
+        self.dialect = dialect
+        self.placeholder = self.PLACEHOLDERS[paramstyle]
+        self.batch_size = batch_size
+        self.commit_rows = commit_rows
+        self.rows_loaded = 0
+        self._uncommitted = 0
+
+    @classmethod
+    def connect_sqlite(cls, database_path: Path, exporter: OMOPExporter, **kwargs) -> 'OMOPDatabaseLoader':
+        """Open a SQLite database tuned for bulk loading.
+
+        Args:
+            database_path: SQLite database file (created if missing)
+            exporter: Exporter generating the DDL
+            **kwargs: Further OMOPDatabaseLoader arguments
+
+        Returns:
+            Loader owning the connection
+        """
+        import sqlite3
+
+        connection = sqlite3.connect(database_path)
+        for pragma in cls.SQLITE_PRAGMAS:
+            connection.execute(pragma)
+        return cls(connection, exporter, 'sqlite', sqlite3.paramstyle, **kwargs)
+
+    def __enter__(self) -> 'OMOPDatabaseLoader':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.connection.rollback()
+        self.connection.close()
+
+    def create_table(self, table_schema: Dict) -> None:
+        """(Re)create a table without constraints.
+
+        Args:
+            table_schema: Table schema dictionary
+        """
+        cursor = self.connection.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS {table_schema['table_name']}")
+        cursor.execute(self.exporter.generate_ddl(table_schema, self.dialect, include_constraints=False))
+
+    def insert(self, table_name: str, df: pd.DataFrame) -> None:
+        """Insert table data with batched executemany calls.
+
+        Args:
+            table_name: OMOP table name
+            df: DataFrame with table data
+        """
+        if df.empty:
+            return
+        columns = ', '.join(df.columns)
+        placeholders = ', '.join([self.placeholder] * len(df.columns))
+        statement = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+
+        cursor = self.connection.cursor()
+        for start in range(0, len(df), self.batch_size):
+            rows = self.to_parameters(df.iloc[start:start + self.batch_size])
+            cursor.executemany(statement, rows)
+            self.rows_loaded += len(rows)
+            self._uncommitted += len(rows)
+            if self._uncommitted >= self.commit_rows:
+                self.connection.commit()
+                self._uncommitted = 0
+
+    def finish(self, table_schema: Dict) -> None:
+        """Add the table's constraints and commit.
+
+        Args:
+            table_schema: Table schema dictionary
+        """
+        cursor = self.connection.cursor()
+        for statement in self.exporter.generate_primary_key_ddl(table_schema, self.dialect):
+            cursor.execute(statement)
+        self.connection.commit()
+        self._uncommitted = 0
+
+    def execute(self, statements: List[str]) -> None:
+        """Run DDL statements, such as post-load indexes, and commit.
+
+        Args:
+            statements: SQL statements
+        """
+        cursor = self.connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        self.connection.commit()
+
+    def to_parameters(self, df: pd.DataFrame) -> List[Tuple]:
+        """Convert table data to DB-API parameter rows.
+
+        Values become Python scalars, NULLs become None and dates ISO strings.
+
+        Args:
+            df: DataFrame with table data
+
+        Returns:
+            List of row tuples
+        """
+        columns = []
+        for column in df.columns:
+            values = df[column]
+            null = values.isna()
+            if pd.api.types.is_datetime64_any_dtype(values):
+                values = self.exporter.format_datetime_text(values[~null]).reindex(values.index)
+            elif values.dtype == object:
+                values = values.map(lambda value: self.exporter.format_datetime(value)
+                                    if isinstance(value, datetime) else value)
+            columns.append(values.astype(object).where(~null, None).tolist())
+        return list(zip(*columns))
+
+
+class DatabaseTableWriter(TableWriter):
+    """Stream chunks of one OMOP table into a database through an OMOPDatabaseLoader.
+
+    The table is created bare, and its primary key is added on close, once
+    the data is in.
+    """
+
+    def __init__(self, loader: OMOPDatabaseLoader, table_schema: Dict, database_path: Optional[Path] = None):
+        """Create the table.
+
+        Args:
+            loader: Loader whose connection the writer takes over
+            table_schema: Table schema dictionary
+            database_path: Database file, for file-based databases such as SQLite
+        """
+        super().__init__()
+        self.loader = loader
+        self.declared_schema = table_schema
+        if database_path is not None:
+            self.output_paths.append(Path(database_path))
+        try:
+            loader.create_table(table_schema)
+        except Exception:
+            loader.connection.close()
+            raise
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append a chunk of table data.
+
+        Args:
+            df: DataFrame with table data
+        """
+        self.loader.insert(self.declared_schema['table_name'], df)
+
+    def close(self) -> None:
+        """Add the primary key, commit and close the connection."""
+        self.loader.finish(self.declared_schema)
+        self.loader.connection.close()
+
+    def discard(self) -> None:
+        """Roll back the uncommitted rows and close the connection."""
+        self.loader.connection.rollback()
+        self.loader.connection.close()
@@ -0,0 +1,642 @@
+#!/usr/bin/env python3
+"""Primary and foreign key checks for OMOP tables.
+
+Collects the keys of each table chunk by chunk in bounded memory: bitmaps
+for compact integer IDs, sorted arrays for other keys, and hash-partitioned
+spill files for primary keys that outgrow memory. Foreign keys are checked
+across tables from the keys collected while each table was converted.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class KeyIndex:
+    """Membership index over the values of a key column.
+
+    Integer keys are held as a boolean bitmap over their range when that is
+    no larger than a sorted int64 array of the keys, otherwise as a sorted
+    unique array searched with np.searchsorted; other keys as a sorted array
+    of strings. Lookups are vectorized and never build Python sets.
+    """
+
+    # Bitmap bytes allowed per distinct key (a sorted int64 array takes 8)
+    BITMAP_BYTES_PER_KEY = 8
+
+    def __init__(self):
+        self._parts: List[np.ndarray] = []
+        self.keys: Optional[np.ndarray] = None
+        self.bitmap: Optional[np.ndarray] = None
+        self.offset = 0
+        self.built = False
+
+    @staticmethod
+    def key_array(values: pd.Series) -> np.ndarray:
+        """Convert the non-null values of a key column to a lookup array.
+
+        Args:
+            values: Key column
+
+        Returns:
+            int64 array for integer keys (including integers read as floats
+            because of NULLs), object array of strings otherwise
+        """
+        values = values.dropna()
+        if pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            return values.to_numpy(dtype=np.int64)
+        if pd.api.types.is_float_dtype(values):
+            array = values.to_numpy(dtype=np.float64)
+            if (array == np.floor(array)).all():
+                return array.astype(np.int64)
+        return values.astype(str).to_numpy(dtype=object)
+
+    def add(self, values: pd.Series) -> None:
+        """Add a chunk of key values.
+
+        Args:
+            values: Key column chunk
+        """
+        self._parts.append(self.key_array(values))
+
+    def build(self) -> 'KeyIndex':
+        """Build the index once all key values are added.
+
+        Returns:
+            The index itself
+        """
+        parts = [part for part in self._parts if len(part)]
+        self._parts = []
+        self.built = True
+        if not parts:
+            self.keys = np.array([], dtype=np.int64)
+            return self
+
+        if all(part.dtype.kind == 'i' for part in parts):
+            low = min(int(part.min()) for part in parts)
+            span = max(int(part.max()) for part in parts) - low + 1
+            if span <= self.BITMAP_BYTES_PER_KEY * sum(len(part) for part in parts):
+                # Dense keys: set bits directly, no sort needed
+                self.offset = low
+                self.bitmap = np.zeros(span, dtype=bool)
+                for part in parts:
+                    self.bitmap[part - low] = True
+                return self
+        else:
+            parts = [part if part.dtype == object else part.astype(str).astype(object) for part in parts]
+        # Sort and drop repeats (much faster than np.unique on large arrays)
+        keys = np.sort(np.concatenate(parts))
+        self.keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+        return self
+
+    def __len__(self) -> int:
+        if self.bitmap is not None:
+            return int(self.bitmap.sum())
+        return len(self.keys) if self.keys is not None else 0
+
+    def contains(self, values: np.ndarray) -> np.ndarray:
+        """Look up key values.
+
+        Args:
+            values: Array from key_array
+
+        Returns:
+            Boolean array, True where the value is a key
+        """
+        integer_index = self.bitmap is not None or self.keys.dtype.kind == 'i'
+        found = np.zeros(len(values), dtype=bool)
+        if integer_index and values.dtype == object:
+            # String values only match integer keys when they spell an integer
+            numbers = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+            valid = (numbers == np.floor(numbers)) & (np.abs(numbers) < 2 ** 63)
+            found[valid] = self.contains(numbers[valid].astype(np.int64))
+            return found
+        if not integer_index and values.dtype != object:
+            values = values.astype(str).astype(object)
+
+        if self.bitmap is not None:
+            positions = values - self.offset
+            inside = (positions >= 0) & (positions < len(self.bitmap))
+            found[inside] = self.bitmap[positions[inside]]
+            return found
+
+        if not len(self.keys):
+            return found
+        positions = np.searchsorted(self.keys, values)
+        inside = positions < len(self.keys)
+        found[inside] = self.keys[positions[inside]] == values[inside]
+        return found
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Export a built index as plain arrays (no pickled objects).
+
+        Returns:
+            Arrays for from_state: the bitmap packed to bits with its span and
+            offset, or the sorted keys (strings as a fixed-width array)
+        """
+        if self.bitmap is not None:
+            return {'bitmap': np.packbits(self.bitmap), 'span': np.array(len(self.bitmap)),
+                    'offset': np.array(self.offset)}
+        return {'keys': self.keys.astype(str) if self.keys.dtype == object else self.keys}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> 'KeyIndex':
+        """Rebuild an index from the arrays of state().
+
+        Args:
+            state: Arrays from state()
+
+        Returns:
+            Built KeyIndex
+        """
+        index = cls()
+        index.built = True
+        if 'bitmap' in state:
+            index.bitmap = np.unpackbits(state['bitmap'], count=int(state['span'])).astype(bool)
+            index.offset = int(state['offset'])
+        else:
+            keys = state['keys']
+            index.keys = keys.astype(object) if keys.dtype.kind == 'U' else keys
+        return index
+
+
+class TableKeys:
+    """Key values of one table, kept to check foreign keys after conversion.
+
+    Referenced columns are indexed (KeyIndex) and referencing columns are
+    reduced to their distinct values with row counts, both from the chunks
+    the table is converted from. The state is saved as a .npz file next to
+    the run manifest, so no table is read a second time for the check, not
+    even one skipped by incremental conversion.
+    """
+
+    # Distinct referencing values buffered per column before they are merged
+    MERGE_VALUES = 4 * 1024 * 1024
+
+    def __init__(self, key_fields: List[str] = (), reference_fields: List[str] = ()):
+        """Initialize collector.
+
+        Args:
+            key_fields: Columns other tables reference
+            reference_fields: Foreign key columns of the table
+        """
+        self.key_fields = list(key_fields)
+        self.reference_fields = list(reference_fields)
+        self.indexes: Dict[str, KeyIndex] = {}
+        self.values: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._parts: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        self._buffered: Dict[str, int] = {}
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Collect the keys of one chunk.
+
+        Args:
+            df: DataFrame chunk with table data
+        """
+        for field in self.key_fields:
+            if field in df.columns:
+                self.indexes.setdefault(field, KeyIndex()).add(df[field])
+        for field in self.reference_fields:
+            if field not in df.columns:
+                continue
+            values, counts = np.unique(KeyIndex.key_array(df[field]), return_counts=True)
+            self._parts.setdefault(field, []).append((values, counts))
+            self._buffered[field] = self._buffered.get(field, 0) + len(values)
+            if self._buffered[field] > self.MERGE_VALUES:
+                self._parts[field] = [self._merge(self._parts[field])]
+                self._buffered[field] = len(self._parts[field][0][0])
+
+    def finish(self) -> 'TableKeys':
+        """Build the indexes and merge the value counts after the last chunk.
+
+        Returns:
+            The collector itself
+        """
+        for index in self.indexes.values():
+            index.build()
+        self.values = {field: self._merge(parts) for field, parts in self._parts.items()}
+        self._parts = {}
+        self._buffered = {}
+        return self
+
+    @staticmethod
+    def _merge(parts: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Merge (distinct values, counts) pairs, summing the counts of repeated values.
+
+        Args:
+            parts: Pairs of sorted distinct values and their row counts
+
+        Returns:
+            Pair of sorted distinct values and row counts
+        """
+        parts = [(values, counts) for values, counts in parts if len(values)]
+        if not parts:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        if not all(values.dtype.kind == 'i' for values, _ in parts):
+            parts = [(values if values.dtype == object else values.astype(str).astype(object), counts)
+                     for values, counts in parts]
+        values, inverse = np.unique(np.concatenate([values for values, _ in parts]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([counts for _, counts in parts]),
+                             minlength=len(values))
+        return values, counts.astype(np.int64)
+
+    def covers(self, other: 'TableKeys') -> bool:
+        """Check whether this state was collected for at least another's fields.
+
+        Args:
+            other: Collector listing the fields needed
+
+        Returns:
+            True if every key and reference field of other was collected
+        """
+        return (set(other.key_fields) <= set(self.key_fields)
+                and set(other.reference_fields) <= set(self.reference_fields))
+
+    def save(self, path: Path) -> None:
+        """Save the finished state atomically as a .npz file.
+
+        Args:
+            path: Path to the .npz file
+        """
+        arrays = {'key_fields': np.array(self.key_fields, dtype=str),
+                  'reference_fields': np.array(self.reference_fields, dtype=str)}
+        for field, index in self.indexes.items():
+            arrays.update({f"index:{field}:{name}": array for name, array in index.state().items()})
+        for field, (values, counts) in self.values.items():
+            arrays[f"values:{field}"] = values.astype(str) if values.dtype == object else values
+            arrays[f"counts:{field}"] = counts
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'TableKeys':
+        """Load a state saved by save().
+
+        Args:
+            path: Path to the .npz file
+
+        Returns:
+            Finished TableKeys
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            keys = cls(arrays['key_fields'].tolist(), arrays['reference_fields'].tolist())
+            states: Dict[str, Dict[str, np.ndarray]] = {}
+            counts = {}
+            for name in arrays.files:
+                kind, _, rest = name.partition(':')
+                if kind == 'index':
+                    field, _, part = rest.rpartition(':')
+                    states.setdefault(field, {})[part] = arrays[name]
+                elif kind == 'values':
+                    values = arrays[name]
+                    keys.values[rest] = values.astype(object) if values.dtype.kind == 'U' else values
+                elif kind == 'counts':
+                    counts[rest] = arrays[name]
+        keys.indexes = {field: KeyIndex.from_state(state) for field, state in states.items()}
+        keys.values = {field: (values, counts[field]) for field, values in keys.values.items()}
+        return keys
+
+
+class PrimaryKeyChecker:
+    """Count duplicate primary keys incrementally in bounded memory.
+
+    Integer keys in a compact range are tracked in a growing boolean bitmap
+    (one byte per ID in the range). Other keys, such as text or sparse
+    integers, are buffered in memory up to a budget, then hash-partitioned to
+    disk. At the end each partition is sorted on its own, so memory is bounded
+    by the largest partition. Text keys are spilled as 128-bit siphash keys,
+    compared in place of the text, and the text itself is only read back to
+    report duplicates.
+    """
+
+    # Bitmap bytes allowed per key seen, at least and overall
+    BITMAP_BYTES_PER_KEY = KeyIndex.BITMAP_BYTES_PER_KEY
+    BITMAP_MIN_BYTES = 1024 * 1024
+    BITMAP_MAX_BYTES = 256 * 1024 * 1024
+
+    # Keys buffered in memory before spilling to disk
+    MEMORY_BYTES = 256 * 1024 * 1024
+
+    # Hash partitions of spilled keys
+    SPILL_PARTITIONS = 64
+
+    # siphash keys (16 characters) of the two halves of spilled text key hashes
+    HASH_KEY = 'omop-pk-spill-01'
+    CHECK_HASH_KEY = 'omop-pk-spill-02'
+    HASHED_KEY_DTYPE = np.dtype([('hash', np.uint64), ('check', np.uint64)])
+
+    # Distinct duplicate keys reported
+    DUPLICATE_SAMPLE_SIZE = 10
+
+    def __init__(self, memory_bytes: int = MEMORY_BYTES, partitions: int = SPILL_PARTITIONS,
+                 spill_dir: Optional[Path] = None):
+        """Initialize checker.
+
+        Args:
+            memory_bytes: Keys buffered in memory before spilling to disk
+            partitions: Hash partitions of spilled keys
+            spill_dir: Directory for spill files (default: system temp dir)
+        """
+        self.memory_bytes = memory_bytes
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.rows = 0
+        self.null_count = 0
+        self.duplicate_count = 0
+        self.duplicate_sample: List = []
+        self.bitmap: Optional[np.ndarray] = None
+        self.offset = 0
+        self._integer: Optional[bool] = None
+        self._buffering = False
+        self._buffer: List[np.ndarray] = []
+        self._buffered_bytes = 0
+        self._spill_root: Optional[Path] = None
+        self._spilled = 0
+        self._text: Optional['PrimaryKeyChecker'] = None
+
+    def update(self, values: pd.Series) -> None:
+        """Add one chunk of key values.
+
+        Args:
+            values: Key column chunk
+        """
+        self.null_count += int(values.isna().sum())
+        keys = KeyIndex.key_array(values)
+        if not len(keys):
+            return
+        if self._integer is None:
+            self._integer = keys.dtype.kind == 'i'
+
+        if self._integer and keys.dtype == object:
+            # Integer spellings join the integer keys; other text cannot collide
+            # with them and is counted separately
+            numbers = pd.to_numeric(pd.Series(keys), errors='coerce').to_numpy(dtype=np.float64)
+            integral = (numbers == np.floor(numbers)) & (np.abs(numbers) < 2 ** 63)
+            if not integral.all():
+                if self._text is None:
+                    self._text = PrimaryKeyChecker(self.memory_bytes, self.partitions, self.spill_dir)
+                self._text.update(pd.Series(keys[~integral]))
+            keys = numbers[integral].astype(np.int64)
+        elif not self._integer and keys.dtype != object:
+            keys = keys.astype(str).astype(object)
+
+        self.rows += len(keys)
+        if self._integer and not self._buffering and self._fit_bitmap(keys):
+            self._update_bitmap(keys)
+        else:
+            self._buffer_keys(keys)
+
+    def finish(self) -> Tuple[int, List]:
+        """Count the duplicates after the last chunk.
+
+        Returns:
+            Tuple of (duplicate count, sample of duplicate keys)
+        """
+        try:
+            if self._spill_root is not None:
+                self._spill()
+                for partition in range(self.partitions):
+                    paths = sorted(self._spill_root.glob(f"p{partition}_c*.npy"))
+                    if paths:
+                        self._count_spilled(paths)
+            elif self._buffer:
+                self._count_sorted(np.sort(np.concatenate(self._buffer)))
+        finally:
+            self._buffer = []
+            if self._spill_root is not None:
+                shutil.rmtree(self._spill_root, ignore_errors=True)
+                self._spill_root = None
+
+        if self._text is not None:
+            text_count, text_sample = self._text.finish()
+            self.duplicate_count += text_count
+            self._add_sample(np.array(text_sample, dtype=object))
+        return self.duplicate_count, self.duplicate_sample
+
+    def _fit_bitmap(self, keys: np.ndarray) -> bool:
+        """Grow the bitmap to cover a chunk, or give it up for buffering.
+
+        Args:
+            keys: Integer keys of the chunk
+
+        Returns:
+            Whether the chunk fits in the bitmap
+        """
+        low, high = int(keys.min()), int(keys.max())
+        if self.bitmap is not None:
+            low, high = min(low, self.offset), max(high, self.offset + len(self.bitmap) - 1)
+        span = high - low + 1
+        if span > self.BITMAP_MAX_BYTES or span > max(self.BITMAP_MIN_BYTES, self.BITMAP_BYTES_PER_KEY * self.rows):
+            self._buffering = True
+            if self.bitmap is not None:
+                # The bitmap holds each key once, so it moves over as distinct keys
+                self._buffer_keys(np.flatnonzero(self.bitmap) + self.offset)
+                self.bitmap = None
+            return False
+
+        if self.bitmap is None:
+            self.offset = low
+            self.bitmap = np.zeros(span, dtype=bool)
+        elif low < self.offset or high >= self.offset + len(self.bitmap):
+            # Grow geometrically upwards so ascending IDs do not copy every chunk
+            size = min(max(span, 2 * len(self.bitmap)), max(span, self.BITMAP_MAX_BYTES))
+            bitmap = np.zeros(size, dtype=bool)
+            start = self.offset - low
+            bitmap[start:start + len(self.bitmap)] = self.bitmap
+            self.offset, self.bitmap = low, bitmap
+        return True
+
+    def _update_bitmap(self, keys: np.ndarray) -> None:
+        """Count and record a chunk of integer keys in the bitmap.
+
+        Args:
+            keys: Integer keys of the chunk
+        """
+        keys = np.sort(keys)
+        repeated = keys[1:] == keys[:-1]
+        distinct = keys[np.concatenate(([True], ~repeated))]
+        positions = distinct - self.offset
+        seen = self.bitmap[positions]
+        self.duplicate_count += int(repeated.sum()) + int(seen.sum())
+        if len(self.duplicate_sample) < self.DUPLICATE_SAMPLE_SIZE:
+            self._add_sample(np.sort(np.concatenate((keys[1:][repeated], distinct[seen]))))
+        self.bitmap[positions] = True
+
+    def _buffer_keys(self, keys: np.ndarray) -> None:
+        """Buffer keys for sorting, spilling to disk over the memory budget.
+
+        Args:
+            keys: Keys of the chunk
+        """
+        self._buffer.append(keys)
+        self._buffered_bytes += (int(pd.Series(keys).memory_usage(deep=True, index=False))
+                                 if keys.dtype == object else keys.nbytes)
+        if self._buffered_bytes > self.memory_bytes:
+            self._spill()
+
+    def _spill(self) -> None:
+        """Write the buffered keys to their hash partitions on disk."""
+        if not self._buffer:
+            return
+        if self._spill_root is None:
+            self._spill_root = Path(tempfile.mkdtemp(prefix='omop_pk_', dir=self.spill_dir))
+        keys = np.concatenate(self._buffer)
+        hashed = self._hash_keys(keys) if keys.dtype == object else None
+        hashes = hashed['hash'] if hashed is not None else pd.util.hash_array(keys)
+        partitions = hashes % np.uint64(self.partitions)
+        order = np.argsort(partitions, kind='stable')
+        bounds = np.searchsorted(partitions[order], np.arange(self.partitions + 1, dtype=np.uint64))
+        for partition in range(self.partitions):
+            rows = order[bounds[partition]:bounds[partition + 1]]
+            if not len(rows):
+                continue
+            name = f"p{partition}_c{self._spilled:06d}.npy"
+            if hashed is None:
+                np.save(self._spill_root / name, keys[rows], allow_pickle=False)
+            else:
+                np.save(self._spill_root / name, hashed[rows], allow_pickle=False)
+                np.save(self._spill_root / ('t' + name[1:]), keys[rows].astype(str), allow_pickle=False)
+        self._spilled += 1
+        self._buffer = []
+        self._buffered_bytes = 0
+
+    def _hash_keys(self, keys: np.ndarray) -> np.ndarray:
+        """Hash text keys into fixed-width 128-bit keys for spilling.
+
+        Args:
+            keys: Object array of text keys
+
+        Returns:
+            Structured array of HASHED_KEY_DTYPE
+        """
+        hashed = np.empty(len(keys), dtype=self.HASHED_KEY_DTYPE)
+        hashed['hash'] = pd.util.hash_array(keys, hash_key=self.HASH_KEY, categorize=False)
+        hashed['check'] = pd.util.hash_array(keys, hash_key=self.CHECK_HASH_KEY, categorize=False)
+        return hashed
+
+    def _count_spilled(self, paths: List[Path]) -> None:
+        """Count the duplicates in one spilled partition.
+
+        Args:
+            paths: Spill files of the partition
+        """
+        keys = np.concatenate([np.load(path, allow_pickle=False) for path in paths])
+        if keys.dtype != self.HASHED_KEY_DTYPE:
+            self._count_sorted(np.sort(keys))
+            return
+
+        order = np.lexsort((keys['check'], keys['hash']))
+        hashes, checks = keys['hash'][order], keys['check'][order]
+        repeated = (hashes[1:] == hashes[:-1]) & (checks[1:] == checks[:-1])
+        self.duplicate_count += int(repeated.sum())
+        if repeated.any() and len(self.duplicate_sample) < self.DUPLICATE_SAMPLE_SIZE:
+            text = np.concatenate([np.load(path.with_name('t' + path.name[1:]), allow_pickle=False)
+                                   for path in paths])
+            self._add_sample(np.sort(text[order][1:][repeated]).astype(object))
+
+    def _count_sorted(self, keys: np.ndarray) -> None:
+        """Count the duplicates among sorted keys.
+
+        Args:
+            keys: Sorted keys
+        """
+        repeated = keys[1:] == keys[:-1]
+        self.duplicate_count += int(repeated.sum())
+        if len(self.duplicate_sample) < self.DUPLICATE_SAMPLE_SIZE:
+            self._add_sample(keys[1:][repeated])
+
+    def _add_sample(self, duplicates: np.ndarray) -> None:
+        """Add sorted duplicate keys to the sample, up to its size.
+
+        Args:
+            duplicates: Sorted duplicate keys
+        """
+        for value in duplicates.tolist():
+            if len(self.duplicate_sample) >= self.DUPLICATE_SAMPLE_SIZE:
+                break
+            if value not in self.duplicate_sample:
+                self.duplicate_sample.append(value)
+
+
+class ReferentialIntegrityChecker:
+    """Check foreign keys across the tables of a dataset.
+
+    Each table contributes the TableKeys collected while it was converted,
+    so the check itself reads no data: the distinct values of each
+    referencing column are looked up once in the referenced column's index.
+    """
+
+    # Distinct orphaned values reported per foreign key
+    ORPHAN_SAMPLE_SIZE = 10
+
+    def __init__(self, references: List[Dict]):
+        """Initialize checker.
+
+        Args:
+            references: Dicts with table, field, ref_table and ref_field
+        """
+        self.references = [dict(reference, checked=0, orphaned=0, sample=[]) for reference in references]
+        self.tables: Dict[str, TableKeys] = {}
+
+    @staticmethod
+    def table_keys(references: List[Dict], table: str) -> Optional[TableKeys]:
+        """Create the collector for the keys a table contributes to the check.
+
+        Args:
+            references: Dicts with table, field, ref_table and ref_field
+            table: OMOP table name
+
+        Returns:
+            Empty TableKeys, or None if the table takes part in no reference
+        """
+        key_fields = list(dict.fromkeys(reference['ref_field'] for reference in references
+                                        if reference['ref_table'] == table))
+        reference_fields = list(dict.fromkeys(reference['field'] for reference in references
+                                              if reference['table'] == table))
+        if not key_fields and not reference_fields:
+            return None
+        return TableKeys(key_fields, reference_fields)
+
+    def add_table(self, table: str, keys: TableKeys) -> None:
+        """Add the finished keys of a table.
+
+        Args:
+            table: OMOP table name
+            keys: Finished TableKeys
+        """
+        self.tables[table] = keys
+
+    def finish(self) -> Tuple[bool, List[str], List[Dict]]:
+        """Check every foreign key once all tables are added.
+
+        Returns:
+            Tuple of (is_valid, list of error messages, per-reference results)
+        """
+        for reference in self.references:
+            keys = self.tables.get(reference['table'])
+            ref_keys = self.tables.get(reference['ref_table'])
+            if keys is None or ref_keys is None or reference['field'] not in keys.values:
+                continue
+            values, counts = keys.values[reference['field']]
+            index = ref_keys.indexes.get(reference['ref_field'])
+            if index is None:
+                # The referenced column was absent, so every value is orphaned
+                index = KeyIndex().build()
+            orphaned = ~index.contains(values)
+            reference['checked'] = int(counts.sum())
+            reference['orphaned'] = int(counts[orphaned].sum())
+            reference['sample'] = values[orphaned][:self.ORPHAN_SAMPLE_SIZE].tolist()
+
+        errors = [
+            f"Foreign key '{reference['table']}.{reference['field']}' has {reference['orphaned']} "
+            f"orphaned references to {reference['ref_table']}.{reference['ref_field']}"
+            for reference in self.references if reference['orphaned']
+        ]
+        return len(errors) == 0, errors, self.references
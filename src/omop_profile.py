@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Single-pass profiling of OMOP tables.
+
+Profiles each column from the chunks a table is converted from: counts,
+null rates, numeric ranges and moments, and approximate distinct counts
+from HyperLogLog sketches, which merge across chunks and worker processes.
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .omop_keys import KeyIndex
+except ImportError:  # run as a script from src/
+    from omop_keys import KeyIndex
+
+
+class HyperLogLog:
+    """Mergeable HyperLogLog sketch for approximate distinct counts.
+
+    Values are hashed in one vectorized call per chunk; sketches of the same
+    precision merge by taking the register-wise maximum.
+    """
+
+    def __init__(self, precision: int = 14):
+        """Initialize an empty sketch.
+
+        Args:
+            precision: Bits of the hash selecting a register (2^precision
+                registers, about 1.04 / sqrt(2^precision) relative error)
+        """
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values: pd.Series) -> None:
+        """Add the non-null values of a column chunk.
+
+        Args:
+            values: Column chunk
+        """
+        present = values.dropna()
+        if not len(present):
+            return
+        if pd.api.types.is_float_dtype(present):
+            # Integral floats hash like the integers they stand for
+            keys = present.to_numpy(dtype=np.float64)
+            if (keys == np.floor(keys)).all():
+                keys = keys.astype(np.int64)
+        else:
+            keys = KeyIndex.key_array(present)
+        hashes = pd.util.hash_array(keys, categorize=False)
+        width = 64 - self.precision
+        registers = (hashes >> np.uint64(width)).astype(np.intp)
+        rest = hashes & np.uint64((1 << width) - 1)
+        # Position of the lowest set bit; exact in float64 as it is a power of two
+        lowest = rest & (np.uint64(0) - rest)
+        with np.errstate(divide='ignore'):
+            ranks = np.where(rest == 0, width + 1, np.log2(lowest.astype(np.float64)) + 1)
+        np.maximum.at(self.registers, registers, ranks.astype(np.uint8))
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        """Merge another sketch of the same precision into this one.
+
+        Args:
+            other: Sketch to merge
+        """
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog sketches of precision {other.precision} "
+                             f"and {self.precision}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        """Estimate the number of distinct values added.
+
+        Returns:
+            Approximate distinct count
+        """
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class ColumnProfile:
+    """Single-pass, mergeable profile of one column.
+
+    Tracks NULLs, minimum and maximum, an approximate distinct count and a
+    histogram: exact value counts while the column has few distinct values,
+    otherwise (for numeric columns) counts over equal-width bins whose width
+    doubles as the observed range grows.
+    """
+
+    # Distinct values counted exactly before falling back to bins
+    HISTOGRAM_VALUES = 20
+
+    # Maximum number of numeric histogram bins
+    HISTOGRAM_BINS = 20
+
+    def __init__(self):
+        self.rows = 0
+        self.nulls = 0
+        self.minimum: Any = None
+        self.maximum: Any = None
+        self.distinct = HyperLogLog()
+        self.value_counts: Optional[pd.Series] = pd.Series(dtype=np.int64)
+        self.numeric = True
+        self.bin_width: Optional[float] = None
+        self.bin_offset = 0
+        self.bin_counts = np.zeros(0, dtype=np.int64)
+
+    def update(self, values: pd.Series) -> None:
+        """Profile a column chunk.
+
+        Args:
+            values: Column chunk
+        """
+        self.rows += len(values)
+        present = values.dropna()
+        self.nulls += len(values) - len(present)
+        if not len(present):
+            return
+
+        self.distinct.add(present)
+        numeric = pd.api.types.is_numeric_dtype(present) and not pd.api.types.is_bool_dtype(present)
+        if numeric:
+            low, high = self._scalar(present.min()), self._scalar(present.max())
+        else:
+            text = present.astype(str)
+            low, high = text.min(), text.max()
+        self._update_range(low, high, numeric)
+
+        if self.value_counts is not None and self.distinct.count() > 2 * self.HISTOGRAM_VALUES:
+            # Clearly too many values for exact counts; skip counting this chunk
+            self.value_counts = None
+        if self.value_counts is not None:
+            self.value_counts = self.value_counts.add(present.value_counts(), fill_value=0)
+            if len(self.value_counts) > self.HISTOGRAM_VALUES:
+                self.value_counts = None
+        if self.numeric:
+            numbers = present.to_numpy(dtype=np.float64)
+            numbers = numbers[np.isfinite(numbers)]
+            if len(numbers):
+                self._add_bins(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), numbers)
+
+    def merge(self, other: 'ColumnProfile') -> None:
+        """Merge the profile of another part of the same column.
+
+        Args:
+            other: Column profile to merge
+        """
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.distinct.merge(other.distinct)
+        if other.minimum is not None:
+            self._update_range(other.minimum, other.maximum, other.numeric)
+        if self.value_counts is not None and other.value_counts is not None:
+            self.value_counts = self.value_counts.add(other.value_counts, fill_value=0)
+            if len(self.value_counts) > self.HISTOGRAM_VALUES:
+                self.value_counts = None
+        else:
+            self.value_counts = None
+        if self.numeric and other.bin_width is not None:
+            # Bring both histograms to the wider bin width, then combine
+            width = max(self.bin_width or 0.0, other.bin_width)
+            parts = []
+            for profile in (self, other):
+                bins = profile.bin_offset + np.arange(len(profile.bin_counts))
+                bin_width = profile.bin_width or width
+                while bin_width < width:
+                    bins //= 2
+                    bin_width *= 2
+                parts.append((bins, profile.bin_counts))
+            self.bin_width = width
+            self.bin_offset = 0
+            self.bin_counts = np.zeros(0, dtype=np.int64)
+            self._add_bins(np.concatenate([parts[0][0], parts[1][0]]),
+                           np.concatenate([parts[0][1], parts[1][1]]), np.zeros(0))
+
+    @staticmethod
+    def _scalar(value: Any) -> Any:
+        """Convert a NumPy scalar to the equivalent Python value."""
+        return value.item() if isinstance(value, np.generic) else value
+
+    def _update_range(self, low: Any, high: Any, numeric: bool) -> None:
+        """Widen the minimum and maximum, comparing as text once a chunk is not numeric."""
+        if not numeric and self.numeric:
+            self.numeric = False
+            self.bin_width = None
+            self.bin_counts = np.zeros(0, dtype=np.int64)
+            if self.minimum is not None:
+                self.minimum, self.maximum = str(self.minimum), str(self.maximum)
+        if not self.numeric:
+            low, high = str(low), str(high)
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+
+    def _add_bins(self, bins: np.ndarray, counts: np.ndarray, numbers: np.ndarray) -> None:
+        """Add binned counts and raw numbers, doubling the bin width to fit the range.
+
+        Args:
+            bins: Bin indices at the current bin width
+            counts: Counts for those bins
+            numbers: Finite values to bin
+        """
+        if self.bin_width is None:
+            span = float(numbers.max() - numbers.min())
+            self.bin_width = float(2.0 ** np.ceil(np.log2(span / self.HISTOGRAM_BINS))) if span > 0 else 1.0
+        bins = np.concatenate([self.bin_offset + np.arange(len(self.bin_counts)), bins,
+                               np.floor(numbers / self.bin_width).astype(np.int64)])
+        counts = np.concatenate([self.bin_counts, counts, np.ones(len(numbers), dtype=np.int64)])
+        while bins.max() - bins.min() >= self.HISTOGRAM_BINS:
+            # floor(x / 2w) == floor(floor(x / w) / 2), so bins coarsen exactly
+            bins //= 2
+            self.bin_width *= 2
+        self.bin_offset = int(bins.min())
+        self.bin_counts = np.bincount(bins - self.bin_offset, weights=counts).astype(np.int64)
+
+    def to_metrics(self) -> Dict:
+        """Summarize the profile.
+
+        Returns:
+            Dictionary with nullRate, minimum, maximum, approxDistinctCount and
+            histogram (values and counts, or binEdges and counts)
+        """
+        metrics = {
+            'nullRate': self.nulls / self.rows if self.rows else 0.0,
+            'minimum': self.minimum,
+            'maximum': self.maximum,
+            'approxDistinctCount': self.distinct.count()
+        }
+        if self.value_counts is not None and len(self.value_counts):
+            if self.numeric:
+                value_counts = self.value_counts.sort_index()
+            else:
+                value_counts = self.value_counts.sort_index(key=lambda index: index.astype(str))
+            metrics['histogram'] = {
+                'values': [self._scalar(value) for value in value_counts.index],
+                'counts': [int(count) for count in value_counts]
+            }
+        elif self.numeric and len(self.bin_counts):
+            edges = (self.bin_offset + np.arange(len(self.bin_counts) + 1)) * self.bin_width
+            metrics['histogram'] = {
+                'binEdges': edges.tolist(),
+                'counts': self.bin_counts.tolist()
+            }
+        return metrics
+
+
+class TableProfiler:
+    """Profile an OMOP table in one pass over its chunks."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns: Dict[str, ColumnProfile] = {}
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Profile one chunk of table data.
+
+        Args:
+            df: DataFrame chunk with table data
+        """
+        self.rows += len(df)
+        for column in df.columns:
+            self.columns.setdefault(str(column), ColumnProfile()).update(df[column])
+
+    def finish(self) -> Dict:
+        """Summarize the table after the last chunk.
+
+        Returns:
+            Dictionary with rowCount, completeness (mean non-null rate over
+            columns) and per-column metrics
+        """
+        columns = {column: profile.to_metrics() for column, profile in self.columns.items()}
+        completeness = (float(np.mean([1 - metrics['nullRate'] for metrics in columns.values()]))
+                        if columns else 1.0)
+        return {'rowCount': self.rows, 'completeness': completeness, 'columns': columns}
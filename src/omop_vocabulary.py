@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""OMOP standardized vocabulary index.
+
+Ingests a local Athena vocabulary export (CONCEPT.csv,
+CONCEPT_RELATIONSHIP.csv and an optional SOURCE_TO_CONCEPT_MAP.csv) once
+into sorted NumPy arrays on disk, and memory maps them on later runs, so
+concept_id and source code lookups never load the vocabulary into pandas.
+"""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+class VocabularyIndex:
+    """Memory-mapped index of OMOP concepts.
+
+    Concepts are held as a sorted int64 array of concept_ids with parallel
+    arrays of domain codes and standard_concept flags; 'Maps to'
+    relationships as int64 arrays sorted by source concept; source codes as
+    a sorted array of 64-bit hashes of (vocabulary_id, code) with the
+    standard concept_id each code maps to. Lookups are np.searchsorted calls
+    over the distinct values of a column.
+
+    Use VocabularyIndex.load() to build the index on first use and share one
+    open index per vocabulary directory.
+    """
+
+    CONCEPT_FILE = 'CONCEPT.csv'
+    RELATIONSHIP_FILE = 'CONCEPT_RELATIONSHIP.csv'
+    SOURCE_MAP_FILE = 'SOURCE_TO_CONCEPT_MAP.csv'
+
+    # Index directory created inside the vocabulary directory by default
+    INDEX_DIRNAME = 'omop_vocabulary_index'
+    INDEX_MANIFEST = 'index.json'
+    INDEX_VERSION = 2
+
+    # siphash keys for source code hashes; the second only detects collisions while building
+    HASH_KEY = 'omop-vocab-key-1'
+    CHECK_HASH_KEY = 'omop-vocab-key-2'
+
+    # Rows parsed per chunk while building
+    CHUNK_ROWS = 1_000_000
+
+    # Concept 0 ("No matching concept") is accepted in every concept field
+    NO_MATCHING_CONCEPT = 0
+
+    # Open indexes by index directory
+    _indexes: Dict[Path, 'VocabularyIndex'] = {}
+
+    def __init__(self, index_dir: Path):
+        """Open a built index.
+
+        Args:
+            index_dir: Directory written by VocabularyIndex.build
+        """
+        self.index_dir = Path(index_dir)
+        with open(self.index_dir / self.INDEX_MANIFEST) as f:
+            self.manifest = json.load(f)
+        self.domains: List[str] = self.manifest['domains']
+        self.concept_ids = self._open('concept_id')
+        self.domain_codes = self._open('domain')
+        self.standard = self._open('standard_concept')
+        self.maps_from = self._open('maps_from')
+        self.maps_to_ids = self._open('maps_to')
+        self.source_hashes = self._open('source_hash')
+        self.source_concepts = self._open('source_concept')
+
+    def __getstate__(self) -> Dict:
+        # Worker processes map the arrays themselves instead of copying them
+        return {'index_dir': self.index_dir}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(state['index_dir'])
+
+    def __len__(self) -> int:
+        return len(self.concept_ids)
+
+    def _open(self, name: str) -> np.ndarray:
+        """Memory map one array of the index."""
+        return np.load(self.index_dir / f"{name}.npy", mmap_mode='r')
+
+    @property
+    def version(self) -> str:
+        """Fingerprint of the vocabulary files the index was built from."""
+        return json.dumps(self.manifest['sources'], sort_keys=True)
+
+    @classmethod
+    def load(cls, vocabulary_dir: Path, index_dir: Optional[Path] = None) -> 'VocabularyIndex':
+        """Open the index of a vocabulary export, building it when missing or stale.
+
+        Args:
+            vocabulary_dir: Directory with the Athena CONCEPT.csv and
+                CONCEPT_RELATIONSHIP.csv files
+            index_dir: Index directory (default: omop_vocabulary_index inside
+                the vocabulary directory)
+
+        Returns:
+            Open index, shared by later calls for the same directory
+        """
+        vocabulary_dir = Path(vocabulary_dir)
+        index_dir = Path(index_dir) if index_dir else vocabulary_dir / cls.INDEX_DIRNAME
+        sources = cls._source_stats(vocabulary_dir)
+
+        index = cls._indexes.get(index_dir)
+        if index is not None and index.manifest['sources'] == sources:
+            return index
+
+        manifest_path = index_dir / cls.INDEX_MANIFEST
+        stale = True
+        if manifest_path.exists():
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            stale = (manifest.get('version') != cls.INDEX_VERSION or manifest.get('sources') != sources
+                     or manifest.get('hashProbe') != cls._hash_probe())
+        if stale:
+            cls.build(vocabulary_dir, index_dir)
+
+        cls._indexes[index_dir] = cls(index_dir)
+        return cls._indexes[index_dir]
+
+    @classmethod
+    def build(cls, vocabulary_dir: Path, index_dir: Path) -> None:
+        """Build the on-disk index from an Athena vocabulary export.
+
+        The export is read in chunks of the few columns the index keeps; the
+        index is written to a temporary directory and renamed into place.
+
+        Source codes resolve through the 'Maps to' relationships of their
+        concept (standard concepts without one map to themselves);
+        SOURCE_TO_CONCEPT_MAP entries take precedence over CONCEPT codes.
+        A code mapping to several standard concepts resolves to the lowest
+        concept_id.
+
+        Args:
+            vocabulary_dir: Directory with CONCEPT.csv and (optionally)
+                CONCEPT_RELATIONSHIP.csv and SOURCE_TO_CONCEPT_MAP.csv
+            index_dir: Directory to write the index to
+        """
+        vocabulary_dir = Path(vocabulary_dir)
+        index_dir = Path(index_dir)
+        concept_path = vocabulary_dir / cls.CONCEPT_FILE
+        if not concept_path.exists():
+            raise FileNotFoundError(f"Vocabulary file not found: {concept_path}")
+
+        domains: Dict[str, int] = {}
+        ids, codes, flags, hashes, check_hashes = [], [], [], [], []
+        columns = ['concept_id', 'domain_id', 'vocabulary_id', 'standard_concept', 'concept_code']
+        for chunk in cls._read_chunks(concept_path, columns):
+            chunk_codes, uniques = pd.factorize(chunk['domain_id'])
+            lookup = np.array([domains.setdefault(domain, len(domains)) for domain in uniques], dtype=np.int64)
+            ids.append(chunk['concept_id'].to_numpy(dtype=np.int64))
+            codes.append(lookup[chunk_codes] if len(lookup) else chunk_codes)
+            flags.append(chunk['standard_concept'].str[:1].to_numpy(dtype='S1'))
+            hashes.append(cls.source_keys(chunk['vocabulary_id'], chunk['concept_code']))
+            check_hashes.append(cls.source_keys(chunk['vocabulary_id'], chunk['concept_code'], cls.CHECK_HASH_KEY))
+
+        concept_ids = np.concatenate(ids) if ids else np.array([], dtype=np.int64)
+        standard = np.concatenate(flags) if flags else np.array([], dtype='S1')
+        order = np.argsort(concept_ids, kind='stable')
+        arrays = {
+            'concept_id': concept_ids[order],
+            'domain': (np.concatenate(codes)[order] if codes else np.array([], dtype=np.int64)).astype(
+                np.min_scalar_type(max(len(domains) - 1, 0))),
+            'standard_concept': standard[order]
+        }
+
+        maps_from, maps_to = [], []
+        relationship_path = vocabulary_dir / cls.RELATIONSHIP_FILE
+        if relationship_path.exists():
+            columns = ['concept_id_1', 'concept_id_2', 'relationship_id', 'invalid_reason']
+            for chunk in cls._read_chunks(relationship_path, columns):
+                current = (chunk['relationship_id'] == 'Maps to') & (chunk['invalid_reason'] == '')
+                maps_from.append(chunk['concept_id_1'].to_numpy(dtype=np.int64)[current])
+                maps_to.append(chunk['concept_id_2'].to_numpy(dtype=np.int64)[current])
+        maps_from = np.concatenate(maps_from) if maps_from else np.array([], dtype=np.int64)
+        maps_to = np.concatenate(maps_to) if maps_to else np.array([], dtype=np.int64)
+        order = np.lexsort((maps_to, maps_from))
+        arrays['maps_from'] = maps_from[order]
+        arrays['maps_to'] = maps_to[order]
+
+        # Standard concept of each CONCEPT code, then the SOURCE_TO_CONCEPT_MAP codes
+        targets = _first_match(arrays['maps_from'], arrays['maps_to'], concept_ids)
+        targets = np.where((targets == 0) & (standard == b'S'), concept_ids, targets)
+        source_hashes = [np.concatenate(hashes) if hashes else np.array([], dtype=np.uint64)]
+        source_checks = [np.concatenate(check_hashes) if check_hashes else np.array([], dtype=np.uint64)]
+        source_targets = [targets]
+        priorities = [np.ones(len(targets), dtype=np.int8)]
+        source_map_path = vocabulary_dir / cls.SOURCE_MAP_FILE
+        if source_map_path.exists():
+            columns = ['source_code', 'source_vocabulary_id', 'target_concept_id', 'invalid_reason']
+            for chunk in cls._read_chunks(source_map_path, columns):
+                chunk = chunk[chunk['invalid_reason'] == '']
+                source_hashes.append(cls.source_keys(chunk['source_vocabulary_id'], chunk['source_code']))
+                source_checks.append(cls.source_keys(chunk['source_vocabulary_id'], chunk['source_code'],
+                                                     cls.CHECK_HASH_KEY))
+                source_targets.append(chunk['target_concept_id'].to_numpy(dtype=np.int64))
+                priorities.append(np.zeros(len(chunk), dtype=np.int8))
+        arrays['source_hash'], arrays['source_concept'] = cls._source_index(
+            np.concatenate(source_hashes), np.concatenate(source_checks),
+            np.concatenate(source_targets), np.concatenate(priorities)
+        )
+
+        index_dir.parent.mkdir(parents=True, exist_ok=True)
+        build_dir = Path(tempfile.mkdtemp(prefix=f".{index_dir.name}.", dir=index_dir.parent))
+        try:
+            for name, array in arrays.items():
+                np.save(build_dir / f"{name}.npy", array)
+            with open(build_dir / cls.INDEX_MANIFEST, 'w') as f:
+                json.dump({
+                    'version': cls.INDEX_VERSION,
+                    'sources': cls._source_stats(vocabulary_dir),
+                    'domains': list(domains),
+                    'concepts': len(arrays['concept_id']),
+                    'mapsTo': len(arrays['maps_from']),
+                    'sourceCodes': len(arrays['source_hash']),
+                    'hashProbe': cls._hash_probe()
+                }, f, indent=2)
+            if index_dir.exists():
+                shutil.rmtree(index_dir)
+            os.replace(build_dir, index_dir)
+        except BaseException:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+        # Indexes opened from the replaced files are stale
+        cls._indexes.pop(index_dir, None)
+
+    @classmethod
+    def _source_stats(cls, vocabulary_dir: Path) -> Dict[str, Optional[Dict]]:
+        """Size and modification time of each vocabulary file (None when absent)."""
+        stats = {}
+        for file_name in (cls.CONCEPT_FILE, cls.RELATIONSHIP_FILE, cls.SOURCE_MAP_FILE):
+            path = Path(vocabulary_dir) / file_name
+            if path.exists():
+                stat = path.stat()
+                stats[file_name] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            else:
+                stats[file_name] = None
+        return stats
+
+    @classmethod
+    def source_keys(cls, vocabulary: Union[str, pd.Series], codes: pd.Series,
+                    hash_key: Optional[str] = None) -> np.ndarray:
+        """Hash (vocabulary_id, code) pairs into source code index keys.
+
+        Args:
+            vocabulary: vocabulary_id, or a column of them aligned with codes
+            codes: Source codes (surrounding whitespace is ignored)
+            hash_key: 16-character siphash key (default: HASH_KEY)
+
+        Returns:
+            uint64 array of keys
+        """
+        keys = vocabulary + '\x1f' + codes.astype(str).str.strip()
+        return pd.util.hash_array(keys.to_numpy(dtype=object), hash_key=hash_key or cls.HASH_KEY,
+                                  categorize=False)
+
+    @classmethod
+    def _hash_probe(cls) -> int:
+        """Key of a fixed code, so an index hashed differently is rebuilt."""
+        return int(cls.source_keys('probe', pd.Series(['probe']))[0])
+
+    @staticmethod
+    def _source_index(hashes: np.ndarray, check_hashes: np.ndarray, targets: np.ndarray,
+                      priorities: np.ndarray) -> tuple:
+        """Reduce source code entries to one standard concept per key.
+
+        Args:
+            hashes: Source code keys
+            check_hashes: Keys of the same codes under the check hash key
+            targets: Standard concept_id of each entry (0 when unmapped)
+            priorities: 0 for SOURCE_TO_CONCEPT_MAP entries, 1 for CONCEPT codes
+
+        Returns:
+            (sorted unique keys, concept_id per key) tuple
+        """
+        mapped = targets != 0
+        hashes, check_hashes, targets, priorities = (
+            hashes[mapped], check_hashes[mapped], targets[mapped], priorities[mapped])
+        order = np.lexsort((targets, priorities, hashes))
+        hashes, check_hashes, targets = hashes[order], check_hashes[order], targets[order]
+        first = np.concatenate(([True], hashes[1:] != hashes[:-1])) if len(hashes) else np.array([], dtype=bool)
+        # Entries sharing a key must be the same code
+        group_start = np.maximum.accumulate(np.where(first, np.arange(len(hashes)), 0))
+        if (check_hashes != check_hashes[group_start]).any():
+            raise ValueError("Source code hash collision; rebuild with a different VocabularyIndex.HASH_KEY")
+        return hashes[first], targets[first]
+
+    @classmethod
+    def _read_chunks(cls, path: Path, columns: List[str]):
+        """Read columns of an Athena export in chunks.
+
+        Athena writes tab-delimited files without quoting (concept names
+        contain bare quotes); comma-delimited exports are read with quoting.
+
+        Args:
+            path: Vocabulary CSV
+            columns: Columns to read
+
+        Returns:
+            Iterator of DataFrames, ID columns as int64 and the rest as text
+            with empty strings for missing values
+        """
+        with open(path, encoding='utf-8') as f:
+            header = f.readline()
+        delimiter = '\t' if '\t' in header else ','
+        dtypes = {column: (np.int64 if 'concept_id' in column else str) for column in columns}
+        return pd.read_csv(path, sep=delimiter, usecols=columns, dtype=dtypes, keep_default_na=False,
+                           quoting=csv.QUOTE_NONE if delimiter == '\t' else csv.QUOTE_MINIMAL,
+                           chunksize=cls.CHUNK_ROWS)
+
+    def lookup(self, concept_ids: np.ndarray) -> np.ndarray:
+        """Find concepts in the index.
+
+        Args:
+            concept_ids: int64 array of concept_ids
+
+        Returns:
+            Positions into the concept arrays, -1 where the concept is unknown
+        """
+        if not len(self.concept_ids):
+            return np.full(len(concept_ids), -1, dtype=np.int64)
+        positions = np.searchsorted(self.concept_ids, concept_ids)
+        positions = np.minimum(positions, len(self.concept_ids) - 1)
+        return np.where(self.concept_ids[positions] == concept_ids, positions, -1)
+
+    def check_concepts(self, values: pd.Series, domain: Optional[str] = None) -> Dict[str, int]:
+        """Count the values of a concept column that the vocabulary rejects.
+
+        Each distinct concept_id is looked up once. Values that are not
+        integers are left to the datatype check, and concept 0 is accepted.
+
+        Args:
+            values: Column of concept_ids
+            domain: Domain the concepts must belong to (e.g. 'Condition');
+                concepts of a domain-bound field must also be standard
+
+        Returns:
+            Dictionary of unknown, domain and non_standard counts
+        """
+        counts = {'unknown': 0, 'domain': 0, 'non_standard': 0}
+        present = values.dropna()
+        if not len(present):
+            return counts
+        if pd.api.types.is_integer_dtype(present) and not pd.api.types.is_bool_dtype(present):
+            ids = present.to_numpy(dtype=np.int64)
+        else:
+            numbers = pd.to_numeric(present, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            ids = numbers[(numbers == np.floor(numbers)) & (np.abs(numbers) < 2 ** 63)].astype(np.int64)
+        distinct, occurrences = np.unique(ids[ids != self.NO_MATCHING_CONCEPT], return_counts=True)
+
+        positions = self.lookup(distinct)
+        found = positions >= 0
+        counts['unknown'] = int(occurrences[~found].sum())
+        if domain is not None:
+            positions = positions[found]
+            occurrences = occurrences[found]
+            code = self.domains.index(domain) if domain in self.domains else -1
+            counts['domain'] = int(occurrences[self.domain_codes[positions] != code].sum())
+            counts['non_standard'] = int(occurrences[self.standard[positions] != b'S'].sum())
+        return counts
+
+    def maps_to(self, concept_ids: np.ndarray) -> np.ndarray:
+        """Map concepts to standard concepts through 'Maps to' relationships.
+
+        Args:
+            concept_ids: int64 array of concept_ids
+
+        Returns:
+            int64 array of the mapped concept_ids (the lowest when a concept
+            maps to several), 0 where a concept has no mapping
+        """
+        return _first_match(self.maps_from, self.maps_to_ids, concept_ids)
+
+    def map_source_codes(self, codes: pd.Series, vocabularies: List[str]) -> np.ndarray:
+        """Map source codes to standard concepts.
+
+        Args:
+            codes: Non-null source codes, ideally distinct
+            vocabularies: vocabulary_ids to look codes up in, in order of
+                preference
+
+        Returns:
+            int64 array of standard concept_ids, 0 where a code has no mapping
+        """
+        mapped = np.zeros(len(codes), dtype=np.int64)
+        for vocabulary in vocabularies:
+            pending = mapped == 0
+            if not pending.any():
+                break
+            keys = self.source_keys(vocabulary, codes[pending])
+            mapped[pending] = _first_match(self.source_hashes, self.source_concepts, keys)
+        return mapped
+
+
+def _first_match(keys: np.ndarray, values: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Look queries up in a sorted key array.
+
+    Args:
+        keys: Sorted keys (repeats allowed)
+        values: Value of each key
+        queries: Keys to look up
+
+    Returns:
+        Value of the first matching key per query, 0 where there is none
+    """
+    found = np.zeros(len(queries), dtype=np.int64)
+    if not len(keys):
+        return found
+    positions = np.searchsorted(keys, queries)
+    inside = positions < len(keys)
+    hit = np.zeros(len(queries), dtype=bool)
+    hit[inside] = keys[positions[inside]] == queries[inside]
+    found[hit] = values[positions[hit]]
+    return found
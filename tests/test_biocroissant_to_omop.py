@@ -2,19 +2,37 @@
 """Test suite for Bio-Croissant to OMOP CDM converter."""
 
 import unittest
+import io
+import hashlib
 import json
 import tempfile
 import shutil
 from pathlib import Path
+import numpy as np
 import pandas as pd
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 from src.biocroissant_to_omop import (
     BioCroissantParser,
     OMOPTableMapper,
     DataExtractor,
+    ChecksumError,
+    DistributionCache,
     OMOPValidator,
-    OMOPExporter,
+    ValueDomainRegistry,
+    RecordSetAssembler,
     BioCroissantToOMOPConverter
 )
+from src.omop_export import OMOPExporter, SQLTableWriter
+from src.omop_keys import KeyIndex, TableKeys, PrimaryKeyChecker
+from src.omop_profile import ColumnProfile, TableProfiler
+from src.omop_vocabulary import VocabularyIndex
 
 
 class TestBioCroissantParser(unittest.TestCase):
@@ -78,6 +96,33 @@ class TestBioCroissantParser(unittest.TestCase):
         self.assertEqual(len(distributions), 1)
         self.assertEqual(distributions[0]['contentUrl'], 'data/person.csv')
 
+    def test_compiled_metadata_indexes(self):
+        """Test @id lookups and foreign key resolution on compiled metadata."""
+        self.test_metadata['recordSet'].append({
+            "@id": "condition_occurrence",
+            "name": "CONDITION_OCCURRENCE",
+            "field": [{
+                "@id": "condition_occurrence/person_id",
+                "name": "person_id",
+                "omop:foreignKeyTable": "PERSON",
+                "references": {"@id": "person/person_id"}
+            }]
+        })
+        compiled = self.parser.parse(self.test_metadata)
+
+        self.assertIs(self.parser.parse(compiled), compiled)
+        self.assertEqual(self.parser.get_distribution_by_id(compiled, 'person_csv')['contentUrl'],
+                         'data/person.csv')
+        self.assertEqual(compiled.recordset_index['person'].key_fields[0].name, 'person_id')
+
+        fk_field = compiled.field_index['condition_occurrence/person_id']
+        self.assertEqual(compiled.foreign_keys, [fk_field])
+        self.assertIs(fk_field.references, compiled.field_index['person/person_id'])
+        self.assertEqual(fk_field.references.recordset.omop_table, 'PERSON')
+        self.assertEqual(compiled.foreign_key_references, [{
+            'table': 'CONDITION_OCCURRENCE', 'field': 'person_id', 'ref_table': 'PERSON', 'ref_field': 'person_id'
+        }])
+
 
 class TestOMOPTableMapper(unittest.TestCase):
     """Test mapping Bio-Croissant recordSets to OMOP tables."""
@@ -159,6 +204,254 @@ class TestDataExtractor(unittest.TestCase):
         df = self.extractor.extract_from_distribution(distribution)
         self.assertEqual(len(df), 3)
 
+    def test_iter_distribution_in_chunks(self):
+        """Test streaming a distribution in bounded-size chunks."""
+        distribution = {
+            "@id": "person_csv",
+            "contentUrl": str(self.test_csv),
+            "encodingFormat": "text/csv"
+        }
+        chunks = list(self.extractor.iter_distribution(distribution, chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+
+    def test_compressed_distributions(self):
+        """Test reading gzip and bz2 CSV detected from suffix, MIME type and magic bytes."""
+        df = pd.read_csv(self.test_csv)
+        gzip_csv = Path(self.temp_dir) / "person_shard"
+        df.to_csv(gzip_csv, index=False, compression='gzip')
+        bz2_csv = Path(self.temp_dir) / "person.csv.bz2"
+        df.to_csv(bz2_csv, index=False)
+
+        distributions = [
+            ({"@id": "magic", "contentUrl": str(gzip_csv), "encodingFormat": "text/csv"}, 'gzip'),
+            ({"@id": "suffix", "contentUrl": str(bz2_csv), "encodingFormat": "text/csv"}, 'bz2'),
+            ({"@id": "mime", "contentUrl": str(bz2_csv), "encodingFormat": "application/x-bzip2"}, 'bz2'),
+        ]
+        for distribution, codec in distributions:
+            self.assertEqual(self.extractor.detect_compression(distribution, Path(distribution['contentUrl'])),
+                             codec)
+            pd.testing.assert_frame_equal(self.extractor.extract_from_distribution(distribution), df)
+            chunks = list(self.extractor.iter_distribution(distribution, chunk_size=2))
+            self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+
+    def test_verifies_sha256_while_reading(self):
+        """Test sha256 verification of streamed, compressed and mismatched files."""
+        gzip_csv = Path(self.temp_dir) / "person.csv.gz"
+        pd.read_csv(self.test_csv).to_csv(gzip_csv, index=False, compression='gzip')
+        with open(gzip_csv, 'rb') as f:
+            sha256 = hashlib.sha256(f.read()).hexdigest()
+
+        extractor = DataExtractor(verify_checksums='error')
+        chunks = list(extractor.iter_csv(gzip_csv, 2, compression='infer', sha256=sha256))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertTrue(extractor.checksums[str(gzip_csv)]['valid'])
+
+        with self.assertRaisesRegex(ChecksumError, 'sha256 mismatch'):
+            extractor.read_csv(self.test_csv, sha256='0' * 64)
+        # A file that failed verification fails every later read without rereading it
+        with self.assertRaisesRegex(ChecksumError, 'sha256 mismatch'):
+            extractor.read_csv(self.test_csv, sha256='0' * 64)
+        # A mismatch is not mistaken for a typed value that failed to parse
+        read_plan = extractor.build_read_plan([{'name': 'person_id', 'dataType': 'sc:Integer'}], project=True)
+        other_csv = Path(self.temp_dir) / "other.csv"
+        shutil.copy(self.test_csv, other_csv)
+        with self.assertRaisesRegex(ChecksumError, 'sha256 mismatch'):
+            list(extractor.iter_csv(other_csv, 2, read_plan, sha256='0' * 64))
+
+        warning_extractor = DataExtractor(verify_checksums='warn')
+        with self.assertWarnsRegex(UserWarning, 'sha256 mismatch'):
+            df = warning_extractor.read_csv(self.test_csv, sha256='0' * 64)
+        self.assertEqual(len(df), 3)
+
+        # FileSet shards declare no sha256, so they cannot be verified
+        file_set = {"@type": "cr:FileSet", "@id": "person_shards", "encodingFormat": "text/csv",
+                    "includes": "person.csv"}
+        with self.assertRaisesRegex(ChecksumError, 'FileSet person_shards cannot be verified'):
+            extractor.extract_from_distribution(file_set, Path(self.temp_dir))
+        with self.assertWarnsRegex(UserWarning, 'FileSet person_shards cannot be verified'):
+            chunks = list(warning_extractor.iter_distribution(file_set, Path(self.temp_dir), chunk_size=2))
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 3)
+
+    def test_file_set_shards_read_as_one_table(self):
+        """Test reading a FileSet of compressed CSV shards in shard order."""
+        shard_dir = Path(self.temp_dir) / "person_shards"
+        shard_dir.mkdir()
+        df = pd.DataFrame({'person_id': range(10), 'year_of_birth': range(1950, 1960)})
+        for i, start in enumerate(range(0, 10, 4)):
+            df.iloc[start:start + 4].to_csv(shard_dir / f"part-{i:05d}.csv.gz", index=False)
+        (shard_dir / "_SUCCESS").touch()
+
+        distribution = {
+            "@type": "cr:FileSet",
+            "@id": "person_shards",
+            "encodingFormat": "text/csv",
+            "includes": "person_shards/part-*.csv.gz"
+        }
+        extractor = DataExtractor(read_workers=2)
+        self.assertEqual(len(extractor.resolve_files(distribution, Path(self.temp_dir))), 3)
+        pd.testing.assert_frame_equal(extractor.extract_from_distribution(distribution, Path(self.temp_dir)), df)
+
+        chunks = list(extractor.iter_distribution(distribution, Path(self.temp_dir), chunk_size=3))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 1, 3, 1, 2])
+        self.assertEqual(pd.concat(chunks)['person_id'].tolist(), list(range(10)))
+
+        # A FileSet whose shards hold no rows yields one empty chunk in the plan's shape
+        read_plan = extractor.build_read_plan([{'name': 'person_id', 'dataType': 'sc:Integer'}], project=True,
+                                              filters=[('year_of_birth', '>', 2000)])
+        chunks = list(extractor.iter_distribution(distribution, Path(self.temp_dir), 3, read_plan))
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(list(chunks[0].columns), ['person_id'])
+        self.assertEqual(len(chunks[0]), 0)
+
+    def test_read_plan_projects_and_types_columns(self):
+        """Test reading only referenced columns with dtypes from dataType."""
+        wide_csv = Path(self.temp_dir) / "visits.csv"
+        pd.DataFrame({
+            'encounter_id': [10, 11],
+            'unused_a': ['x', 'y'],
+            'patient': [1, 2],
+            'admit_date': ['2020-01-01', '2020-02-03'],
+            'unused_b': [1.5, 2.5]
+        }).to_csv(wide_csv, index=False)
+        fields = [
+            {"name": "visit_occurrence_id", "dataType": "sc:Integer",
+             "source": {"extract": {"column": "encounter_id"}}},
+            {"name": "person_id", "dataType": "sc:Integer",
+             "source": {"extract": {"column": "patient"}}},
+            {"name": "visit_start_date", "dataType": "sc:Date",
+             "source": {"extract": {"column": "admit_date"}}}
+        ]
+        read_plan = self.extractor.build_read_plan(fields)
+        df = self.extractor.read_csv(wide_csv, read_plan)
+
+        self.assertEqual(list(df.columns), ['visit_occurrence_id', 'person_id', 'visit_start_date'])
+        self.assertEqual(str(df['person_id'].dtype), 'Int64')
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['visit_start_date']))
+
+    @unittest.skipIf(pyarrow is None, "pyarrow not installed")
+    def test_read_parquet_with_projection_and_filters(self):
+        """Test streaming Parquet row groups with pushed-down filters."""
+        parquet_path = Path(self.temp_dir) / "person.parquet"
+        pd.DataFrame({
+            'person_id': range(1, 11),
+            'year_of_birth': range(1950, 1960),
+            'notes': ['x'] * 10
+        }).to_parquet(parquet_path, index=False, row_group_size=3)
+        distribution = {
+            "@id": "person_parquet",
+            "contentUrl": str(parquet_path),
+            "encodingFormat": "application/x-parquet"
+        }
+        read_plan = self.extractor.build_read_plan(
+            [{"name": "person_id", "dataType": "sc:Integer"},
+             {"name": "year_of_birth", "dataType": "sc:Integer"}],
+            filters=[('year_of_birth', '>=', 1955)]
+        )
+
+        df = self.extractor.extract_from_distribution(distribution, read_plan=read_plan)
+        self.assertEqual(list(df.columns), ['person_id', 'year_of_birth'])
+        self.assertEqual(list(df['person_id']), [6, 7, 8, 9, 10])
+
+        chunks = list(self.extractor.iter_distribution(distribution, chunk_size=2, read_plan=read_plan))
+        self.assertTrue(all(len(chunk) <= 2 for chunk in chunks))
+        self.assertEqual(list(pd.concat(chunks)['person_id']), [6, 7, 8, 9, 10])
+
+    def test_csv_row_filters_match_parquet_semantics(self):
+        """Test that row filters also apply to CSV reads."""
+        read_plan = self.extractor.build_read_plan(
+            [{"name": "person_id"}],
+            filters=[[('gender_concept_id', '=', 8532)], [('year_of_birth', '<', 1976)]]
+        )
+        df = self.extractor.read_csv(self.test_csv, read_plan)
+        self.assertEqual(list(df.columns), ['person_id'])
+        self.assertEqual(list(df['person_id']), [2, 3])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow not installed")
+    def test_arrow_csv_engine_matches_pandas(self):
+        """Test that the arrow CSV engine reads the same frames as pandas."""
+        visits_csv = Path(self.temp_dir) / "visits.csv.gz"
+        pd.DataFrame({
+            'encounter_id': [10, 11, 12, 13, 14],
+            'patient': pd.array([1, None, 2, 3, 3], dtype='Int64'),
+            'admit_date': ['2020-01-01', '2020-02-03', None, '2021-05-06', '2022-07-08'],
+            'discharged': ['2020-01-02', '2020-02-05', '2020-03-01', None, '2022-07-09'],
+            'note': ['a', '', 'NA', 'b', 'c']
+        }).to_csv(visits_csv, index=False)
+        fields = [
+            {"name": "visit_occurrence_id", "dataType": "sc:Integer",
+             "source": {"extract": {"column": "encounter_id"}}},
+            {"name": "person_id", "dataType": "sc:Integer",
+             "source": {"extract": {"column": "patient"}}},
+            {"name": "visit_start_date", "dataType": "sc:Date",
+             "source": {"extract": {"column": "admit_date"}}}
+        ]
+        arrow_extractor = DataExtractor(csv_engine='arrow')
+        for project in (True, False):
+            read_plan = self.extractor.build_read_plan(fields, project, [('encounter_id', '!=', 11)])
+            expected = self.extractor.read_csv(visits_csv, read_plan).reset_index(drop=True)
+            pd.testing.assert_frame_equal(arrow_extractor.read_csv(visits_csv, read_plan), expected)
+
+            chunks = list(arrow_extractor.iter_csv(visits_csv, 2, read_plan))
+            expected_chunks = list(self.extractor.iter_csv(visits_csv, 2, read_plan))
+            self.assertEqual([len(chunk) for chunk in chunks], [len(chunk) for chunk in expected_chunks])
+            pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+
+
+class TestDistributionCache(unittest.TestCase):
+    """Test the LRU distribution read cache."""
+
+    def test_evicts_least_recently_used_entry(self):
+        """Test that entries are evicted in LRU order when over budget."""
+        frame = pd.DataFrame({'person_id': range(100)})
+        size = int(frame.memory_usage(deep=True).sum())
+        cache = DistributionCache(budget_bytes=2 * size)
+
+        cache.put(('a', None), {'header': ['person_id'], 'frame': frame})
+        cache.put(('b', None), {'header': ['person_id'], 'frame': frame})
+        cache.get(('a', None))
+        cache.put(('c', None), {'header': ['person_id'], 'frame': frame})
+
+        self.assertIsNotNone(cache.get(('a', None)))
+        self.assertIsNone(cache.get(('b', None)))
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.bytes, 2 * size)
+
+
+class TestRecordSetAssembler(unittest.TestCase):
+    """Test joining recordSet pieces from several distributions."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.encounters = pd.DataFrame({
+            'visit_occurrence_id': [3, 1, 2, 4],
+            'person_id': [30, 10, 20, 40]
+        })
+        self.locations = pd.DataFrame({
+            'visit_occurrence_id': [1, 2, 3],
+            'care_site_id': [100, 200, 300]
+        })
+        self.assembler = RecordSetAssembler(partitions=3)
+
+    def test_join_in_memory(self):
+        """Test the in-memory hash join keeps every driving row."""
+        joined = self.assembler.join([self.encounters, self.locations], ['visit_occurrence_id'])
+        self.assertEqual(list(joined['visit_occurrence_id']), [3, 1, 2, 4])
+        self.assertEqual(list(joined['care_site_id'].fillna(-1)), [300, 100, 200, -1])
+
+    def test_out_of_core_join_matches_in_memory(self):
+        """Test the partitioned join produces the same rows, in the same order, in bounded chunks."""
+        def chunks(df):
+            return (df.iloc[i:i + 2] for i in range(0, len(df), 2))
+
+        chunked = list(self.assembler.iter_join(
+            [chunks(self.encounters), chunks(self.locations)],
+            ['visit_occurrence_id'],
+            chunk_size=2
+        ))
+        self.assertTrue(all(len(chunk) <= 2 for chunk in chunked))
+        expected = self.assembler.join([self.encounters, self.locations], ['visit_occurrence_id'])
+        pd.testing.assert_frame_equal(pd.concat(chunked, ignore_index=True), expected)
+
 
 class TestOMOPValidator(unittest.TestCase):
     """Test OMOP CDM validation."""
@@ -201,6 +494,271 @@ class TestOMOPValidator(unittest.TestCase):
         self.assertFalse(is_valid)
         self.assertIn('gender_concept_id', errors[0])
 
+    def test_validate_table_uses_cdm_specification(self):
+        """Test spec-driven checks on a table outside the original six."""
+        df = pd.DataFrame({
+            'measurement_id': [1, 2, 2],
+            'person_id': [1, None, 3],
+            'measurement_concept_id': [3004249, 3004249, 3004249],
+            'measurement_date': ['2020-01-01', '2020-02-30', '2020-03-01'],
+            'measurement_type_concept_id': [32817, 32817, 32817],
+            'value_as_number': ['120', 'high', '80']
+        })
+        is_valid, errors = self.validator.validate_table('MEASUREMENT', df)
+        self.assertFalse(is_valid)
+        self.assertEqual(errors, [
+            "Primary key 'measurement_id' contains 1 duplicate values",
+            "Required field 'person_id' contains 1 null values",
+            "Field 'measurement_date' contains 1 values that are not valid date",
+            "Field 'value_as_number' contains 1 values that are not valid float"
+        ])
+
+    def test_streaming_validator_carries_primary_key_state(self):
+        """Test that duplicate primary keys are detected across chunks."""
+        table_validator = self.validator.table_validator('PERSON')
+        table_validator.update(pd.DataFrame({'person_id': [1, 2]}))
+        table_validator.update(pd.DataFrame({'person_id': [2, 3, 3]}))
+        is_valid, errors = table_validator.finish()
+        self.assertFalse(is_valid)
+        self.assertIn("Primary key 'person_id' contains 2 duplicate values", errors)
+
+    def test_streaming_validator_checks_value_domains(self):
+        """Test enumerated and range value domains, resolving registered domains by @id."""
+        registry = ValueDomainRegistry.load()
+        value_domains = {
+            'gender_concept_id': registry.compile({'@id': 'vd:OMOPGenderConceptID', 'iso11179:permissibleValues': [
+                {'value': 8507, 'meaning': 'Male'}, {'value': 8532, 'meaning': 'Female'}]}),
+            'race_concept_id': registry.compile({'@id': 'vd:OMOPConceptID'}),
+            'year_of_birth': registry.compile({'iso11179:minimumValue': 1900, 'iso11179:maximumValue': 2025})
+        }
+        self.assertIsNone(registry.compile({'@id': 'vd:Unregistered'}))
+        self.assertEqual(value_domains['race_concept_id'].minimum, 0)
+
+        table_validator = self.validator.table_validator('PERSON', value_domains)
+        table_validator.update(pd.DataFrame({'person_id': [1, 2], 'gender_concept_id': [8507, 9999],
+                                             'race_concept_id': [8527, -1], 'year_of_birth': [1980, 1850]}))
+        table_validator.update(pd.DataFrame({'person_id': [3], 'gender_concept_id': [None],
+                                             'race_concept_id': [8516], 'year_of_birth': [2030]}))
+        is_valid, errors = table_validator.finish()
+        self.assertFalse(is_valid)
+        self.assertEqual(table_validator.domain_violations,
+                         {'gender_concept_id': 1, 'race_concept_id': 1, 'year_of_birth': 2})
+        self.assertIn("Field 'gender_concept_id' contains 1 values outside value domain vd:OMOPGenderConceptID",
+                      errors)
+
+    def test_primary_key_checker_spills_sparse_keys(self):
+        """Test exact duplicate counts from the bitmap and from spilled partitions."""
+        dense = PrimaryKeyChecker()
+        dense.update(pd.Series([1, 2, 3, 3]))
+        dense.update(pd.Series([2, 4, None]))
+        self.assertIsNotNone(dense.bitmap)
+        self.assertEqual(dense.finish(), (2, [3, 2]))
+        self.assertEqual(dense.null_count, 1)
+
+        spill_dir = tempfile.mkdtemp()
+        try:
+            sparse = PrimaryKeyChecker(memory_bytes=16, partitions=4, spill_dir=Path(spill_dir))
+            for chunk in [[1, 10 ** 15, 7], ['7', 'a', 'a'], [10 ** 15, 9]]:
+                sparse.update(pd.Series(chunk))
+            self.assertIsNone(sparse.bitmap)
+            duplicate_count, sample = sparse.finish()
+            self.assertEqual(duplicate_count, 3)
+            self.assertEqual(sorted(sample, key=str), [10 ** 15, 7, 'a'])
+            self.assertEqual(list(Path(spill_dir).iterdir()), [])
+
+            text = PrimaryKeyChecker(memory_bytes=16, partitions=4, spill_dir=Path(spill_dir))
+            for chunk in [['slide-a', 'slide-b'], ['slide-c', 'slide-a'], ['slide-b', 'slide-a']]:
+                text.update(pd.Series(chunk))
+            spilled = [np.load(path, allow_pickle=False) for path in Path(spill_dir).glob('*/p*.npy')]
+            self.assertTrue(spilled)
+            self.assertTrue(all(keys.dtype == PrimaryKeyChecker.HASHED_KEY_DTYPE for keys in spilled))
+            self.assertEqual(text.finish(), (3, ['slide-a', 'slide-b']))
+        finally:
+            shutil.rmtree(spill_dir)
+
+    def test_key_index_uses_bitmap_or_sorted_keys(self):
+        """Test key membership for dense, sparse and text keys."""
+        dense = KeyIndex()
+        dense.add(pd.Series([3, 1, 2]))
+        dense.add(pd.Series([4.0, None]))
+        dense.build()
+        self.assertIsNotNone(dense.bitmap)
+        self.assertEqual(dense.contains(np.array([0, 1, 4, 5])).tolist(), [False, True, True, False])
+        self.assertEqual(dense.contains(np.array(['2', '2.5', 'x'], dtype=object)).tolist(), [True, False, False])
+
+        sparse = KeyIndex()
+        sparse.add(pd.Series([1, 10 ** 12]))
+        sparse.build()
+        self.assertIsNone(sparse.bitmap)
+        self.assertEqual(sparse.contains(np.array([10 ** 12, 2])).tolist(), [True, False])
+
+        text = KeyIndex()
+        text.add(pd.Series(['slide-1', 'slide-2']))
+        self.assertEqual(text.build().contains(np.array(['slide-2', 'slide-3'], dtype=object)).tolist(),
+                         [True, False])
+
+    def test_table_keys_round_trip_through_npz(self):
+        """Test that table keys collected from chunks survive save and load."""
+        keys = TableKeys(['person_id', 'slide_id'], ['parent_id'])
+        keys.update(pd.DataFrame({'person_id': [1, 2], 'slide_id': ['s-1', 's-2'], 'parent_id': [2, 9]}))
+        keys.update(pd.DataFrame({'person_id': [3, None], 'slide_id': ['s-3', None], 'parent_id': [9, None]}))
+        path = Path(tempfile.mkdtemp()) / "keys.npz"
+        try:
+            keys.finish().save(path)
+            loaded = TableKeys.load(path)
+        finally:
+            shutil.rmtree(path.parent)
+
+        self.assertTrue(loaded.covers(TableKeys(['person_id'], ['parent_id'])))
+        self.assertFalse(loaded.covers(TableKeys(['visit_id'])))
+        self.assertIsNotNone(loaded.indexes['person_id'].bitmap)
+        self.assertEqual(loaded.indexes['person_id'].contains(np.array([0, 3])).tolist(), [False, True])
+        self.assertEqual(loaded.indexes['slide_id'].contains(np.array(['s-3', 's-4'], dtype=object)).tolist(),
+                         [True, False])
+        values, counts = loaded.values['parent_id']
+        self.assertEqual((values.tolist(), counts.tolist()), ([2, 9], [1, 2]))
+
+
+class TestVocabularyIndex(unittest.TestCase):
+    """Test the memory-mapped OMOP vocabulary index."""
+
+    CONCEPTS = [
+        (8507, 'MALE', 'Gender', 'Gender', 'Gender', 'S', 'M', '19700101', '20991231', ''),
+        (8532, 'FEMALE', 'Gender', 'Gender', 'Gender', 'S', 'F', '19700101', '20991231', ''),
+        (8527, 'White', 'Race', 'Race', 'Race', 'S', '5', '19700101', '20991231', ''),
+        (201826, 'Type 2 diabetes mellitus', 'Condition', 'SNOMED', 'Clinical Finding', 'S', '44054006',
+         '19700101', '20991231', ''),
+        (45576876, 'Type 2 diabetes "mellitus"', 'Condition', 'ICD10CM', '3-char nonbill code', '', 'E11',
+         '19700101', '20991231', '')
+    ]
+
+    def setUp(self):
+        self.vocabulary_dir = Path(tempfile.mkdtemp())
+        self.write_concepts(self.CONCEPTS)
+        with open(self.vocabulary_dir / 'CONCEPT_RELATIONSHIP.csv', 'w') as f:
+            f.write('concept_id_1\tconcept_id_2\trelationship_id\tvalid_start_date\tvalid_end_date\tinvalid_reason\n')
+            f.write('45576876\t201826\tMaps to\t19700101\t20991231\t\n')
+            f.write('45576876\t8507\tMaps to\t19700101\t20991231\tD\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.vocabulary_dir)
+
+    def write_concepts(self, concepts):
+        header = ['concept_id', 'concept_name', 'domain_id', 'vocabulary_id', 'concept_class_id',
+                  'standard_concept', 'concept_code', 'valid_start_date', 'valid_end_date', 'invalid_reason']
+        with open(self.vocabulary_dir / 'CONCEPT.csv', 'w') as f:
+            f.write('\t'.join(header) + '\n')
+            for concept in concepts:
+                f.write('\t'.join(str(value) for value in concept) + '\n')
+
+    def test_builds_once_and_memory_maps_arrays(self):
+        """Test building, reusing and rebuilding the index and looking up mappings."""
+        index = VocabularyIndex.load(self.vocabulary_dir)
+        self.assertEqual(len(index), 5)
+        self.assertIsInstance(index.concept_ids, np.memmap)
+        self.assertIs(VocabularyIndex.load(self.vocabulary_dir), index)
+        self.assertEqual(index.lookup(np.array([8532, 8508])).tolist(), [2, -1])
+        self.assertEqual(index.maps_to(np.array([45576876, 201826])).tolist(), [201826, 0])
+
+        self.write_concepts(self.CONCEPTS + [(8516, 'Black', 'Race', 'Race', 'Race', 'S', '3',
+                                               '19700101', '20991231', '')])
+        rebuilt = VocabularyIndex.load(self.vocabulary_dir)
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(len(rebuilt), 6)
+        self.assertEqual(sorted(p.name for p in self.vocabulary_dir.iterdir()),
+                         ['CONCEPT.csv', 'CONCEPT_RELATIONSHIP.csv', 'omop_vocabulary_index'])
+
+    def test_validator_checks_concepts_and_domains(self):
+        """Test unknown, wrong-domain and non-standard concepts across chunks."""
+        validator = OMOPValidator(VocabularyIndex.load(self.vocabulary_dir))
+        table_validator = validator.table_validator('CONDITION_OCCURRENCE')
+        table_validator.update(pd.DataFrame({'condition_occurrence_id': [1, 2], 'person_id': [1, 1],
+                                             'condition_concept_id': [201826, 8507],
+                                             'condition_source_concept_id': [45576876, 0]}))
+        table_validator.update(pd.DataFrame({'condition_occurrence_id': [3, 4], 'person_id': [2, 2],
+                                             'condition_concept_id': [45576876, 12345],
+                                             'condition_source_concept_id': [None, 45576876]}))
+        is_valid, errors = table_validator.finish()
+        self.assertFalse(is_valid)
+        self.assertEqual(table_validator.concept_violations['condition_concept_id'],
+                         {'unknown': 1, 'domain': 1, 'non_standard': 1})
+        self.assertEqual(table_validator.concept_violations['condition_source_concept_id'],
+                         {'unknown': 0, 'domain': 0, 'non_standard': 0})
+        self.assertIn("Field 'condition_concept_id' contains 1 concept_ids not in the vocabulary", errors)
+        self.assertIn("Field 'condition_concept_id' contains 1 concepts outside domain Condition", errors)
+        self.assertIn("Field 'condition_concept_id' contains 1 non-standard concepts", errors)
+
+    def test_convert_maps_source_codes_to_standard_concepts(self):
+        """Test mapping ICD-10 and local codes through 'Maps to' and SOURCE_TO_CONCEPT_MAP."""
+        with open(self.vocabulary_dir / 'SOURCE_TO_CONCEPT_MAP.csv', 'w') as f:
+            f.write('source_code\tsource_concept_id\tsource_vocabulary_id\tsource_code_description\t'
+                    'target_concept_id\ttarget_vocabulary_id\tvalid_start_date\tvalid_end_date\tinvalid_reason\n')
+            f.write('DM2\t0\tLOCAL_DX\tDiabetes type 2\t201826\tSNOMED\t19700101\t20991231\t\n')
+            f.write('E11\t0\tLOCAL_DX\tRetired mapping\t8507\tGender\t19700101\t20991231\tD\n')
+        index = VocabularyIndex.load(self.vocabulary_dir)
+        self.assertEqual(index.map_source_codes(pd.Series(['E11', 'DM2', '8507']), ['ICD10CM', 'LOCAL_DX']).tolist(),
+                         [201826, 201826, 0])
+
+        data_dir = self.vocabulary_dir / 'data'
+        data_dir.mkdir()
+        pd.DataFrame({'id': [1, 2, 3, 4, 5], 'dx': ['E11', 'DM2', 'X99', None, 'X99']}).to_csv(
+            data_dir / 'conditions.csv', index=False)
+        metadata = {
+            'recordSet': [{'name': 'CONDITION_OCCURRENCE', 'field': [
+                {'name': 'id', 'omop:cdmField': 'condition_occurrence_id', 'dataType': 'sc:Integer',
+                 'source': {'fileObject': {'@id': 'conditions'}}},
+                {'name': 'dx', 'omop:cdmField': 'condition_concept_id', 'dataType': 'sc:Integer',
+                 'omop:sourceVocabulary': ['ICD10CM', 'LOCAL_DX'], 'source': {'fileObject': {'@id': 'conditions'}}}
+            ]}],
+            'distribution': [{'@id': 'conditions', 'contentUrl': str(data_dir / 'conditions.csv'),
+                              'encodingFormat': 'text/csv'}]
+        }
+        with open(data_dir / 'metadata.json', 'w') as f:
+            json.dump(metadata, f)
+
+        converter = BioCroissantToOMOPConverter(vocabulary_dir=self.vocabulary_dir)
+        result = converter.convert(data_dir / 'metadata.json', data_dir, validate=False, chunk_size=2)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['concept_mapping']['CONDITION_OCCURRENCE']['condition_concept_id'],
+                         {'codes': 4, 'mapped': 2, 'unmapped': 2, 'unmapped_codes': {'X99': 2}})
+        output = pd.read_csv(data_dir / 'CONDITION_OCCURRENCE.csv')
+        self.assertEqual(output['condition_concept_id'].tolist(), [201826, 201826, 0, 0, 0])
+
+        result = BioCroissantToOMOPConverter().convert(data_dir / 'metadata.json', data_dir, validate=False)
+        self.assertFalse(result['success'])
+        self.assertIn('no vocabulary is configured', result['errors'][0])
+
+
+class TestTableProfiler(unittest.TestCase):
+    """Test single-pass table profiling."""
+
+    def test_profile_chunks_and_merge(self):
+        """Test null rates, ranges, distinct counts and histograms across chunks."""
+        profiler = TableProfiler()
+        profiler.update(pd.DataFrame({'gender_concept_id': [8507, 8532, None], 'value': [0.5, 1.5, 2.5]}))
+        profiler.update(pd.DataFrame({'gender_concept_id': [8507.0], 'value': [99]}))
+        profile = profiler.finish()
+
+        self.assertEqual(profile['rowCount'], 4)
+        self.assertEqual(profile['completeness'], 0.875)
+        gender = profile['columns']['gender_concept_id']
+        self.assertEqual(gender['nullRate'], 0.25)
+        self.assertEqual(gender['approxDistinctCount'], 2)
+        self.assertEqual(gender['histogram'], {'values': [8507, 8532], 'counts': [2, 1]})
+        value = profile['columns']['value']
+        self.assertEqual((value['minimum'], value['maximum']), (0.5, 99))
+
+        numbers = ColumnProfile()
+        other = ColumnProfile()
+        numbers.update(pd.Series(np.arange(0, 50000)))
+        other.update(pd.Series(np.arange(25000, 100000)))
+        numbers.merge(other)
+        metrics = numbers.to_metrics()
+        self.assertEqual((metrics['minimum'], metrics['maximum']), (0, 99999))
+        self.assertAlmostEqual(metrics['approxDistinctCount'], 100000, delta=3000)
+        self.assertLessEqual(len(metrics['histogram']['counts']), ColumnProfile.HISTOGRAM_BINS)
+        self.assertEqual(sum(metrics['histogram']['counts']), 125000)
+
 
 class TestOMOPExporter(unittest.TestCase):
     """Test exporting to OMOP CDM format."""
@@ -228,6 +786,27 @@ class TestOMOPExporter(unittest.TestCase):
         result_df = pd.read_csv(output_path)
         self.assertEqual(len(result_df), 3)
 
+    def test_open_output_hashes_and_publishes_atomically(self):
+        """Test checksums of compressed output and that failed writes are never published."""
+        output_path = Path(self.temp_dir) / "PERSON.csv.gz"
+        with self.exporter.open_output(output_path, 'gzip', newline='') as f:
+            f.write('person_id\n1\n')
+            self.assertFalse(output_path.exists())
+
+        with open(output_path, 'rb') as f:
+            data = f.read()
+        self.assertEqual(self.exporter.outputs[str(output_path)],
+                         {'sha256': hashlib.sha256(data).hexdigest(), 'contentSize': len(data)})
+        self.assertEqual(pd.read_csv(output_path)['person_id'].tolist(), [1])
+        self.assertEqual(self.exporter.encoding_format(output_path), 'text/csv+gzip')
+
+        failed_path = Path(self.temp_dir) / "PERSON_data.sql"
+        with self.assertRaises(RuntimeError):
+            with self.exporter.open_output(failed_path) as f:
+                f.write('INSERT INTO PERSON')
+                raise RuntimeError('export failed')
+        self.assertEqual(sorted(path.name for path in Path(self.temp_dir).iterdir()), ['PERSON.csv.gz'])
+
     def test_generate_ddl(self):
         """Test generating SQL DDL for table."""
         table_schema = {
@@ -242,6 +821,124 @@ class TestOMOPExporter(unittest.TestCase):
         self.assertIn('person_id', ddl)
         self.assertIn('PRIMARY KEY', ddl)
 
+    def test_post_load_scripts_follow_cdm_spec(self):
+        """Test dialect types and the spec's keys and indexes in post-load scripts."""
+        person = {
+            'table_name': 'PERSON',
+            'fields': [
+                {'name': 'person_id', 'type': 'INTEGER', 'primary_key': True, 'nullable': False},
+                {'name': 'gender_concept_id', 'type': 'INTEGER'},
+                {'name': 'birth_datetime', 'type': 'TIMESTAMP'}
+            ]
+        }
+        condition = {
+            'table_name': 'CONDITION_OCCURRENCE',
+            'fields': [
+                {'name': 'condition_occurrence_id', 'type': 'INTEGER', 'primary_key': True},
+                {'name': 'person_id', 'type': 'INTEGER'},
+                {'name': 'condition_concept_id', 'type': 'INTEGER'}
+            ]
+        }
+        self.assertIn('birth_datetime DATETIME', self.exporter.generate_ddl(person, 'mysql'))
+        self.assertNotIn('PRIMARY KEY', self.exporter.generate_ddl(person, 'sqlite', include_constraints=False))
+
+        scripts = self.exporter.generate_post_load_scripts([person, condition], 'postgresql')
+        self.assertEqual(list(scripts), ['omop_primary_keys_postgresql.sql', 'omop_indices_postgresql.sql',
+                                         'omop_constraints_postgresql.sql'])
+        self.assertIn("ALTER TABLE PERSON ADD CONSTRAINT xpk_PERSON PRIMARY KEY (person_id);",
+                      scripts['omop_primary_keys_postgresql.sql'])
+        self.assertIn("CLUSTER PERSON USING idx_person_id;", scripts['omop_indices_postgresql.sql'])
+        # Only foreign keys between the loaded tables: CONCEPT is not among them
+        self.assertEqual(scripts['omop_constraints_postgresql.sql'],
+                         "ALTER TABLE CONDITION_OCCURRENCE ADD CONSTRAINT fpk_CONDITION_OCCURRENCE_person_id "
+                         "FOREIGN KEY (person_id) REFERENCES PERSON (person_id);\n")
+        self.assertNotIn('omop_constraints_sqlite.sql',
+                         self.exporter.generate_post_load_scripts([person, condition], 'sqlite'))
+
+    def test_insert_statements_quote_parsed_dates(self):
+        """Test that parsed dates are written as quoted ISO literals."""
+        df = pd.DataFrame({
+            'visit_occurrence_id': [1, 2],
+            'visit_start_date': pd.to_datetime(['2020-01-01', None])
+        })
+        statements = self.exporter.generate_insert_statements('VISIT_OCCURRENCE', df)
+        self.assertIn("(1, '2020-01-01')", statements[0])
+        self.assertIn("(2, NULL)", statements[0])
+
+    def test_write_insert_statements_streams_batches(self):
+        """Test streaming INSERT batches with per-column NULLs and escaping."""
+        import io
+
+        df = pd.DataFrame({
+            'person_id': pd.array([1, 2, None], dtype='Int64'),
+            'source_value': ["O'Brien", None, 'plain'],
+            'year_of_birth': [1980, 1990, 1975]
+        })
+        output = io.StringIO()
+        written = self.exporter.write_insert_statements('PERSON', df, output, batch_size=2)
+
+        self.assertTrue(written)
+        self.assertEqual(output.getvalue(), '\n\n'.join(
+            self.exporter.generate_insert_statements('PERSON', df, batch_size=2)
+        ))
+        self.assertEqual(output.getvalue(), (
+            "INSERT INTO PERSON (person_id, source_value, year_of_birth) VALUES\n"
+            "  (1, 'O''Brien', 1980),\n"
+            "  (2, NULL, 1990);\n"
+            "\n"
+            "INSERT INTO PERSON (person_id, source_value, year_of_birth) VALUES\n"
+            "  (NULL, 'plain', 1975);"
+        ))
+
+    def test_sql_table_writer_batches_across_chunks(self):
+        """Test that INSERT batches span chunk boundaries and a failed write publishes nothing."""
+        df = pd.DataFrame({'person_id': [1, 2, 3, 4, 5], 'year_of_birth': [1980, 1990, 1975, 1985, 1995]})
+        schema = {'table_name': 'PERSON', 'fields': [{'name': 'person_id', 'type': 'INTEGER', 'primary_key': True},
+                                                     {'name': 'year_of_birth', 'type': 'INTEGER'}]}
+        ddl_path = Path(self.temp_dir) / "PERSON_ddl.sql"
+        insert_path = Path(self.temp_dir) / "PERSON_data.sql"
+        with SQLTableWriter(self.exporter, ddl_path, insert_path, schema, batch_size=2) as writer:
+            for start in range(0, len(df), 3):
+                writer.write(df.iloc[start:start + 3])
+
+        self.assertEqual(writer.declared_schema, schema)
+        self.assertEqual(ddl_path.read_text(), self.exporter.generate_ddl(schema))
+        self.assertEqual(insert_path.read_text(), '\n\n'.join(
+            self.exporter.generate_insert_statements('PERSON', df, batch_size=2)
+        ))
+
+        failed_path = Path(self.temp_dir) / "FAILED_data.sql"
+        with self.assertRaises(RuntimeError):
+            with SQLTableWriter(self.exporter, ddl_path, failed_path, schema) as writer:
+                writer.write(df)
+                raise RuntimeError("conversion failed")
+        self.assertEqual([path.name for path in Path(self.temp_dir).glob("FAILED_data.sql*")], [])
+
+    def test_export_bulk_escapes_text_and_nulls(self):
+        """Test COPY text and SQLite CSV bulk-load conventions."""
+        import io
+
+        df = pd.DataFrame({
+            'person_id': [1.0, 2.0],
+            'source_value': ['tab\there', 'a "b", \\c'],
+            'visit_date': pd.to_datetime(['2020-01-01', None]),
+            'flag': [True, False]
+        })
+        schema = {'fields': [{'name': 'person_id', 'type': 'INTEGER'}]}
+
+        copy_output = io.StringIO()
+        null_columns = self.exporter.export_bulk('PERSON', df, copy_output, 'postgresql', schema)
+        self.assertEqual(copy_output.getvalue(),
+                         '1\ttab\\there\t2020-01-01\t1\n'
+                         '2\ta "b", \\\\c\t\\N\t0\n')
+        self.assertEqual(null_columns, ['visit_date'])
+
+        csv_output = io.StringIO()
+        self.exporter.export_bulk('PERSON', df, csv_output, 'sqlite', schema)
+        self.assertEqual(csv_output.getvalue(),
+                         '1,tab\there,2020-01-01,1\n'
+                         '2,"a ""b"", \\c",,0\n')
+
 
 class TestBioCroissantToOMOPConverter(unittest.TestCase):
     """Test end-to-end conversion."""
@@ -345,6 +1042,570 @@ class TestBioCroissantToOMOPConverter(unittest.TestCase):
         self.assertTrue(result['success'])
         self.assertIn('validation_results', result)
 
+    def test_convert_reports_value_domain_violations(self):
+        """Test that fields' ISO 11179 value domains are enforced during validation."""
+        with open(self.test_metadata_path) as f:
+            metadata = json.load(f)
+        metadata['recordSet'][0]['field'][2]['iso11179:valueDomain'] = {
+            '@id': 'vd:Year', 'iso11179:minimumValue': 1978, 'iso11179:maximumValue': 2025
+        }
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        result = self.converter.convert(self.test_metadata_path, output_dir, validate=True, chunk_size=2)
+
+        validation = result['validation_results']['PERSON']
+        self.assertFalse(validation['valid'])
+        self.assertEqual(validation['value_domain_violations'], {'year_of_birth': 1})
+        self.assertIn("Field 'year_of_birth' contains 1 values outside value domain vd:Year", validation['errors'])
+
+    def test_convert_reads_malformed_values_as_null(self):
+        """Test that values not parsing as their dataType are reported instead of failing the table."""
+        pd.DataFrame({
+            'person_id': [1, 2, 3],
+            'gender_concept_id': ['8507', 'abc', '8507'],
+            'year_of_birth': [1980, 1990, 1975],
+            'birth_datetime': ['1980-01-01T08:00:00', 'not a date', '1975-05-05T10:30:00'],
+            'race_concept_id': [8527, 8527, 8516],
+            'ethnicity_concept_id': [38003563, 38003563, 38003564]
+        }).to_csv(self.test_csv, index=False)
+        with open(self.test_metadata_path) as f:
+            metadata = json.load(f)
+        fields = metadata['recordSet'][0]['field']
+        fields[1]['dataType'] = 'sc:Integer'
+        fields.append({"name": "birth_datetime", "omop:cdmField": "birth_datetime", "dataType": "sc:DateTime",
+                       "source": {"fileObject": {"@id": "person_csv"}}})
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        engines = ['pandas', 'arrow'] if pyarrow is not None else ['pandas']
+        for csv_engine in engines:
+            for chunk_size in (None, 2):
+                with self.subTest(csv_engine=csv_engine, chunk_size=chunk_size):
+                    output_dir = Path(self.temp_dir) / f"omop_{csv_engine}_{chunk_size}"
+                    output_dir.mkdir()
+                    converter = BioCroissantToOMOPConverter(csv_engine=csv_engine)
+                    result = converter.convert(self.test_metadata_path, output_dir, validate=True,
+                                               chunk_size=chunk_size)
+
+                    self.assertTrue(result['success'], result['errors'])
+                    self.assertEqual(result['tables']['PERSON']['rows'], 3)
+                    validation = result['validation_results']['PERSON']
+                    self.assertFalse(validation['valid'])
+                    self.assertEqual(validation['parse_failures'], {'gender_concept_id': 1, 'birth_datetime': 1})
+                    self.assertIn("Field 'gender_concept_id' contains 1 values that are not valid integer",
+                                  validation['errors'])
+                    self.assertIn("Field 'birth_datetime' contains 1 values that are not valid datetime",
+                                  validation['errors'])
+
+                    person = pd.read_csv(output_dir / "PERSON.csv")
+                    self.assertEqual(person['gender_concept_id'].tolist()[::2], [8507, 8507])
+                    self.assertTrue(person[['gender_concept_id', 'birth_datetime']].iloc[1].isna().all())
+
+    def test_convert_projects_referenced_columns(self):
+        """Test that only referenced source columns are read unless pass-through is requested."""
+        with open(self.test_metadata_path) as f:
+            metadata = json.load(f)
+        del metadata['recordSet'][0]['field'][3:]
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        columns = {}
+        for project_columns in (True, False):
+            output_dir = Path(self.temp_dir) / f"omop_{project_columns}"
+            output_dir.mkdir()
+            result = self.converter.convert(self.test_metadata_path, output_dir, validate=False,
+                                            project_columns=project_columns)
+            self.assertTrue(result['success'], result['errors'])
+            columns[project_columns] = list(pd.read_csv(output_dir / "PERSON.csv").columns)
+
+        self.assertEqual(columns[True], ['person_id', 'gender_concept_id', 'year_of_birth'])
+        self.assertEqual(columns[False], ['person_id', 'gender_concept_id', 'year_of_birth',
+                                          'race_concept_id', 'ethnicity_concept_id'])
+
+    def test_convert_writes_datetime_csv_independent_of_chunking(self):
+        """Test that DateTime columns keep one CSV format whether or not the table is chunked."""
+        pd.DataFrame({
+            'person_id': [1, 2, 3, 4],
+            'gender_concept_id': [8507, 8532, 8507, 8532],
+            'year_of_birth': [2020, 2020, 2020, 2020],
+            'birth_datetime': ['2020-01-01T00:00:00', '2020-01-02T00:00:00',
+                               '2020-01-03T08:30:00', '2020-01-04T00:00:00'],
+            'race_concept_id': [8527, 8527, 8516, 8516],
+            'ethnicity_concept_id': [38003563, 38003563, 38003564, 38003564]
+        }).to_csv(self.test_csv, index=False)
+        with open(self.test_metadata_path) as f:
+            metadata = json.load(f)
+        metadata['recordSet'][0]['field'].append({
+            "name": "birth_datetime", "omop:cdmField": "birth_datetime", "dataType": "sc:DateTime",
+            "source": {"fileObject": {"@id": "person_csv"}}
+        })
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        outputs = {}
+        for chunk_size in (None, 2):
+            output_dir = Path(self.temp_dir) / f"omop_{chunk_size}"
+            output_dir.mkdir()
+            result = self.converter.convert(self.test_metadata_path, output_dir, chunk_size=chunk_size)
+            self.assertTrue(result['success'], result['errors'])
+            outputs[chunk_size] = (output_dir / "PERSON.csv").read_bytes()
+
+        self.assertEqual(outputs[None], outputs[2])
+        birth_datetime = pd.read_csv(io.BytesIO(outputs[2]), dtype=str)['birth_datetime'].tolist()
+        self.assertEqual(birth_datetime, ['2020-01-01 00:00:00', '2020-01-02 00:00:00',
+                                          '2020-01-03 08:30:00', '2020-01-04 00:00:00'])
+
+    def test_convert_writes_profiled_metadata(self):
+        """Test that profiling writes bio:qualityMetrics without another read."""
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        result = self.converter.convert(self.test_metadata_path, output_dir, chunk_size=2, profile=True)
+
+        self.assertTrue(result['success'])
+        with open(output_dir / result['profiled_metadata']) as f:
+            quality_metrics = json.load(f)['bio:qualityMetrics']
+        self.assertEqual(quality_metrics, result['quality_metrics'])
+        self.assertEqual(quality_metrics['bio:completeness'], {'overall': 1.0, 'PERSON': 1.0})
+        year_of_birth = quality_metrics['bio:profile']['PERSON']['columns']['year_of_birth']
+        self.assertEqual((year_of_birth['minimum'], year_of_birth['maximum']), (1975, 1990))
+        self.assertEqual(year_of_birth['approxDistinctCount'], 3)
+
+    def test_convert_fails_table_on_checksum_mismatch(self):
+        """Test that a distribution whose sha256 does not match fails its table."""
+        with open(self.test_metadata_path) as f:
+            metadata = json.load(f)
+        metadata['distribution'][0]['sha256'] = '0' * 64
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        converter = BioCroissantToOMOPConverter(verify_checksums='error')
+        result = converter.convert(self.test_metadata_path, output_dir, chunk_size=2)
+
+        self.assertFalse(result['success'])
+        self.assertIn('sha256 mismatch', result['errors'][0])
+        self.assertFalse(result['checksums'][str(self.test_csv)]['valid'])
+
+    def test_convert_records_output_distribution(self):
+        """Test that the run manifest describes every output with its checksum."""
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        result = self.converter.convert(self.test_metadata_path, output_dir, output_format='both')
+
+        self.assertEqual(list(result['outputs']), ['PERSON.csv', 'PERSON_data.sql', 'PERSON_ddl.sql',
+                                                   'omop_indices_postgresql.sql'])
+        with open(output_dir / "omop_manifest.json") as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest['distribution'], result['distribution'])
+        csv_entry = result['distribution'][0]
+        with open(output_dir / "PERSON.csv", 'rb') as f:
+            data = f.read()
+        self.assertEqual(csv_entry, {
+            '@type': 'cr:FileObject', '@id': 'PERSON.csv', 'name': 'PERSON.csv', 'contentUrl': 'PERSON.csv',
+            'encodingFormat': 'text/csv', 'contentSize': f"{len(data)} bytes",
+            'sha256': hashlib.sha256(data).hexdigest()
+        })
+
+    def test_convert_streaming_matches_full_conversion(self):
+        """Test that chunked conversion writes the same files as a full load."""
+        full_dir = Path(self.temp_dir) / "full"
+        chunked_dir = Path(self.temp_dir) / "chunked"
+        full_dir.mkdir()
+        chunked_dir.mkdir()
+
+        self.converter.convert(self.test_metadata_path, full_dir, output_format='both')
+        result = self.converter.convert(
+            self.test_metadata_path,
+            chunked_dir,
+            output_format='both',
+            chunk_size=2
+        )
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['tables']['PERSON']['rows'], 3)
+        self.assertEqual(result['tables']['PERSON']['chunks'], 2)
+        for name in ["PERSON.csv", "PERSON_ddl.sql", "PERSON_data.sql"]:
+            self.assertEqual((full_dir / name).read_text(), (chunked_dir / name).read_text())
+
+    @unittest.skipIf(pyarrow is None, "pyarrow not installed")
+    def test_convert_from_parquet_file_set(self):
+        """Test converting a recordSet read from Parquet shards in a contained directory."""
+        export_dir = Path(self.temp_dir) / "export"
+        (export_dir / "person").mkdir(parents=True)
+        person = pd.read_csv(self.test_csv)
+        person.iloc[:2].to_parquet(export_dir / "person" / "part-0.parquet")
+        person.iloc[2:].to_parquet(export_dir / "person" / "part-1.parquet")
+
+        with open(self.test_metadata_path) as f:
+            metadata = json.load(f)
+        metadata['distribution'] = [
+            {"@id": "export_dir", "contentUrl": str(export_dir), "encodingFormat": "application/x-directory"},
+            {
+                "@type": "cr:FileSet",
+                "@id": "person_parts",
+                "containedIn": {"@id": "export_dir"},
+                "encodingFormat": "application/x-parquet",
+                "includes": "person/part-*.parquet"
+            }
+        ]
+        for field in metadata['recordSet'][0]['field']:
+            field['source'] = {"fileSet": {"@id": "person_parts"}}
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        result = self.converter.convert(self.test_metadata_path, output_dir, chunk_size=2)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['tables']['PERSON']['rows'], 3)
+        pd.testing.assert_frame_equal(pd.read_csv(output_dir / "PERSON.csv"), person)
+
+    @unittest.skipIf(shutil.which('sqlite3') is None, "sqlite3 shell not installed")
+    def test_bulk_load_script_loads_sqlite(self):
+        """Test running the generated SQLite load script with the sqlite3 shell."""
+        import sqlite3
+        import subprocess
+
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        result = self.converter.convert(self.test_metadata_path, output_dir, output_format='bulk',
+                                        sql_dialect='sqlite', chunk_size=2)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['load_script'], 'load_sqlite.sql')
+        with open(output_dir / result['load_script']) as script:
+            subprocess.run(['sqlite3', 'omop.db'], stdin=script, cwd=output_dir, check=True)
+        with sqlite3.connect(output_dir / 'omop.db') as connection:
+            rows = connection.execute("SELECT person_id, year_of_birth FROM PERSON ORDER BY person_id").fetchall()
+        self.assertEqual(rows, [(1, 1980), (2, 1990), (3, 1975)])
+
+    def test_convert_loads_sqlite_database(self):
+        """Test loading tables straight into SQLite with keys and indexes added last."""
+        import sqlite3
+
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        result = self.converter.convert(self.test_metadata_path, output_dir, output_format='sqlite',
+                                        chunk_size=2)
+
+        self.assertTrue(result['success'])
+        with sqlite3.connect(output_dir / "omop_cdm.sqlite") as connection:
+            rows = connection.execute("SELECT person_id, year_of_birth FROM PERSON ORDER BY person_id").fetchall()
+            indexes = connection.execute("PRAGMA index_list(PERSON)").fetchall()
+            with self.assertRaises(sqlite3.IntegrityError):
+                connection.execute("INSERT INTO PERSON (person_id) VALUES (1)")
+        self.assertEqual(rows, [(1, 1980), (2, 1990), (3, 1975)])
+        self.assertEqual(sorted((index[1], index[2]) for index in indexes),
+                         [('idx_gender', 0), ('idx_person_id', 0), ('xpk_PERSON', 1)])
+
+    @unittest.skipIf(zstandard is None, "zstandard not installed")
+    def test_convert_with_output_compression(self):
+        """Test that compressed outputs decompress to the uncompressed files."""
+        plain_dir = Path(self.temp_dir) / "plain"
+        zstd_dir = Path(self.temp_dir) / "zstd"
+        plain_dir.mkdir()
+        zstd_dir.mkdir()
+
+        self.converter.convert(self.test_metadata_path, plain_dir, output_format='both')
+        result = self.converter.convert(self.test_metadata_path, zstd_dir, output_format='both',
+                                        chunk_size=2, output_compression='zstd')
+
+        self.assertTrue(result['success'])
+        for name in ["PERSON.csv", "PERSON_ddl.sql", "PERSON_data.sql"]:
+            with zstandard.open(zstd_dir / f"{name}.zst", 'rt', newline='') as f:
+                self.assertEqual(f.read(), (plain_dir / name).read_text())
+
+    def test_incremental_conversion_skips_unchanged_tables(self):
+        """Test that an incremental rerun skips tables with unchanged inputs."""
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+
+        first = self.converter.convert(self.test_metadata_path, output_dir, incremental=True)
+        self.assertEqual(first['tables_converted'], 1)
+        manifest = json.loads((output_dir / "omop_manifest.json").read_text())
+        self.assertEqual(manifest['tables']['PERSON']['artifacts'], ['PERSON.csv'])
+
+        second = self.converter.convert(self.test_metadata_path, output_dir, incremental=True)
+        self.assertTrue(second['success'])
+        self.assertEqual(second['tables_converted'], 0)
+        self.assertEqual(second['tables_skipped'], 1)
+        self.assertTrue(second['tables']['PERSON']['skipped'])
+        self.assertEqual(second['tables']['PERSON']['rows'], 3)
+
+        # Changing the source data forces the table to be converted again
+        df = pd.read_csv(self.test_csv)
+        pd.concat([df, df.assign(person_id=df['person_id'] + 3)]).to_csv(self.test_csv, index=False)
+        third = self.converter.convert(self.test_metadata_path, output_dir, incremental=True)
+        self.assertEqual(third['tables_converted'], 1)
+        self.assertEqual(third['tables']['PERSON']['rows'], 6)
+
+    def test_convert_recordset_from_several_distributions(self):
+        """Test assembling a recordSet whose fields come from two files."""
+        pd.DataFrame({
+            'visit_occurrence_id': [5, 1, 2, 3, 4],
+            'person_id': [5, 1, 2, 3, 4],
+            'visit_concept_id': [9205, 9201, 9202, 9203, 9204]
+        }).to_csv(Path(self.temp_dir) / "encounters.csv", index=False)
+        pd.DataFrame({
+            'visit_occurrence_id': [3, 1, 2, 4, 5],
+            'care_site_id': [30, 10, 20, 40, 50]
+        }).to_csv(Path(self.temp_dir) / "locations.csv", index=False)
+
+        def field(name, dist_id):
+            return {"@id": f"visit/{name}", "name": name,
+                    "source": {"fileObject": {"@id": dist_id}, "extract": {"column": name}}}
+
+        metadata = {
+            "recordSet": [{
+                "@id": "visit",
+                "name": "VISIT_OCCURRENCE",
+                "key": {"@id": "visit/visit_occurrence_id"},
+                "field": [
+                    field("visit_occurrence_id", "encounters_csv"),
+                    field("person_id", "encounters_csv"),
+                    field("care_site_id", "locations_csv"),
+                    field("visit_concept_id", "encounters_csv")
+                ]
+            }],
+            "distribution": [
+                {"@id": "encounters_csv", "contentUrl": "encounters.csv", "encodingFormat": "text/csv"},
+                {"@id": "locations_csv", "contentUrl": "locations.csv", "encodingFormat": "text/csv"}
+            ]
+        }
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        outputs = {}
+        for chunk_size in [None, 2]:
+            output_dir = Path(self.temp_dir) / f"omop_output_{chunk_size}"
+            output_dir.mkdir()
+            result = self.converter.convert(
+                self.test_metadata_path,
+                output_dir,
+                base_path=Path(self.temp_dir),
+                chunk_size=chunk_size
+            )
+            self.assertTrue(result['success'], result['errors'])
+            visits = pd.read_csv(output_dir / "VISIT_OCCURRENCE.csv")
+            self.assertEqual(list(visits.columns),
+                             ['visit_occurrence_id', 'person_id', 'care_site_id', 'visit_concept_id'])
+            self.assertEqual(list(visits['visit_occurrence_id']), [5, 1, 2, 3, 4])
+            self.assertEqual(list(visits['care_site_id']), [50, 10, 20, 30, 40])
+            outputs[chunk_size] = (output_dir / "VISIT_OCCURRENCE.csv").read_bytes()
+        # Chunked joins keep the driving file's row order
+        self.assertEqual(outputs[None], outputs[2])
+
+    def test_convert_checks_foreign_keys_across_tables(self):
+        """Test that orphaned foreign keys are found across chunked tables."""
+        pd.DataFrame({
+            'condition_occurrence_id': [10, 11, 12, 13],
+            'person_id': [1, 3, 7, 7],
+            'condition_concept_id': [201826, 201826, 320128, 320128]
+        }).to_csv(Path(self.temp_dir) / "condition.csv", index=False)
+        with open(self.test_metadata_path) as f:
+            metadata = json.load(f)
+        metadata['recordSet'].append({
+            "name": "CONDITION_OCCURRENCE",
+            "omop:cdmTable": "CONDITION_OCCURRENCE",
+            "field": [
+                {"name": name, "omop:cdmField": name, "source": {"fileObject": {"@id": "condition_csv"}}}
+                for name in ["condition_occurrence_id", "condition_concept_id"]
+            ] + [{
+                "name": "person_id",
+                "omop:cdmField": "person_id",
+                "omop:foreignKeyTable": "PERSON",
+                "source": {"fileObject": {"@id": "condition_csv"}}
+            }]
+        })
+        metadata['distribution'].append({
+            "@id": "condition_csv",
+            "contentUrl": str(Path(self.temp_dir) / "condition.csv"),
+            "encodingFormat": "text/csv"
+        })
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        result = self.converter.convert(self.test_metadata_path, output_dir, chunk_size=2, incremental=True)
+
+        integrity = result['referential_integrity']
+        self.assertFalse(integrity['valid'])
+        reference = integrity['references'][0]
+        self.assertEqual((reference['ref_table'], reference['ref_field']), ('PERSON', 'person_id'))
+        self.assertEqual((reference['checked'], reference['orphaned'], reference['sample']), (4, 2, [7]))
+        self.assertIn("Foreign key 'CONDITION_OCCURRENCE.person_id' has 2 orphaned references to PERSON.person_id",
+                      result['errors'])
+        self.assertEqual(result['tables']['PERSON'].get('skipped'), None)
+        self.assertTrue((output_dir / "omop_keys" / "PERSON.npz").exists())
+
+        # Skipped tables are checked from the keys saved next to the manifest, without reading any source
+        reads = []
+        iter_distribution = self.converter.extractor.iter_distribution
+        self.converter.extractor.iter_distribution = lambda *args, **kwargs: reads.append(args) or iter_distribution(
+            *args, **kwargs)
+        rerun = self.converter.convert(self.test_metadata_path, output_dir, chunk_size=2, incremental=True)
+        self.assertEqual(rerun['tables_skipped'], 2)
+        self.assertEqual(reads, [])
+        self.assertEqual(rerun['referential_integrity'], integrity)
+
+    def test_shared_distribution_is_parsed_once(self):
+        """Test that recordSets sharing a distribution hit the read cache."""
+        with open(self.test_metadata_path) as f:
+            metadata = json.load(f)
+        metadata['recordSet'].append({
+            "name": "OBSERVATION_PERIOD",
+            "omop:cdmTable": "OBSERVATION_PERIOD",
+            "field": [
+                {"name": "person_id", "source": {"fileObject": {"@id": "person_csv"}}},
+                {"name": "year_of_birth", "source": {"fileObject": {"@id": "person_csv"}}}
+            ]
+        })
+        metadata['recordSet'].append({
+            "name": "OBSERVATION",
+            "omop:cdmTable": "OBSERVATION",
+            "field": [
+                {"name": "person_id", "source": {"fileObject": {"@id": "person_csv"}}}
+            ]
+        })
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        converter = BioCroissantToOMOPConverter(cache_bytes=1024 * 1024)
+        result = converter.convert(self.test_metadata_path, output_dir, validate=False)
+
+        self.assertTrue(result['success'], result['errors'])
+        self.assertEqual(result['read_cache']['misses'], 1)
+        self.assertEqual(result['read_cache']['hits'], 2)
+        observation_period = pd.read_csv(output_dir / "OBSERVATION_PERIOD.csv")
+        self.assertEqual(list(observation_period.columns), ['person_id', 'year_of_birth'])
+        self.assertEqual(list(observation_period['year_of_birth']), [1980, 1990, 1975])
+
+    def test_convert_parallel_merges_results(self):
+        """Test converting recordSets in a process pool."""
+        with open(self.test_metadata_path) as f:
+            metadata = json.load(f)
+        condition = pd.DataFrame({
+            'condition_occurrence_id': [1, 2],
+            'person_id': [1, 3],
+            'condition_concept_id': [320128, 201826],
+            'condition_start_date': ['2020-01-01', '2021-06-15'],
+            'condition_type_concept_id': [32020, 32020]
+        })
+        condition.to_csv(Path(self.temp_dir) / "condition.csv", index=False)
+        metadata['distribution'].append({
+            "@id": "condition_csv",
+            "contentUrl": str(Path(self.temp_dir) / "condition.csv"),
+            "encodingFormat": "text/csv"
+        })
+        metadata['recordSet'].append({
+            "name": "CONDITION_OCCURRENCE",
+            "omop:cdmTable": "CONDITION_OCCURRENCE",
+            "field": [
+                {"name": column, "source": {"fileObject": {"@id": "condition_csv"}}}
+                for column in condition.columns
+            ]
+        })
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        result = self.converter.convert(self.test_metadata_path, output_dir, workers=2)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['tables_converted'], 2)
+        self.assertEqual(list(result['tables']), ['PERSON', 'CONDITION_OCCURRENCE'])
+        self.assertEqual(result['tables']['CONDITION_OCCURRENCE']['rows'], 2)
+        self.assertTrue(result['validation_results']['CONDITION_OCCURRENCE']['valid'])
+        self.assertTrue((output_dir / "CONDITION_OCCURRENCE.csv").exists())
+
+    @unittest.skipIf(pyarrow is None, "pyarrow not installed")
+    def test_convert_to_parquet_with_omop_types(self):
+        """Test Parquet output typed from the OMOP table schema."""
+        import pyarrow.parquet as pq
+
+        with open(self.test_metadata_path) as f:
+            metadata = json.load(f)
+        metadata['recordSet'][0]['field'][2]['dataType'] = 'sc:Integer'
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        result = self.converter.convert(self.test_metadata_path, output_dir, output_format='parquet',
+                                        chunk_size=2, parquet_compression='zstd', parquet_row_group_size=2)
+
+        self.assertTrue(result['success'])
+        parquet_file = pq.ParquetFile(output_dir / "PERSON.parquet")
+        self.assertEqual(parquet_file.metadata.num_rows, 3)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+        self.assertEqual(parquet_file.metadata.row_group(0).column(0).compression, 'ZSTD')
+        self.assertEqual(parquet_file.schema_arrow.field('year_of_birth').type, pyarrow.int64())
+        self.assertEqual(parquet_file.read().column('person_id').to_pylist(), [1, 2, 3])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow not installed")
+    def test_convert_to_partitioned_parquet(self):
+        """Test Hive-partitioned Parquet output on the distribution key."""
+        import pyarrow.dataset as pa_dataset
+
+        with open(self.test_metadata_path) as f:
+            metadata = json.load(f)
+        metadata['recordSet'][0]['omop:distributionKey'] = 'person_id'
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        result = self.converter.convert(self.test_metadata_path, output_dir, output_format='parquet',
+                                        partition_parquet=True, partition_buckets=2, chunk_size=1)
+
+        self.assertTrue(result['success'])
+        partitions = sorted(path.name for path in (output_dir / "PERSON").iterdir())
+        self.assertEqual(partitions, ['person_id_bucket=0', 'person_id_bucket=1'])
+        # Chunks are buffered, so each partition gets one file
+        self.assertEqual([len(list((output_dir / "PERSON" / partition).iterdir())) for partition in partitions],
+                         [1, 1])
+        dataset = pa_dataset.dataset(output_dir / "PERSON", partitioning='hive')
+        table = dataset.to_table(filter=pa_dataset.field('person_id_bucket') == 1)
+        self.assertEqual(sorted(table.column('person_id').to_pylist()), [1, 3])
+
+
+    @unittest.skipIf(pyarrow is None, "pyarrow not installed")
+    def test_convert_to_parquet_partitioned_on_many_keys(self):
+        """Test partitioning on more keys than pyarrow's default limit of 1024 partitions."""
+        import pyarrow.dataset as pa_dataset
+
+        persons = 1100
+        pd.DataFrame({
+            'person_id': range(1, persons + 1),
+            'gender_concept_id': [8507, 8532] * (persons // 2),
+            'year_of_birth': [1980] * persons,
+            'race_concept_id': [8527] * persons,
+            'ethnicity_concept_id': [38003563] * persons
+        }).to_csv(self.test_csv, index=False)
+        with open(self.test_metadata_path) as f:
+            metadata = json.load(f)
+        metadata['recordSet'][0]['omop:distributionKey'] = 'person_id'
+        with open(self.test_metadata_path, 'w') as f:
+            json.dump(metadata, f)
+
+        output_dir = Path(self.temp_dir) / "omop_output"
+        output_dir.mkdir()
+        result = self.converter.convert(self.test_metadata_path, output_dir, output_format='parquet',
+                                        validate=False, partition_parquet=True)
+
+        self.assertTrue(result['success'], result['errors'])
+        self.assertEqual(len(list((output_dir / "PERSON").iterdir())), persons)
+        dataset = pa_dataset.dataset(output_dir / "PERSON", partitioning='hive')
+        self.assertEqual(dataset.count_rows(), persons)
 
 if __name__ == '__main__':
     unittest.main()
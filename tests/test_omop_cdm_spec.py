@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Test suite for the OMOP CDM 5.4 specification registry."""
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.omop_cdm_spec import OMOPSpecRegistry, count_type_violations
+
+
+class TestOMOPSpecRegistry(unittest.TestCase):
+    """Test compiling the field-level specification."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.registry = OMOPSpecRegistry.load()
+
+    def test_registry_covers_cdm_and_oncology_tables(self):
+        """Test tables, keys and required fields compiled from the CSVs."""
+        self.assertIs(OMOPSpecRegistry.load(), self.registry)
+        self.assertIn('MEASUREMENT', self.registry)
+        self.assertIn('episode', self.registry)
+
+        person = self.registry.table('PERSON')
+        self.assertEqual(person.primary_key, ['person_id'])
+        self.assertEqual(person.required_fields, ['person_id', 'gender_concept_id', 'year_of_birth',
+                                                  'race_concept_id', 'ethnicity_concept_id'])
+        self.assertEqual(person.fields['gender_concept_id'].fk_table, 'CONCEPT')
+        self.assertEqual(person.fields['person_source_value'].max_length, 50)
+        self.assertEqual(self.registry.table('DEATH').primary_key, [])
+
+    def test_count_type_violations(self):
+        """Test the vectorized datatype checks on typed and text columns."""
+        person = self.registry.table('PERSON').fields
+        self.assertEqual(count_type_violations(person['person_id'], pd.Series([1, 2, None], dtype='Int64')), 0)
+        self.assertEqual(count_type_violations(person['person_id'], pd.Series([1.0, 2.5, np.nan])), 1)
+        self.assertEqual(count_type_violations(person['person_id'], pd.Series(['1', 'x', None, '3000000000'])), 2)
+        # integer spans -2**31 to 2**31 - 1, checked exactly on typed columns
+        bounds = [-2 ** 31, 2 ** 31 - 1, -2 ** 31 - 1, 2 ** 31, None]
+        self.assertEqual(count_type_violations(person['person_id'], pd.Series(bounds, dtype='Int64')), 2)
+        self.assertEqual(count_type_violations(person['person_id'], pd.Series(bounds, dtype='float64')), 2)
+        self.assertEqual(count_type_violations(person['person_id'], pd.Series([str(-2 ** 31), str(2 ** 31)])), 1)
+        self.assertEqual(count_type_violations(person['birth_datetime'],
+                                               pd.Series(['2020-01-01', '2020-13-01', None])), 1)
+        self.assertEqual(count_type_violations(person['person_source_value'], pd.Series(['a' * 51, 'b'])), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()